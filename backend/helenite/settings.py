@@ -68,6 +68,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'helenite.wsgi.application'
+ASGI_APPLICATION = 'helenite.asgi.application'
 
 
 # Database
@@ -85,6 +86,27 @@ DATABASES = {
 }
 
 
+# Cache shared by every process serving the API, on Redis. Authentication keeps
+# the tokens on it and the response cache its versions, so it must be shared:
+# with a per-process cache, a token revoked or a post changed through one
+# process goes unnoticed by the others until their entries expire. The local
+# memory fallback is only meant for a single process (development); the
+# "helenite_app.W001" and "W002" checks warn about it.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -154,8 +176,103 @@ REST_FRAMEWORK = {
     ],
 }
 
+# For how many seconds an authentication token (and its user) is kept on the
+# cache. Set it to 0 to always read tokens from the database.
+HELENITE_TOKEN_CACHE_TIMEOUT = 60
+
+# How many of the most recent likers are listed on each post. The full list is
+# served by the likes endpoint of the post.
+HELENITE_LIKES_PREVIEW_SIZE = 3
+
+# Maximum amount of likes and unlikes accepted by a single request to the bulk
+# likes endpoint (and of posts checked at once).
+HELENITE_BULK_LIKES_MAX_SIZE = 100
+
+# For how many seconds the shared part of the profile and single post responses
+# is kept on the cache. Entries are invalidated as soon as what they show
+# changes; set it to 0 to always build the responses. The versions behind the
+# invalidation and the ETags are kept on the default cache, which must be shared
+# by every process (REDIS_URL): otherwise a change is only seen by the process
+# making it, and the others serve stale responses until they expire.
+HELENITE_RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+# For how many seconds the versions of the posts, profiles and feeds behind the
+# cached responses and their ETags are kept (at least twice the response cache
+# timeout). Once expired, the next request just builds the response again.
+HELENITE_RESPONSE_VERSION_TIMEOUT = 60 * 60
+
+# Maximum amount of changes read by a single request to the feed sync endpoint,
+# and for how many days the changes are kept ("prune_feed_events" command).
+# Clients holding an older cursor have to reload their feed.
+HELENITE_FEED_SYNC_MAX_SIZE = 500
+HELENITE_FEED_EVENTS_RETENTION = 7
+
+# Seconds a feed event waits before being handed out by the sync endpoint, so
+# the events written by transactions still running (which may commit after
+# events with later ids) aren't skipped. Must exceed the longest transaction
+# writing posts, likes or comments.
+HELENITE_FEED_SYNC_COMMIT_LAG = 5
+
+# Broker delivering the events of the feed stream (served by the ASGI
+# application). The default one works within a single process; deployments with
+# many processes plug in a shared one (see helenite_app.events.BaseBroker).
+# Streams send a comment every HELENITE_STREAM_KEEPALIVE seconds without events,
+# are closed after HELENITE_STREAM_MAX_AGE seconds (clients reconnect), and drop
+# events once HELENITE_STREAM_QUEUE_SIZE are waiting to be sent.
+HELENITE_STREAM_BROKER = 'helenite_app.events.LocalBroker'
+HELENITE_STREAM_KEEPALIVE = 15
+HELENITE_STREAM_MAX_AGE = 60 * 5
+HELENITE_STREAM_QUEUE_SIZE = 100
+
+# Serves the feed, discover, search and profile reads with async views, which
+# wait on the database and the search provider without holding a thread. Only
+# worth it under the ASGI application (uvicorn); WSGI servers run them on a new
+# event loop per request.
+HELENITE_ASYNC_VIEWS = bool(os.environ.get('HELENITE_ASYNC_VIEWS'))
+
+# Size of the pool of public posts sampled by the discover page, how many
+# windows of consecutive posts (starting at random ids) it is read from, and for
+# how many seconds it is kept on the cache before being rebuilt.
+HELENITE_DISCOVER_POOL_SIZE = 1000
+HELENITE_DISCOVER_POOL_WINDOWS = 10
+HELENITE_DISCOVER_POOL_TIMEOUT = 60 * 5
+
+# Backend used by the search endpoint. Besides Algolia, searches can be served
+# locally by "helenite_app.search.PostgresSearchBackend" (full-text search) or
+# "helenite_app.search.InMemorySearchBackend" (development and tests).
+HELENITE_SEARCH_BACKEND = 'helenite_app.search.AlgoliaSearchBackend'
+
+# Maximum amount of search queries kept on the (per-process) result cache, and
+# for how many seconds they are kept.
+HELENITE_SEARCH_CACHE_SIZE = 1000
+HELENITE_SEARCH_CACHE_TIMEOUT = 60
+
+# Time budget, in seconds, for each call to Algolia (including the retries on its
+# other hosts). After HELENITE_SEARCH_FAILURE_THRESHOLD consecutive failed or slow
+# calls, searches fail fast for HELENITE_SEARCH_RESET_TIMEOUT seconds. Sync calls
+# run on a pool of HELENITE_SEARCH_THREADS threads.
+HELENITE_SEARCH_TIMEOUT = 2
+HELENITE_SEARCH_FAILURE_THRESHOLD = 5
+HELENITE_SEARCH_RESET_TIMEOUT = 30
+HELENITE_SEARCH_THREADS = 10
+
+# Maximum amount of index changes synced with Algolia per batch by the
+# "process_index_changes" command. Failed batches are retried after
+# HELENITE_INDEXING_RETRY_DELAY seconds, doubling on every attempt up to
+# HELENITE_INDEXING_MAX_RETRY_DELAY seconds.
+HELENITE_INDEXING_BATCH_SIZE = 500
+HELENITE_INDEXING_RETRY_DELAY = 5
+HELENITE_INDEXING_MAX_RETRY_DELAY = 60 * 10
+
+# Seconds the changes claimed by an indexing worker are hidden from the other
+# workers while they're synced; if the worker dies, they're retried afterwards.
+HELENITE_INDEXING_CLAIM_TIMEOUT = 60 * 5
+
+# Saves and deletes are queued on the IndexChange table instead of being sent to
+# Algolia during the request (see helenite_app.indexing).
 ALGOLIA = {
     'APPLICATION_ID': os.environ.get('ALGOLIA_APPLICATION_ID'),
     'API_KEY': os.environ.get('ALGOLIA_API_KEY'),
-    'INDEX_PREFIX': 'Helenite'
+    'INDEX_PREFIX': 'Helenite',
+    'AUTO_INDEXING': False,
 }
@@ -1,13 +1,28 @@
 import pytest
 
 from django.utils import timezone
+from django.core.cache import cache
 from django.contrib.auth.models import User
 
 from rest_framework.authtoken.models import Token
 
+from helenite_app.search import result_cache
 from helenite_app.models import Profile, Post
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Makes sure nothing cached by a test leaks into the next one.
+    """
+
+    cache.clear()
+    result_cache.clear()
+    yield
+    cache.clear()
+    result_cache.clear()
+
+
 @pytest.fixture
 def create_new_user(
     db, username="test", email="test@email.com", password="dasad232das234"
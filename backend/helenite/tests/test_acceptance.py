@@ -1,18 +1,40 @@
+import io
 import os
 import json
 import pytest
 
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+
 from django.urls import reverse
-from django.test import RequestFactory
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from django.test import AsyncClient, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework.authtoken.models import Token
 
 from helenite import settings
 
+from helenite_app import events, response_cache, search, views
 from helenite_app.views import SearchListView
-from helenite_app.models import FriendRequest, Profile, Post
+from helenite_app.serializers import (
+    SinglePostSerializer,
+    FeedForSingleProfileSerializer,
+)
+from helenite_app.models import (
+    FriendRequest,
+    Profile,
+    Post,
+    Like,
+    Comment,
+    FeedEvent,
+)
 
 
 test_data_path = os.path.join(settings.BASE_DIR, r"helenite/tests/")
@@ -177,7 +199,7 @@ def test_feed_endpoint_get_method(
     response = client.get(reverse("feed_endpoint"), headers=headers)
 
     assert response.status_code == 200
-    assert response.data["count"] == 1
+    assert len(response.data["results"]) == 1
     assert response.data["results"] != []
 
 
@@ -198,10 +220,55 @@ def test_feed_endpoint_get_method_no_results(
     response = client.get(reverse("feed_endpoint"), headers=headers)
 
     assert response.status_code == 200
-    assert response.data["count"] == 0
+    assert response.data["next"] is None
     assert response.data["results"] == []
 
 
+def test_feed_endpoint_cursor_pagination(
+    db, user_and_token, valid_data_for_post, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the feed can be scrolled through with the cursor, and that new posts
+    don't shift the pages already being read.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    for _ in range(30):
+        valid_data_for_post["post_slug"] = None
+        Post.objects.create(**valid_data_for_post)
+
+    client = APIClient()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first_page = client.get(reverse("feed_endpoint"), headers=headers)
+
+    assert len(first_page.data["results"]) == 25
+    assert first_page.data["next"] is not None
+
+    valid_data_for_post["post_slug"] = None
+    Post.objects.create(**valid_data_for_post)
+
+    second_page = client.get(first_page.data["next"], headers=headers)
+
+    assert len(second_page.data["results"]) == 5
+    assert second_page.data["next"] is None
+
+    endpoints = [post["endpoint"] for post in first_page.data["results"]]
+    endpoints += [post["endpoint"] for post in second_page.data["results"]]
+
+    assert len(set(endpoints)) == 30
+
+    invalid_cursor = client.get(
+        reverse("feed_endpoint") + "?cursor=invalid", headers=headers
+    )
+
+    assert invalid_cursor.status_code == 404
+
+
 def test_feed_endpoint_post_method_success(
     db, user_and_token, valid_data_for_user_and_profile
 ) -> None:
@@ -231,7 +298,7 @@ def test_feed_endpoint_post_method_success(
     response_for_post = client.get(reverse("feed_endpoint"), headers=headers)
 
     assert response_for_post.status_code == 200
-    assert response_for_post.data["count"] == 1
+    assert len(response_for_post.data["results"]) == 1
 
     # Invalid data
     invalid_data = {}
@@ -284,6 +351,399 @@ def test_feed_endpoint_put_method_success(
     assert response_unlike.data["detail"] == "Successfully unliked post."
 
 
+def test_feed_endpoint_friends_posts(
+    db, user_and_token, valid_data_for_post, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that posts made by friends reach the feed, both the ones made before the
+    friendship was accepted and the ones made after.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    friend = User.objects.create(username="test2", password="3213asd312ads")
+    valid_data_for_user_and_profile["user"] = friend
+    valid_data_for_user_and_profile["custom_slug_profile"] = "test2user"
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = friend
+    Post.objects.create(**valid_data_for_post)
+
+    client = APIClient()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response_before = client.get(reverse("feed_endpoint"), headers=headers)
+
+    assert response_before.data["results"] == []
+
+    FriendRequest.objects.create(request_made_by=friend, request_sent_to=user)
+    client.put(
+        reverse("profile_info_endpoint", kwargs={"custom_slug_profile": "test2user"}),
+        headers=headers,
+    )
+
+    valid_data_for_post["post_slug"] = "newpost123"
+    Post.objects.create(**valid_data_for_post)
+
+    response_after = client.get(reverse("feed_endpoint"), headers=headers)
+
+    assert response_after.status_code == 200
+    assert len(response_after.data["results"]) == 2
+    assert "newpost123" in response_after.data["results"][0]["endpoint"]
+
+
+def test_feed_endpoint_query_count(
+    db, user_and_token, valid_data_for_post, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the amount of queries needed to render the feed doesn't grow with
+    the amount of posts, likes and comments on the page.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+
+    friend = User.objects.create(username="test2", password="3213asd312ads")
+    valid_data_for_user_and_profile["user"] = friend
+    valid_data_for_user_and_profile["custom_slug_profile"] = "test2user"
+    profile.friends.add(Profile.objects.create(**valid_data_for_user_and_profile))
+
+    client = APIClient()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def create_posts(amount):
+        for _ in range(amount):
+            valid_data_for_post["post_parent_user"] = friend
+            valid_data_for_post["post_slug"] = None
+            post = Post.objects.create(**valid_data_for_post)
+            Like.objects.create(like_owner=user, like_parent_post=post)
+            Like.objects.create(like_owner=friend, like_parent_post=post)
+            Comment.objects.create(
+                comment_user=user, comment_parent_post=post, comment_text="test"
+            )
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(reverse("feed_endpoint"), headers=headers)
+        assert response.status_code == 200
+        return len(response.data["results"]), len(context.captured_queries)
+
+    # Warms up the token cache, so both measures are taken the same way.
+    count_queries()
+
+    create_posts(2)
+    few_posts, few_queries = count_queries()
+
+    create_posts(8)
+    many_posts, many_queries = count_queries()
+
+    assert (few_posts, many_posts) == (2, 10)
+    assert few_queries == many_queries
+    assert many_queries <= 8
+
+
+def test_feed_sync_endpoint(
+    db, settings, user_and_token, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the sync endpoint only returns what changed on the feed since the
+    cursor: new posts from friends, changed counters and deleted posts.
+    """
+
+    settings.HELENITE_FEED_SYNC_COMMIT_LAG = 0
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+
+    friend = User.objects.create(username="friend")
+    friend_profile = Profile.objects.create(
+        user=friend,
+        first_name="Jane",
+        last_name="Doe",
+        birthday="2001-01-01",
+        birth_place="United States",
+    )
+    profile.friends.add(friend_profile)
+    stranger = User.objects.create(username="stranger")
+
+    liked = Post.objects.create(post_parent_user=user, post_text="Liked.")
+    deleted = Post.objects.create(post_parent_user=friend, post_text="Deleted.")
+
+    headers = {"Authorization": f"Bearer {token}"}
+    client = APIClient()
+    url = reverse("feed_sync_endpoint")
+
+    cursor = client.get(url, headers=headers).data["cursor"]
+
+    new_post = Post.objects.create(post_parent_user=friend, post_text="New.")
+    Post.objects.create(post_parent_user=stranger, post_text="Not a friend.")
+    client.put(
+        reverse("feed_endpoint"),
+        {"post_slug": liked.post_slug},
+        headers=headers,
+        format="json",
+    )
+    deleted_endpoint = deleted.endpoint
+    deleted.delete()
+
+    response = client.get(url, {"cursor": cursor}, headers=headers)
+
+    assert response.status_code == 200
+    assert [post["endpoint"] for post in response.data["posts"]] == [new_post.endpoint]
+    assert response.data["updated"] == [
+        {"endpoint": liked.endpoint, "likes_count": 1, "comments_count": 0}
+    ]
+    assert response.data["deleted"] == [deleted_endpoint]
+    assert response.data["has_more"] is False
+
+    response = client.get(url, {"cursor": response.data["cursor"]}, headers=headers)
+
+    assert (response.data["posts"], response.data["updated"]) == ([], [])
+    assert response.data["deleted"] == []
+
+    settings.HELENITE_FEED_EVENTS_RETENTION = 0
+    response = client.get(url, {"cursor": cursor}, headers=headers)
+
+    assert response.status_code == 410
+
+
+def test_feed_sync_cursor(
+    db, settings, user_and_token, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the sync endpoint holds back the events younger than the commit
+    lag, and that a cursor catching up expires once the events after its last
+    event may have been pruned.
+    """
+
+    settings.HELENITE_FEED_SYNC_COMMIT_LAG = 60
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    client = APIClient()
+    url = reverse("feed_sync_endpoint")
+
+    cursor = client.get(url, headers=headers).data["cursor"]
+    posts = [
+        Post.objects.create(post_parent_user=user, post_text=f"Post {number}.")
+        for number in range(2)
+    ]
+
+    response = client.get(url, {"cursor": cursor}, headers=headers)
+    assert response.data["posts"] == []
+
+    # The events are now older than the commit lag, and than the retention for
+    # the first one.
+    FeedEvent.objects.filter(event_post_id=posts[0].id).update(
+        event_created_at=timezone.now() - timedelta(days=8)
+    )
+    FeedEvent.objects.filter(event_post_id=posts[1].id).update(
+        event_created_at=timezone.now() - timedelta(minutes=2)
+    )
+
+    settings.HELENITE_FEED_SYNC_MAX_SIZE = 1
+    response = client.get(url, {"cursor": cursor}, headers=headers)
+
+    assert [post["endpoint"] for post in response.data["posts"]] == [posts[0].endpoint]
+    assert response.data["has_more"] is True
+
+    response = client.get(url, {"cursor": response.data["cursor"]}, headers=headers)
+
+    assert response.status_code == 410
+
+
+def test_feed_stream_endpoint(
+    db,
+    settings,
+    django_capture_on_commit_callbacks,
+    user_and_token,
+    valid_data_for_user_and_profile,
+) -> None:
+    """
+    Tests that new posts from friends and likes on them are pushed to the feed
+    stream, and that the stream needs authentication.
+    """
+
+    settings.HELENITE_STREAM_KEEPALIVE = 0.1
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+
+    friend = User.objects.create(username="friend")
+    profile.friends.add(
+        Profile.objects.create(
+            user=friend,
+            first_name="Jane",
+            last_name="Doe",
+            birthday="2001-01-01",
+            birth_place="United States",
+        )
+    )
+    stranger = User.objects.create(username="stranger")
+
+    def change_posts():
+        with django_capture_on_commit_callbacks(execute=True):
+            Post.objects.create(post_parent_user=stranger, post_text="Not a friend.")
+            post = Post.objects.create(post_parent_user=friend, post_text="New.")
+        with django_capture_on_commit_callbacks(execute=True):
+            Like.objects.create(like_owner=friend, like_parent_post=post)
+        return post
+
+    async def read_stream():
+        client = AsyncClient()
+        url = reverse("feed_stream_endpoint")
+
+        response = await client.get(url)
+        assert response.status_code == 401
+
+        response = await client.get(url, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "text/event-stream"
+
+        content = response.streaming_content
+        assert await anext(content) == b"retry: 1000\n\n"
+        assert await anext(content) == b": keep-alive\n\n"
+
+        post = await sync_to_async(change_posts)()
+        messages = [(await anext(content)).decode() for _ in range(2)]
+        await content.aclose()
+        return post, messages
+
+    # Streams aren't served over WSGI.
+    assert Client().get(reverse("feed_stream_endpoint")).status_code == 501
+
+    post, messages = async_to_sync(read_stream)()
+
+    assert not events.get_broker().has_subscribers()
+
+    assert [message.split("\n")[0] for message in messages] == [
+        "event: post",
+        "event: like",
+    ]
+    assert json.loads(messages[1].split("data: ")[1]) == {
+        "type": "like",
+        "endpoint": post.endpoint,
+    }
+
+
+def test_async_read_views(
+    db, settings, user_and_token, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the async variants of the read-heavy views answer like the DRF
+    views they replace, and pass the other methods on to them.
+    """
+
+    settings.HELENITE_SEARCH_BACKEND = "helenite_app.search.InMemorySearchBackend"
+    search.get_search_backend().reset()
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+
+    friend = User.objects.create(username="friend")
+    profile.friends.add(
+        Profile.objects.create(
+            user=friend,
+            first_name="Jane",
+            last_name="Doe",
+            birthday="2001-01-01",
+            birth_place="United States",
+            custom_slug_profile="friend",
+        )
+    )
+    post = Post.objects.create(post_parent_user=friend, post_text="Hello there.")
+    Like.objects.create(like_owner=user, like_parent_post=post)
+
+    client = APIClient()
+    factory = APIRequestFactory()
+    headers = {"Authorization": f"Bearer {token}"}
+    search_url = reverse("search_endpoint")
+    cases = [
+        (views.AsyncFeedListAPIView, reverse("feed_endpoint"), {}),
+        (views.AsyncDiscoverListAPIView, reverse("discover_endpoint"), {}),
+        (views.AsyncSearchListView, f"{search_url}?q=jane", {}),
+        (views.AsyncSearchListView, f"{search_url}?q=hello&index=Helenite_Post", {}),
+        (
+            views.AsyncProfileRetriveAPIView,
+            reverse("profile_info_endpoint", kwargs={"custom_slug_profile": "friend"}),
+            {"custom_slug_profile": "friend"},
+        ),
+    ]
+    for view_class, url, kwargs in cases:
+        view = async_to_sync(view_class.as_view())
+        expected = client.get(url, headers=headers)
+        response = view(factory.get(url, headers=headers), **kwargs)
+
+        assert response.status_code == expected.status_code == 200
+        assert response.data == expected.data
+
+    feed = async_to_sync(views.AsyncFeedListAPIView.as_view())
+    url = reverse("feed_endpoint")
+
+    etag = client.get(url, headers=headers)["ETag"]
+    response = feed(factory.get(url, headers={**headers, "If-None-Match": etag}))
+
+    assert response.status_code == 304
+
+    response = feed(
+        factory.put(
+            url,
+            {"post_slug": post.post_slug},
+            format="json",
+            headers=headers,
+        )
+    )
+
+    assert response.status_code == 200
+    assert not Like.objects.exists()
+
+    # Last, since DRF marks the transaction of the test for rollback on errors.
+    assert feed(factory.get(url)).status_code == 401
+
+
+def test_load_test_command(
+    live_server, tmp_path, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the load test reports the throughput of every endpoint on every
+    server.
+    """
+
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    Post.objects.create(post_parent_user=profile.user, post_text="Hello there.")
+    report = tmp_path / "load_test.json"
+
+    call_command(
+        "load_test",
+        f"first={live_server.url}",
+        f"second={live_server.url}/",
+        "--username",
+        profile.user.username,
+        "--endpoints",
+        "feed,profile",
+        # The live server shares a single connection to the in-memory database.
+        "--concurrency",
+        "1",
+        "--duration",
+        "0.2",
+        "--report",
+        str(report),
+        stdout=io.StringIO(),
+    )
+
+    results = json.loads(report.read_text())["endpoints"]
+    assert sorted(results) == ["feed", "profile"]
+    for endpoint in results.values():
+        assert sorted(endpoint) == ["first", "second"]
+        assert all(result["requests"] > 0 for result in endpoint.values())
+        assert all(result["errors"] == 0 for result in endpoint.values())
+
+
 def test_discover_endoint_success(
     db, user_and_token, valid_data_for_post, valid_data_for_user_and_profile
 ) -> None:
@@ -313,6 +773,45 @@ def test_discover_endoint_success(
     assert response.data["results"] != []
 
 
+def test_discover_endpoint_excludes_own_and_private_posts(
+    db, user_and_token, valid_data_for_post, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the discover endpoint leaves out the posts made by the user and by
+    private profiles, even when the profile went private after the pool was built.
+    """
+
+    user1, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user1
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    user2 = User.objects.create(username="test2", password="3213asd312ads")
+    valid_data_for_user_and_profile["user"] = user2
+    valid_data_for_user_and_profile["custom_slug_profile"] = "test2user"
+    profile2 = Profile.objects.create(**valid_data_for_user_and_profile)
+
+    for author in [user1, user2]:
+        valid_data_for_post["post_parent_user"] = author
+        valid_data_for_post["post_slug"] = None
+        Post.objects.create(**valid_data_for_post)
+
+    client = APIClient()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response_public = client.get(reverse("discover_endpoint"), headers=headers)
+
+    assert response_public.data["count"] == 1
+    assert response_public.data["results"][0]["profile"]["username"] == "test2"
+
+    profile2.private_profile = True
+    profile2.save()
+
+    response_private = client.get(reverse("discover_endpoint"), headers=headers)
+
+    assert response_private.status_code == 200
+    assert response_private.data["count"] == 0
+
+
 def test_profile_endpoint(
     db, user_and_token, valid_data_for_post, valid_data_for_user_and_profile
 ) -> None:
@@ -349,6 +848,42 @@ def test_profile_endpoint(
     assert "Not found." in invalid_response.data["detail"]
 
 
+def test_profile_endpoint_posts_pagination(
+    db, user_and_token, valid_data_for_post, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the profile endpoint only returns the first page of posts, and that
+    the rest can be read through the profile posts endpoint.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    for _ in range(30):
+        valid_data_for_post["post_slug"] = None
+        Post.objects.create(**valid_data_for_post)
+
+    client = APIClient()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    profile_response = client.get(
+        reverse("profile_info_endpoint", kwargs={"custom_slug_profile": "test"}),
+        headers=headers,
+    )
+
+    assert profile_response.status_code == 200
+    assert len(profile_response.data["posts"]) == 25
+    assert "/profile/test/posts/" in profile_response.data["posts_next"]
+
+    posts_response = client.get(profile_response.data["posts_next"], headers=headers)
+
+    assert posts_response.status_code == 200
+    assert len(posts_response.data["results"]) == 5
+    assert posts_response.data["next"] is None
+
+
 def test_create_friend_request_on_profile_endpoint(
     db, user_and_token, valid_data_for_user_and_profile
 ):
@@ -743,6 +1278,391 @@ def test_new_comment_on_post_retrieve_endpoint(
     assert response.data["comment_text"] == data["comment_text"]
 
 
+def test_comments_endpoint(
+    db, user_and_token, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that the comments on a post are listed from oldest to newest.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    for text in ["first", "second", "third"]:
+        Comment.objects.create(
+            comment_user=user, comment_parent_post=new_post, comment_text=text
+        )
+
+    headers = {"Authorization": f"Bearer {token}"}
+    client = APIClient()
+
+    response = client.get(
+        reverse("post_comments_endpoint", kwargs={"post_slug": new_post.post_slug}),
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.data["next"] is None
+    assert [comment["comment_text"] for comment in response.data["results"]] == [
+        "first",
+        "second",
+        "third",
+    ]
+    assert response.data["results"][0]["comment_user"] == user.username
+
+
+def test_single_post_comments_first_page(
+    db, user_and_token, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that the single post endpoint only embeds the first page of comments,
+    alongside the link to the next one.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    for number in range(26):
+        Comment.objects.create(
+            comment_user=user,
+            comment_parent_post=new_post,
+            comment_text=f"Comment {number}",
+        )
+
+    headers = {"Authorization": f"Bearer {token}"}
+    client = APIClient()
+
+    response = client.get(
+        reverse("single_post_endpoint", kwargs={"post_slug": new_post.post_slug}),
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.data["comments_count"] == 26
+    assert len(response.data["comments"]) == 25
+    assert response.data["comments"][0]["comment_text"] == "Comment 0"
+    assert response.data["comments"][0]["comment_user"] == user.username
+
+    response = client.get(response.data["comments_next"], headers=headers)
+
+    assert [comment["comment_text"] for comment in response.data["results"]] == [
+        "Comment 25"
+    ]
+    assert response.data["next"] is None
+
+
+def test_profile_and_post_responses_cache(
+    db, mocker, user_and_token, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that the profile and single post responses are built once and shared
+    between users, that they're rebuilt when a like, comment or setting changes,
+    and that the fields depending on the user are never shared.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    other_user = User.objects.create_user(username="other", password="other1234")
+    other_token = Token.objects.create(user=other_user)
+
+    build_post = mocker.spy(SinglePostSerializer, "get_shared_representation")
+    build_profile = mocker.spy(
+        FeedForSingleProfileSerializer, "get_shared_representation"
+    )
+
+    headers = {"Authorization": f"Bearer {token}"}
+    other_headers = {"Authorization": f"Bearer {other_token}"}
+    client = APIClient()
+    post_url = reverse("single_post_endpoint", kwargs={"post_slug": new_post.post_slug})
+    profile_url = reverse(
+        "profile_info_endpoint",
+        kwargs={"custom_slug_profile": profile.custom_slug_profile},
+    )
+
+    client.get(post_url, headers=headers)
+    client.get(post_url, headers=other_headers)
+    assert build_post.call_count == 1
+
+    # A like through the endpoint.
+    client.put(post_url, {"post_slug": new_post.post_slug}, headers=other_headers)
+    response = client.get(post_url, headers=other_headers)
+    assert build_post.call_count == 2
+    assert response.data["likes_count"] == 1
+    assert response.data["liked_by_me"] is True
+
+    response = client.get(post_url, headers=headers)
+    assert build_post.call_count == 2
+    assert response.data["liked_by_me"] is False
+
+    # A comment through the endpoint.
+    client.post(post_url, {"comment_text": "Nice."}, headers=headers, format="json")
+    response = client.get(post_url, headers=headers)
+    assert response.data["comments_count"] == 1
+
+    response = client.get(profile_url, headers=headers)
+    assert response.data["posts"][0]["comments_count"] == 1
+    assert response.data["posts"][0]["liked_by_me"] is False
+    assert response.data["friend_requests"] == []
+
+    response = client.get(profile_url, headers=other_headers)
+    assert build_profile.call_count == 1
+    assert response.data["posts"][0]["liked_by_me"] is True
+    assert response.data["friend_requests"] is None
+
+    # A setting changed through the endpoint.
+    client.patch(
+        reverse(
+            "change_settings_endpoint",
+            kwargs={"custom_slug_profile": profile.custom_slug_profile},
+        ),
+        {"show_birthday": False},
+        headers=headers,
+        format="json",
+    )
+    response = client.get(profile_url, headers=other_headers)
+    assert build_profile.call_count == 2
+    assert response.data["birthday"] is None
+
+
+def test_conditional_get_on_feed_profile_and_post(
+    db, user_and_token, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that the feed, profile and single post endpoints answer "304 Not
+    Modified" to a client holding the current ETag or Last-Modified, and a new
+    response once something shown on them changed.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    client = APIClient()
+    urls = [
+        reverse("feed_endpoint"),
+        reverse(
+            "profile_info_endpoint",
+            kwargs={"custom_slug_profile": profile.custom_slug_profile},
+        ),
+        reverse("single_post_endpoint", kwargs={"post_slug": new_post.post_slug}),
+    ]
+
+    etags = {}
+    for url in urls:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert "no-cache" in response.headers["Cache-Control"]
+        etags[url] = response.headers["ETag"]
+
+        response = client.get(
+            url, headers={**headers, "If-None-Match": response.headers["ETag"]}
+        )
+        assert response.status_code == 304
+
+        response = client.get(
+            url,
+            headers={
+                **headers,
+                "If-Modified-Since": response.headers["Last-Modified"],
+            },
+        )
+        assert response.status_code == 304
+
+    client.put(
+        reverse("feed_endpoint"),
+        {"post_slug": new_post.post_slug},
+        headers=headers,
+        format="json",
+    )
+
+    for url in urls:
+        response = client.get(url, headers={**headers, "If-None-Match": etags[url]})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etags[url]
+
+    # Removing a post from the feed changes it as well.
+    response = client.get(urls[0], headers=headers)
+    new_post.delete()
+    response = client.get(
+        urls[0], headers={**headers, "If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 200
+    assert response.data["results"] == []
+
+
+def test_response_versions_expire(db, mocker, settings) -> None:
+    """
+    Tests that the versions behind the cached responses are written together and
+    expire after longer than the responses.
+    """
+
+    settings.HELENITE_RESPONSE_CACHE_TIMEOUT = 300
+    settings.HELENITE_RESPONSE_VERSION_TIMEOUT = 60
+    versions_cache = mocker.patch.object(
+        response_cache, "cache", mocker.Mock(wraps=cache)
+    )
+
+    versions = response_cache.get_versions(("post", 1), ("profile", 2))
+
+    versions_cache.set_many.assert_called_once()
+    assert versions_cache.set_many.call_args.args[1] == 600
+    assert response_cache.get_versions(("post", 1), ("profile", 2)) == versions
+    versions_cache.set_many.assert_called_once()
+
+    response_cache.bump_version("post", 1)
+
+    assert versions_cache.set.call_args.args[2] == 600
+    assert response_cache.get_versions(("post", 1))[0] != versions[0]
+
+
+def test_likes_preview_and_likes_endpoint(
+    db, settings, user_and_token, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that posts only list the most recent likers alongside whether the user
+    liked them, and that every liker is listed on the likes endpoint.
+    """
+
+    settings.HELENITE_LIKES_PREVIEW_SIZE = 2
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    likers = []
+    for number in range(4):
+        liker = User.objects.create(username=f"liker{number}")
+        Profile.objects.create(
+            user=liker,
+            first_name="Jane",
+            last_name="Doe",
+            birthday="2001-01-01",
+            birth_place="City",
+        )
+        Like.objects.create(like_owner=liker, like_parent_post=new_post)
+        likers.append(liker.username)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    client = APIClient()
+
+    response = client.get(reverse("feed_endpoint"), headers=headers)
+    post = response.data["results"][0]
+
+    assert post["likes"] == ["liker3", "liker2"]
+    assert post["likes_count"] == 4
+    assert post["liked_by_me"] is False
+
+    Like.objects.create(like_owner=user, like_parent_post=new_post)
+    response = client.get(
+        reverse("single_post_endpoint", kwargs={"post_slug": new_post.post_slug}),
+        headers=headers,
+    )
+
+    assert response.data["liked_by_me"] is True
+    assert response.data["likes"] == [user.username, "liker3"]
+
+    response = client.get(
+        reverse("post_likes_endpoint", kwargs={"post_slug": new_post.post_slug}),
+        {"limit": 3},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.data["count"] == 5
+    assert [profile["username"] for profile in response.data["results"]] == [
+        user.username,
+        "liker3",
+        "liker2",
+    ]
+
+
+def test_bulk_likes_endpoint(
+    db, user_and_token, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that many posts can be liked and unliked with a single request, and that
+    the likes of many posts can be checked at once.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    liked = Post.objects.create(**valid_data_for_post)
+    unliked = Post.objects.create(post_parent_user=user, post_text="Unliked.")
+    untouched = Post.objects.create(post_parent_user=user, post_text="Untouched.")
+    Like.objects.create(like_owner=user, like_parent_post=unliked)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    client = APIClient()
+
+    response = client.post(
+        reverse("feed_likes_endpoint"),
+        {
+            "likes": [
+                {"post_slug": liked.post_slug, "action": "unlike"},
+                {"post_slug": liked.post_slug, "action": "like"},
+                {"post_slug": unliked.post_slug, "action": "unlike"},
+                {"post_slug": "doesnotexist", "action": "like"},
+            ]
+        },
+        headers=headers,
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert response.data["results"] == {
+        liked.post_slug: "liked",
+        unliked.post_slug: "unliked",
+        "doesnotexist": "not found",
+    }
+    liked.refresh_from_db()
+    unliked.refresh_from_db()
+    assert liked.post_like_count == 1
+    assert unliked.post_like_count == 0
+
+    response = client.get(
+        reverse("feed_likes_endpoint"),
+        {"posts": f"{liked.post_slug},{unliked.post_slug},{untouched.post_slug}"},
+        headers=headers,
+    )
+
+    assert response.data["liked"] == {
+        liked.post_slug: True,
+        unliked.post_slug: False,
+        untouched.post_slug: False,
+    }
+
+    response = client.post(
+        reverse("feed_likes_endpoint"),
+        {"likes": [{"post_slug": liked.post_slug, "action": "love"}]},
+        headers=headers,
+        format="json",
+    )
+
+    assert response.status_code == 400
+
+
 def test_delete_post_on_post_retrieve_endpoint(
     db, user_and_token, valid_data_for_user_and_profile, valid_data_for_post
 ) -> None:
@@ -820,6 +1740,41 @@ def test_like_post_on_post_retrieve_endpoint(
     assert response_unlike.data["detail"] == "Successfully unliked post."
 
 
+def test_stale_post_save_keeps_counters(
+    db, user_and_token, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that saving a post loaded before it was liked keeps the like count.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    valid_data_for_post.pop("post_image")
+    valid_data_for_post.pop("post_publication_date")
+    Post.objects.create(**valid_data_for_post)
+    post_slug = valid_data_for_post["post_slug"]
+
+    stale_post = Post.objects.get(post_slug=post_slug)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    response = APIClient().put(
+        reverse("single_post_endpoint", kwargs={"post_slug": post_slug}),
+        headers=headers,
+        data={"post_slug": post_slug},
+    )
+    assert response.status_code == 201
+
+    stale_post.post_text = "Edited."
+    stale_post.save()
+
+    post = Post.objects.get(post_slug=post_slug)
+    assert post.post_text == "Edited."
+    assert post.post_like_count == 1
+
+
 def test_search_endpoint(
     db, mocker, user_and_token, valid_data_for_user_and_profile
 ) -> None:
@@ -841,7 +1796,7 @@ def test_search_endpoint(
         mocked_response = json.load(mock_json)
 
     mocker.patch(
-        "helenite_app.views.client.perform_search", return_value=mocked_response
+        "helenite_app.search.client.perform_search", return_value=mocked_response
     )
 
     factory = RequestFactory()
@@ -855,3 +1810,102 @@ def test_search_endpoint(
     assert response.status_code == 200
     assert "test" in response.data[0]["endpoint"]
     assert response.data[0]["username"] == query_parameter
+
+
+def test_search_endpoint_posts(
+    db, mocker, user_and_token, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that searching the post index returns the posts themselves, in the order
+    ranked by the search engine.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    valid_data_for_post["post_parent_user"] = user
+    first_post = Post.objects.create(**valid_data_for_post)
+    valid_data_for_post["post_slug"] = "secondpost"
+    second_post = Post.objects.create(**valid_data_for_post)
+
+    mocker.patch(
+        "helenite_app.search.client.perform_search",
+        return_value={
+            "hits": [
+                {"endpoint": second_post.endpoint},
+                {"endpoint": "/api/v1/profile/post/deletedpost/"},
+                {"endpoint": first_post.endpoint},
+            ]
+        },
+    )
+
+    client = APIClient()
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get(
+        reverse("search_endpoint") + "?q=lorem&index=Helenite_Post", headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.data["count"] == 2
+    assert [post["endpoint"] for post in response.data["results"]] == [
+        second_post.endpoint,
+        first_post.endpoint,
+    ]
+    assert response.data["results"][0]["profile"]["username"] == user.username
+
+
+def test_search_endpoint_rechecks_privacy(
+    db, mocker, user_and_token, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the profiles that went private and their posts are left out, even
+    while the search engine still returns them.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    public = Profile.objects.create(**valid_data_for_user_and_profile)
+    public_post = Post.objects.create(post_parent_user=user, post_text="Public.")
+
+    other = User.objects.create(username="private")
+    valid_data_for_user_and_profile["user"] = other
+    valid_data_for_user_and_profile["custom_slug_profile"] = "private"
+    private = Profile.objects.create(**valid_data_for_user_and_profile)
+    private_post = Post.objects.create(post_parent_user=other, post_text="Private.")
+    private.private_profile = True
+    private.save()
+
+    hits = {
+        "Helenite_Profile": [private.endpoint, public.endpoint],
+        "Helenite_Post": [private_post.endpoint, public_post.endpoint],
+    }
+    mocker.patch(
+        "helenite_app.search.client.perform_search",
+        side_effect=lambda query, index: {
+            "hits": [{"endpoint": endpoint} for endpoint in hits[index]]
+        },
+    )
+    mocker.patch(
+        "helenite_app.search.client.aperform_search",
+        side_effect=lambda query, index: sync_to_async(
+            lambda: {"hits": [{"endpoint": endpoint} for endpoint in hits[index]]}
+        )(),
+    )
+
+    factory = APIRequestFactory()
+    headers = {"Authorization": f"Bearer {token}"}
+    url = reverse("search_endpoint")
+    for view in (
+        SearchListView.as_view(),
+        async_to_sync(views.AsyncSearchListView.as_view()),
+    ):
+        response = view(factory.get(f"{url}?q=test", headers=headers))
+
+        assert [profile["endpoint"] for profile in response.data] == [public.endpoint]
+
+        response = view(factory.get(f"{url}?q=a&index=Helenite_Post", headers=headers))
+
+        assert [post["endpoint"] for post in response.data["results"]] == [
+            public_post.endpoint
+        ]
@@ -0,0 +1,320 @@
+"""
+Latency and query count benchmark for the main API endpoints.
+
+Seeds a synthetic social graph and hits every endpoint a few times, recording the
+p50/p95 latency and the amount of SQL queries of each one on a JSON report. The
+test fails when an endpoint needs more queries than its budget on
+`QUERY_BUDGETS`, which must not depend on the size of the graph.
+
+It runs on a tiny graph by default, so it stays fast as part of the test suite.
+The size is configured through environment variables:
+
+    - HELENITE_BENCH_USERS: amount of users (defaults to 20);
+    - HELENITE_BENCH_FRIENDS: friends per user (defaults to 5);
+    - HELENITE_BENCH_POSTS: posts per user (defaults to 3);
+    - HELENITE_BENCH_LIKES: likes per post (defaults to 5);
+    - HELENITE_BENCH_COMMENTS: comments per post (defaults to 2);
+    - HELENITE_BENCH_ITERATIONS: requests measured per endpoint (defaults to 5);
+    - HELENITE_BENCH_REPORT: path of the JSON report (defaults to the pytest
+    temporary directory).
+
+e.g. against a local Postgres (using the main settings):
+
+    HELENITE_BENCH_USERS=2000 HELENITE_BENCH_POSTS=20 \
+        python -m pytest helenite/tests/test_benchmark.py --ds=helenite.settings
+"""
+
+import os
+import json
+import time
+import random
+import statistics
+
+from django.urls import reverse
+from django.db import connection
+from django.utils import timezone
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+
+from helenite_app.models import Profile, Post, Like, Comment, TimelineEntry
+
+
+# Maximum amount of queries per request, measured after a warm-up request. Writes
+# include the savepoints of the request transaction. The cached responses are
+# measured once served from the cache, and once built ("_cold", with the response
+# cache off).
+QUERY_BUDGETS = {
+    "login": 4,
+    "feed": 5,
+    "discover": 5,
+    "profile": 4,
+    "profile_cold": 6,
+    "friends": 5,
+    "single_post": 4,
+    "single_post_cold": 6,
+    "like_toggle": 10,
+    "feed_sync": 4,
+}
+
+PASSWORD = "benchmark1234"
+
+
+def get_size(name, default):
+    return int(os.environ.get(f"HELENITE_BENCH_{name}", default))
+
+
+def seed_graph(users, friends, posts, likes, comments):
+    """
+    Creates the synthetic social graph with bulk inserts and returns the users.
+
+    Args:
+        - users: amount of users;
+        - friends: friends per user;
+        - posts: posts per user;
+        - likes: likes per post;
+        - comments: comments per post.
+    """
+
+    rng = random.Random(0)
+
+    User.objects.bulk_create(
+        [User(username=f"bench{number}") for number in range(users)]
+    )
+    all_users = list(User.objects.filter(username__startswith="bench").order_by("id"))
+
+    Profile.objects.bulk_create(
+        [
+            Profile(
+                user=user,
+                first_name="Bench",
+                last_name=str(number),
+                birthday="2001-01-01",
+                birth_place="City",
+                custom_slug_profile=user.username,
+                pfp="profile_pictures/default_pfp.png",
+            )
+            for number, user in enumerate(all_users)
+        ]
+    )
+    profiles = list(Profile.objects.filter(user__in=all_users).order_by("id"))
+
+    friendships = set()
+    for index, profile in enumerate(profiles):
+        for step in range(1, min(friends, len(profiles) - 1) + 1):
+            friend = profiles[(index + step) % len(profiles)]
+            friendships.add((profile.id, friend.id))
+            friendships.add((friend.id, profile.id))
+    Friendship = Profile.friends.through
+    Friendship.objects.bulk_create(
+        [
+            Friendship(from_profile_id=from_id, to_profile_id=to_id)
+            for from_id, to_id in friendships
+        ],
+        batch_size=1000,
+    )
+
+    Post.objects.bulk_create(
+        [
+            Post(
+                post_parent_user=user,
+                post_text=f"Post {number} by {user.username}",
+                post_slug=f"b{user.id}x{number}",
+            )
+            for user in all_users
+            for number in range(posts)
+        ],
+        batch_size=1000,
+    )
+    all_posts = list(
+        Post.objects.filter(post_parent_user__in=all_users).values_list(
+            "id", "post_parent_user_id", "post_publication_date"
+        )
+    )
+
+    friends_of = {}
+    user_of_profile = {profile.id: profile.user_id for profile in profiles}
+    for from_id, to_id in friendships:
+        friends_of.setdefault(user_of_profile[from_id], []).append(
+            user_of_profile[to_id]
+        )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                entry_owner_id=owner_id,
+                entry_post_id=post_id,
+                entry_publication_date=publication_date,
+            )
+            for post_id, author_id, publication_date in all_posts
+            for owner_id in [author_id] + friends_of.get(author_id, [])
+        ],
+        batch_size=1000,
+    )
+
+    Like.objects.bulk_create(
+        [
+            Like(like_owner=liker, like_parent_post_id=post_id)
+            for post_id, _, _ in all_posts
+            for liker in rng.sample(all_users, min(likes, len(all_users)))
+        ],
+        batch_size=1000,
+    )
+    Comment.objects.bulk_create(
+        [
+            Comment(
+                comment_user=rng.choice(all_users),
+                comment_parent_post_id=post_id,
+                comment_text=f"Comment {number}",
+            )
+            for post_id, _, _ in all_posts
+            for number in range(comments)
+        ],
+        batch_size=1000,
+    )
+    Post.objects.filter(post_parent_user__in=all_users).recount()
+
+    return all_users
+
+
+def measure(call, iterations):
+    """
+    Runs a request once to warm the caches up, then ``iterations`` more times,
+    and returns the latencies (in milliseconds) and the highest query count.
+
+    Args:
+        - call: a function performing the request and returning the response;
+        - iterations: how many requests are measured.
+    """
+
+    call()
+
+    latencies = []
+    queries = 0
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = call()
+            latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code < 400, response.data
+        queries = max(queries, len(context.captured_queries))
+
+    return latencies, queries
+
+
+def uncached(call):
+    """
+    Wraps a request so it runs with the response cache off, building the response
+    every time.
+    """
+
+    def call_uncached():
+        with override_settings(HELENITE_RESPONSE_CACHE_TIMEOUT=0):
+            return call()
+
+    return call_uncached
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def test_benchmark_endpoints(db, tmp_path_factory) -> None:
+    """
+    Measures every endpoint on the synthetic graph, writes the report and checks
+    the query budgets.
+    """
+
+    sizes = {
+        "users": get_size("USERS", 20),
+        "friends": get_size("FRIENDS", 5),
+        "posts": get_size("POSTS", 3),
+        "likes": get_size("LIKES", 5),
+        "comments": get_size("COMMENTS", 2),
+    }
+    iterations = get_size("ITERATIONS", 5)
+
+    users = seed_graph(**sizes)
+    viewer = users[0]
+    viewer.set_password(PASSWORD)
+    viewer.save()
+    token = Token.objects.create(user=viewer, created=timezone.now())
+
+    friend_slug = viewer.profile.friends.first().custom_slug_profile
+    post_slug = Post.objects.filter(post_parent_user=users[1]).first().post_slug
+
+    client = APIClient()
+    headers = {"Authorization": f"Bearer {token}"}
+    # Taken before the likes are toggled, so there's something to sync.
+    sync_cursor = client.get(reverse("feed_sync_endpoint"), headers=headers).data[
+        "cursor"
+    ]
+    endpoints = {
+        "login": lambda: client.post(
+            reverse("login_endpoint"),
+            {"username": viewer.username, "password": PASSWORD},
+            format="json",
+        ),
+        "feed": lambda: client.get(reverse("feed_endpoint"), headers=headers),
+        "discover": lambda: client.get(reverse("discover_endpoint"), headers=headers),
+        "profile": lambda: client.get(
+            reverse(
+                "profile_info_endpoint", kwargs={"custom_slug_profile": friend_slug}
+            ),
+            headers=headers,
+        ),
+        "friends": lambda: client.get(
+            reverse(
+                "profile_friends_endpoint", kwargs={"custom_slug_profile": friend_slug}
+            ),
+            headers=headers,
+        ),
+        "single_post": lambda: client.get(
+            reverse("single_post_endpoint", kwargs={"post_slug": post_slug}),
+            headers=headers,
+        ),
+        "like_toggle": lambda: client.put(
+            reverse("feed_endpoint"),
+            {"post_slug": post_slug},
+            headers=headers,
+            format="json",
+        ),
+        "feed_sync": lambda: client.get(
+            reverse("feed_sync_endpoint"), {"cursor": sync_cursor}, headers=headers
+        ),
+    }
+    endpoints["profile_cold"] = uncached(endpoints["profile"])
+    endpoints["single_post_cold"] = uncached(endpoints["single_post"])
+
+    results = {}
+    for name, call in endpoints.items():
+        latencies, queries = measure(call, iterations)
+        results[name] = {
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "queries": queries,
+            "query_budget": QUERY_BUDGETS[name],
+        }
+
+    report = {
+        "database": connection.vendor,
+        "sizes": sizes,
+        "iterations": iterations,
+        "endpoints": results,
+    }
+    path = os.environ.get("HELENITE_BENCH_REPORT") or (
+        tmp_path_factory.getbasetemp() / "benchmark_report.json"
+    )
+    with open(path, "w") as report_file:
+        json.dump(report, report_file, indent=4)
+    print(f"\nBenchmark report written to {path}")
+
+    over_budget = {
+        name: result["queries"]
+        for name, result in results.items()
+        if result["queries"] > result["query_budget"]
+    }
+    assert not over_budget, f"Query budgets exceeded: {over_budget}"
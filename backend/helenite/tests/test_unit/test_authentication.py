@@ -1,8 +1,15 @@
 import pytest
 
+from unittest import mock
+
+from django.db import connection
+from django.core.cache import caches
 from django.urls import reverse
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 
 from helenite_app.models import Profile
+from helenite_app.checks import check_shared_cache
 
 
 def test_keyword_token_authentication(
@@ -28,3 +35,126 @@ def test_keyword_token_authentication(
 
     assert response_passed.status_code == 200
     assert response_passed.wsgi_request.user == user
+
+
+def test_expired_token_authentication(
+    client, user_and_token, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that a token older than 7 days is rejected by the authentication itself.
+    """
+
+    user, token = user_and_token
+    token.created = timezone.now() - timezone.timedelta(days=8)
+    token.save()
+
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    headers = {"Authorization": f"Bearer {token.key}"}
+    response = client.get(reverse("feed_endpoint"), headers=headers)
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has expired."
+
+
+def test_cached_token_authentication(
+    client, settings, user_and_token, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that once cached, a token is neither queried by the authentication nor by
+    the `TokenAgePermission`, and that logging out removes it from the cache.
+    """
+
+    settings.HELENITE_TOKEN_CACHE_TIMEOUT = 60
+    user, token = user_and_token
+
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    headers = {"Authorization": f"Bearer {token.key}"}
+    client.get(reverse("feed_endpoint"), headers=headers)
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(reverse("feed_endpoint"), headers=headers)
+
+    assert response.status_code == 200
+    assert not any(
+        "authtoken_token" in query["sql"] for query in context.captured_queries
+    )
+
+    client.post(reverse("logout_endpoint"), headers=headers)
+    response_after_logout = client.get(reverse("feed_endpoint"), headers=headers)
+
+    assert response_after_logout.status_code == 401
+
+
+def test_token_revocation_is_shared(
+    client, settings, tmp_path, user_and_token, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that a token revoked through a process is rejected by the others, and
+    that changes to the user are seen, when the cache is shared between them.
+    """
+
+    settings.HELENITE_TOKEN_CACHE_TIMEOUT = 60
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        }
+    }
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+    headers = {"Authorization": f"Bearer {token.key}"}
+
+    # The cache seen by another process.
+    other_process = caches.create_connection("default")
+
+    def request_from_other_process():
+        with mock.patch("helenite_app.authentication.cache", other_process):
+            return client.get(reverse("feed_endpoint"), headers=headers)
+
+    assert request_from_other_process().status_code == 200
+
+    user.is_active = False
+    user.save()
+
+    assert request_from_other_process().status_code == 401
+
+    user.is_active = True
+    user.save()
+
+    assert request_from_other_process().status_code == 200
+
+    client.post(reverse("logout_endpoint"), headers=headers)
+
+    assert request_from_other_process().status_code == 401
+
+
+def test_shared_cache_check(settings) -> None:
+    """
+    Tests that the token and response caches warn about a default cache local to
+    each process, and only then.
+    """
+
+    settings.HELENITE_TOKEN_CACHE_TIMEOUT = 60
+    settings.HELENITE_RESPONSE_CACHE_TIMEOUT = 60
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+    warnings = check_shared_cache(None)
+    assert [warning.id for warning in warnings] == [
+        "helenite_app.W001",
+        "helenite_app.W002",
+    ]
+
+    settings.HELENITE_TOKEN_CACHE_TIMEOUT = 0
+    assert [warning.id for warning in check_shared_cache(None)] == ["helenite_app.W002"]
+
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}
+    }
+    assert check_shared_cache(None) == []
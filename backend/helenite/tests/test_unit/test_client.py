@@ -0,0 +1,197 @@
+import time
+import pytest
+import threading
+
+from asgiref.sync import async_to_sync
+
+from django.urls import reverse
+
+from algoliasearch.exceptions import AlgoliaUnreachableHostException
+from algoliasearch.http.transporter import Response
+
+from helenite_app import client as search_client
+from helenite_app.models import Profile
+from helenite_app.client import CircuitBreaker, SearchUnavailable
+
+
+@pytest.fixture
+def algolia_index(mocker):
+    """
+    Replaces the Algolia client with a mock and resets the circuit breaker.
+    """
+
+    mocker.patch.object(search_client, "breaker", CircuitBreaker(failure_threshold=2))
+    # The clients are kept per thread, including the threads running the searches.
+    mocker.patch.object(search_client, "_local", threading.local())
+
+    algolia_client = mocker.Mock()
+    mocker.patch(
+        "helenite_app.client.SearchClient.create_with_config"
+    ).return_value = algolia_client
+    return algolia_client.init_index.return_value
+
+
+def test_circuit_breaker(mocker) -> None:
+    """
+    Tests that the circuit opens after consecutive failures, lets a single trial
+    through after the reset timeout and closes again once it succeeds.
+    """
+
+    now = mocker.patch("helenite_app.client.time.monotonic", return_value=100)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.is_open
+    with pytest.raises(SearchUnavailable):
+        breaker.before_call()
+
+    now.return_value = 131
+    breaker.before_call()
+    with pytest.raises(SearchUnavailable):
+        breaker.before_call()
+
+    breaker.record_success()
+
+    assert not breaker.is_open
+    breaker.before_call()
+
+
+def test_perform_search_reuses_index(algolia_index) -> None:
+    """
+    Tests that the client and the index handle are created once and reused.
+    """
+
+    algolia_index.search.return_value = {"hits": []}
+
+    search_client.perform_search("test", "Helenite_Profile")
+    search_client.perform_search("test", "Helenite_Profile")
+
+    assert algolia_index.search.call_count == 2
+    assert search_client.get_client().init_index.call_count == 1
+
+
+def test_perform_search_fails_fast(algolia_index) -> None:
+    """
+    Tests that once Algolia failed enough times, searches don't reach it anymore.
+    """
+
+    algolia_index.search.side_effect = AlgoliaUnreachableHostException("down")
+
+    for _ in range(2):
+        with pytest.raises(SearchUnavailable):
+            search_client.perform_search("test", "Helenite_Profile")
+
+    with pytest.raises(SearchUnavailable):
+        search_client.perform_search("test", "Helenite_Profile")
+
+    assert algolia_index.search.call_count == 2
+
+
+def test_trial_error_ends_the_trial(mocker, algolia_index) -> None:
+    """
+    Tests that a trial call failing with something else than an Algolia error,
+    or being cancelled, doesn't keep the circuit open for good.
+    """
+
+    now = mocker.patch("helenite_app.client.time.monotonic", return_value=100)
+    algolia_index.search.side_effect = AlgoliaUnreachableHostException("down")
+    for _ in range(2):
+        with pytest.raises(SearchUnavailable):
+            search_client.perform_search("test", "Helenite_Profile")
+
+    now.return_value = 200
+    algolia_index.search.side_effect = RuntimeError("connection reset")
+    with pytest.raises(RuntimeError):
+        search_client.perform_search("test", "Helenite_Profile")
+
+    now.return_value = 300
+    algolia_index.search.side_effect = KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        search_client.perform_search("test", "Helenite_Profile")
+
+    algolia_index.search.side_effect = None
+    algolia_index.search.return_value = {"hits": []}
+    assert search_client.perform_search("test", "Helenite_Profile") == {"hits": []}
+    assert not search_client.breaker.is_open
+
+
+def test_perform_search_deadline(mocker, settings) -> None:
+    """
+    Tests that a search gives up once its time budget is spent, while the Algolia
+    client would still retry on each of its hosts (the timeouts applying to every
+    attempt).
+    """
+
+    settings.HELENITE_SEARCH_TIMEOUT = 0.15
+    mocker.patch.object(search_client, "breaker", CircuitBreaker(failure_threshold=2))
+    mocker.patch.object(search_client, "_local", threading.local())
+    mocker.patch("helenite_app.client.is_async_available", return_value=False)
+
+    attempts = []
+    retried = threading.Event()
+
+    def send(requester, request):
+        attempts.append(request.url)
+        time.sleep(0.1)
+        if len(attempts) % 4 == 0:
+            retried.set()
+        return Response(error_message="Timed out.", is_timed_out_error=True)
+
+    mocker.patch("algoliasearch.http.requester.Requester.send", send)
+
+    searches = [
+        search_client.perform_search,
+        async_to_sync(search_client.aperform_search),
+    ]
+    for search in searches:
+        retried.clear()
+        started = time.monotonic()
+        with pytest.raises(SearchUnavailable):
+            search("test")
+        assert time.monotonic() - started < 0.3
+
+        # The client goes on with the other hosts in the background.
+        assert retried.wait(2)
+
+    assert len(attempts) == 8
+    assert search_client.breaker.is_open
+
+
+def test_search_endpoint_unavailable(
+    client, algolia_index, user_and_token, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the search endpoint answers with a 503 when Algolia is down.
+    """
+
+    user, token = user_and_token
+    valid_data_for_user_and_profile["user"] = user
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    algolia_index.search.side_effect = AlgoliaUnreachableHostException("down")
+
+    headers = {"Authorization": f"Bearer {token.key}"}
+    response = client.get(reverse("search_endpoint") + "?q=test", headers=headers)
+
+    assert response.status_code == 503
+
+
+def test_aperform_search(mocker, algolia_index) -> None:
+    """
+    Tests that the async search awaits the async Algolia client when it's
+    available, and runs the sync one on a thread otherwise.
+    """
+
+    algolia_index.search.return_value = {"hits": []}
+    algolia_index.search_async = mocker.AsyncMock(return_value={"hits": [{}]})
+    available = mocker.patch("helenite_app.client.is_async_available")
+
+    available.return_value = False
+    assert async_to_sync(search_client.aperform_search)("test") == {"hits": []}
+
+    available.return_value = True
+    assert async_to_sync(search_client.aperform_search)("test") == {"hits": [{}]}
+    algolia_index.search.assert_called_once()
@@ -1,10 +1,22 @@
 import pytest
 
 from django.forms import ValidationError
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.core.management import call_command
 from django.contrib.auth.models import User
+from django.test.utils import CaptureQueriesContext
 
-from helenite_app.models import Profile, Post
+from helenite_app import discover
+from helenite_app.models import (
+    Profile,
+    FriendRequest,
+    Post,
+    Like,
+    Comment,
+    TimelineEntry,
+    FeedEvent,
+)
 
 
 def test_generic_create_user_and_profile(db, valid_data_for_user_and_profile) -> None:
@@ -164,3 +176,207 @@ def test_endpoint_property_for_post(
     new_post = Post.objects.create(**valid_data_for_post)
 
     assert new_post.endpoint == f"/api/v1/profile/post/{new_post.post_slug}/"
+
+
+def test_new_post_fan_out(db, valid_data_for_user_and_profile, valid_data_for_post):
+    """
+    Tests that a new post is pushed to the timelines of the author and the author's
+    friends.
+    """
+
+    author = Profile.objects.create(**valid_data_for_user_and_profile)
+
+    new_user_2 = User.objects.create(
+        username="test2", email="email@myemail.com", password="dfhsjkalf6789"
+    )
+    valid_data_for_user_and_profile["user"] = new_user_2
+    valid_data_for_user_and_profile["custom_slug_profile"] = "test2"
+    friend = Profile.objects.create(**valid_data_for_user_and_profile)
+
+    new_user_3 = User.objects.create(
+        username="test3", email="email@myemail.com", password="dfhsjkalf6789"
+    )
+    valid_data_for_user_and_profile["user"] = new_user_3
+    valid_data_for_user_and_profile["custom_slug_profile"] = "test3"
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    author.friends.add(friend)
+
+    valid_data_for_post["post_parent_user"] = author.user
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    owners = TimelineEntry.objects.filter(entry_post=new_post).values_list(
+        "entry_owner", flat=True
+    )
+
+    assert set(owners) == {author.user.pk, friend.user.pk}
+
+
+def test_post_counters(db, valid_data_for_post, valid_data_for_comment) -> None:
+    """
+    Tests that the like and comment counters follow new and deleted likes and
+    comments, and that the repair command recomputes them.
+    """
+
+    user = valid_data_for_post["post_parent_user"]
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    like = Like.objects.create(like_owner=user, like_parent_post=new_post)
+    valid_data_for_comment["comment_parent_post"] = new_post
+    Comment.objects.create(**valid_data_for_comment)
+    Comment.objects.create(**valid_data_for_comment)
+    new_post.refresh_from_db()
+
+    assert new_post.post_like_count == 1
+    assert new_post.post_comment_count == 2
+
+    like.delete()
+    Comment.objects.filter(comment_parent_post=new_post).first().delete()
+    new_post.refresh_from_db()
+
+    assert new_post.post_like_count == 0
+    assert new_post.post_comment_count == 1
+
+    Post.objects.filter(pk=new_post.pk).update(post_like_count=7, post_comment_count=0)
+    call_command("recount_post_counters", "--batch-size", "1")
+    new_post.refresh_from_db()
+
+    assert new_post.post_like_count == 0
+    assert new_post.post_comment_count == 1
+
+
+def test_profile_posts_use_index(db, valid_data_for_post) -> None:
+    """
+    Tests that the posts of a profile are read, already sorted, from the
+    (post_parent_user, -post_publication_date, -id) index.
+    """
+
+    user = valid_data_for_post["post_parent_user"]
+    plan = (
+        Post.objects.filter(post_parent_user=user)
+        .order_by("-post_publication_date", "-id")[:25]
+        .explain()
+    )
+
+    assert "post_user_date_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_post_comments_use_index(db, valid_data_for_post) -> None:
+    """
+    Tests that the comments of a post are read, already sorted, from the
+    (comment_parent_post, comment_publication_date, id) index.
+    """
+
+    new_post = Post.objects.create(**valid_data_for_post)
+    plan = (
+        Comment.objects.filter(comment_parent_post=new_post)
+        .order_by("comment_publication_date", "id")[:25]
+        .explain()
+    )
+
+    assert "comment_post_date_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_friend_request_is_unique(db, create_new_user) -> None:
+    """
+    Tests that a user can't send two requests to the same user, and that looking a
+    request up by both users goes through the unique index.
+    """
+
+    other_user = User.objects.create(
+        username="test2", email="email@myemail.com", password="dfhsjkalf6789"
+    )
+    FriendRequest.objects.create(
+        request_made_by=create_new_user, request_sent_to=other_user
+    )
+
+    plan = FriendRequest.objects.filter(
+        request_made_by=create_new_user, request_sent_to=other_user
+    ).explain()
+    # SQLite backs the constraint with an automatic index over both columns.
+    assert "USING INDEX" in plan
+    assert "request_made_by_id=? AND request_sent_to_id=?" in plan
+
+    with pytest.raises(IntegrityError):
+        FriendRequest.objects.create(
+            request_made_by=create_new_user, request_sent_to=other_user
+        )
+
+
+def test_prune_feed_events(db, settings, valid_data_for_post) -> None:
+    """
+    Tests that posts are logged on the feed events, and that the events older than
+    the retention period are pruned.
+    """
+
+    post = Post.objects.create(**valid_data_for_post)
+    post.delete()
+
+    assert list(FeedEvent.objects.values_list("event_kind", flat=True)) == [
+        FeedEvent.CREATED,
+        FeedEvent.DELETED,
+    ]
+
+    call_command("prune_feed_events")
+    assert FeedEvent.objects.count() == 2
+
+    settings.HELENITE_FEED_EVENTS_RETENTION = 0
+    call_command("prune_feed_events")
+    assert not FeedEvent.objects.exists()
+
+
+def test_post_deletion_events(db, valid_data_for_post, valid_data_for_comment) -> None:
+    """
+    Tests that deleting a post only logs its deletion, and neither logs a change
+    nor updates the counters for every like and comment deleted alongside it.
+    """
+
+    post = Post.objects.create(**valid_data_for_post)
+    for number in range(3):
+        liker = User.objects.create(username=f"liker{number}")
+        Like.objects.create(like_owner=liker, like_parent_post=post)
+    valid_data_for_comment["comment_parent_post"] = post
+    Comment.objects.create(**valid_data_for_comment)
+    FeedEvent.objects.all().delete()
+
+    with CaptureQueriesContext(connection) as queries:
+        post.delete()
+
+    assert list(FeedEvent.objects.values_list("event_kind", flat=True)) == [
+        FeedEvent.DELETED
+    ]
+    # The counters of the deleted post aren't decremented one by one.
+    post_table = Post._meta.db_table
+    assert not [
+        query["sql"]
+        for query in queries.captured_queries
+        if query["sql"].startswith(f'UPDATE "{post_table}"')
+    ]
+
+
+def test_discover_pool_reaches_old_posts(
+    db, settings, mocker, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the discover pool is read from windows starting at random ids, so
+    it isn't limited to the most recent posts.
+    """
+
+    settings.HELENITE_DISCOVER_POOL_SIZE = 2
+    settings.HELENITE_DISCOVER_POOL_WINDOWS = 2
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    posts = [
+        Post.objects.create(post_parent_user=profile.user, post_text=f"Post {number}.")
+        for number in range(10)
+    ]
+    mocker.patch(
+        "helenite_app.discover.random.randint",
+        side_effect=[posts[0].id, posts[5].id],
+    )
+
+    assert sorted(post_id for post_id, _ in discover.refresh_candidate_pool()) == [
+        posts[0].id,
+        posts[5].id,
+    ]
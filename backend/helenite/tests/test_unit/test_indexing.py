@@ -0,0 +1,287 @@
+import pytest
+
+from django.db import DatabaseError
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from algoliasearch.exceptions import AlgoliaUnreachableHostException
+
+from helenite_app.models import Profile, Post, IndexChange, IndexCheckpoint
+from helenite_app.indexing import process_pending_changes, reindex_model
+
+
+@pytest.fixture
+def algolia_index(mocker):
+    """
+    Replaces the client of the Algolia engine with a mock and returns the mocked
+    index.
+    """
+
+    algolia_client = mocker.patch("helenite_app.indexing.algolia_engine.client")
+    return algolia_client.init_index.return_value
+
+
+def test_changes_are_recorded(
+    db, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that saves and deletes of indexed models are queued instead of being sent
+    to Algolia.
+    """
+
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    post = Post.objects.create(**valid_data_for_post)
+    post_id = post.id
+    post.delete()
+
+    changes = IndexChange.objects.order_by("id").values_list(
+        "change_model", "change_object_id"
+    )
+
+    assert list(changes) == [
+        ("helenite_app.profile", profile.id),
+        ("helenite_app.post", post_id),
+        ("helenite_app.post", post_id),
+    ]
+
+
+def test_changes_are_recorded_atomically(
+    transactional_db, mocker, valid_data_for_post
+) -> None:
+    """
+    Tests that a post is only saved alongside its index change, even outside of a
+    request running in a transaction.
+    """
+
+    mocker.patch.object(
+        IndexChange.objects, "record", side_effect=DatabaseError("outbox down")
+    )
+
+    with pytest.raises(DatabaseError):
+        Post.objects.create(**valid_data_for_post)
+
+    assert not Post.objects.exists()
+
+
+def test_process_pending_changes(
+    db, algolia_index, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that the changes are sent in bulk, once per object, and removed from the
+    queue.
+    """
+
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    post = Post.objects.create(**valid_data_for_post)
+    post.post_text = "Edited."
+    post.save()
+    deleted = Post.objects.create(
+        post_parent_user=post.post_parent_user, post_text="Deleted."
+    )
+    deleted_id = deleted.id
+    deleted.delete()
+
+    assert process_pending_changes() == 5
+    assert not IndexChange.objects.exists()
+
+    saved = [
+        record["objectID"]
+        for call in algolia_index.save_objects.call_args_list
+        for record in call.args[0]
+    ]
+    assert sorted(saved) == sorted([profile.id, post.id])
+    algolia_index.delete_objects.assert_called_once_with([deleted_id])
+
+
+def test_process_pending_changes_retries(
+    db, algolia_index, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the changes that couldn't be synced are kept and delayed, and that the
+    worker exits once nothing is left to process.
+    """
+
+    Profile.objects.create(**valid_data_for_user_and_profile)
+    algolia_index.save_objects.side_effect = AlgoliaUnreachableHostException("down")
+
+    call_command("process_index_changes", "--once")
+
+    change = IndexChange.objects.get()
+    assert change.change_attempts == 1
+    assert process_pending_changes() == 0
+
+
+def test_process_pending_changes_broken_object(
+    db, algolia_index, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that an object whose record can't be built (a post whose author has no
+    profile) is left out of the index without holding back the rest of the batch.
+    """
+
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    other = Post.objects.create(**valid_data_for_post)
+    user = User.objects.create_user(username="no_profile", password="password")
+    post = Post.objects.create(post_parent_user=user, post_text="No profile.")
+
+    assert process_pending_changes() == 3
+    assert not IndexChange.objects.exists()
+
+    saved = [
+        record["objectID"]
+        for call in algolia_index.save_objects.call_args_list
+        for record in call.args[0]
+    ]
+    assert sorted(saved) == sorted([profile.id, other.id])
+    algolia_index.delete_objects.assert_called_once_with([post.id])
+
+
+def test_process_pending_changes_error(
+    db, algolia_index, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that a batch failing with something else than an Algolia error is pushed
+    back as well, instead of stopping the worker.
+    """
+
+    Profile.objects.create(**valid_data_for_user_and_profile)
+    algolia_index.save_objects.side_effect = ConnectionError("reset")
+
+    assert process_pending_changes() == 1
+    assert IndexChange.objects.get().change_attempts == 1
+    assert process_pending_changes() == 0
+
+
+def test_incremental_reindex(
+    db, algolia_index, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that the reindex sends the posts in batches and that the next run only
+    sends the posts created in the meantime.
+    """
+
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    user = valid_data_for_post["post_parent_user"]
+    posts = [
+        Post.objects.create(post_parent_user=user, post_text=f"Post {number}.")
+        for number in range(5)
+    ]
+
+    assert reindex_model(Post, batch_size=2, workers=2) == 5
+    assert algolia_index.save_objects.call_count == 3
+    assert IndexCheckpoint.objects.get().checkpoint_last_id == posts[-1].id
+
+    algolia_index.reset_mock()
+    new_post = Post.objects.create(post_parent_user=user, post_text="New post.")
+
+    call_command("incremental_reindex")
+
+    sent = [
+        record["objectID"]
+        for call in algolia_index.save_objects.call_args_list
+        for record in call.args[0]
+    ]
+    # The profile had no checkpoint yet; of the posts, only the new one is sent.
+    assert sorted(sent) == [profile.id, new_post.id]
+
+
+def test_incremental_reindex_resumes(
+    db, algolia_index, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that an interrupted reindex keeps the checkpoint of the last batch sent,
+    and resumes from it.
+    """
+
+    Profile.objects.create(**valid_data_for_user_and_profile)
+    user = valid_data_for_post["post_parent_user"]
+    posts = [
+        Post.objects.create(post_parent_user=user, post_text=f"Post {number}.")
+        for number in range(3)
+    ]
+    algolia_index.save_objects.side_effect = [
+        None,
+        AlgoliaUnreachableHostException("down"),
+    ]
+
+    with pytest.raises(AlgoliaUnreachableHostException):
+        reindex_model(Post, batch_size=1, workers=1)
+
+    assert IndexCheckpoint.objects.get().checkpoint_last_id == posts[0].id
+
+    algolia_index.save_objects.side_effect = None
+    assert reindex_model(Post, batch_size=1, workers=1) == 2
+
+
+def test_incremental_reindex_queries(
+    db, algolia_index, django_assert_num_queries, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that the reindex loads the related objects read by the records alongside
+    the rows, so a batch runs the same queries however many posts it holds.
+    """
+
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    for number in range(10):
+        Post.objects.create(post_parent_user=profile.user, post_text=f"Post {number}.")
+
+    # Creating the checkpoint (select, savepoint, insert, release), reading the
+    # posts, and moving the checkpoint after each of the two batches.
+    with django_assert_num_queries(7):
+        assert reindex_model(Post, batch_size=5, workers=1) == 10
+
+
+def test_privacy_change_queues_posts(
+    db, django_assert_num_queries, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that the posts of a profile that changed its privacy are queued with a
+    single query.
+    """
+
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    user = valid_data_for_post["post_parent_user"]
+    posts = [
+        Post.objects.create(post_parent_user=user, post_text=f"Post {number}.")
+        for number in range(3)
+    ]
+    IndexChange.objects.all().delete()
+
+    with django_assert_num_queries(1):
+        IndexChange.objects.record_queryset(Post.objects.filter(post_parent_user=user))
+
+    IndexChange.objects.all().delete()
+    profile.private_profile = True
+    profile.save()
+
+    queued = IndexChange.objects.filter(change_model="helenite_app.post")
+    assert sorted(queued.values_list("change_object_id", flat=True)) == [
+        post.id for post in posts
+    ]
+
+
+def test_process_pending_changes_queries(
+    db, algolia_index, django_assert_num_queries, valid_data_for_post
+) -> None:
+    """
+    Tests that the posts of a batch are loaded alongside their authors' profiles,
+    instead of querying them for every post.
+    """
+
+    user = valid_data_for_post["post_parent_user"]
+    Profile.objects.create(
+        user=user,
+        first_name="John",
+        last_name="Doe",
+        birthday="2001-01-01",
+        birth_place="United States",
+    )
+    for number in range(5):
+        Post.objects.create(post_parent_user=user, post_text=f"Post {number}.")
+
+    # Claiming the changes (savepoint, select, update, release), then loading and
+    # deleting them for each model.
+    with django_assert_num_queries(8):
+        assert process_pending_changes() == 6
+
+    assert len(algolia_index.save_objects.call_args_list[-1].args[0]) == 5
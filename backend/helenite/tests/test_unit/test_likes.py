@@ -0,0 +1,79 @@
+from unittest import mock
+
+from helenite_app import likes
+from helenite_app.models import Post, Like, FeedEvent
+
+
+def test_toggle_like(db, valid_data_for_post) -> None:
+    """
+    Tests that toggling a like alternates between liking and unliking the post, and
+    that the counter of the post follows it.
+    """
+
+    user = valid_data_for_post["post_parent_user"]
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    assert likes.toggle_like(user, new_post.post_slug) == likes.LIKED
+    new_post.refresh_from_db()
+    assert new_post.post_like_count == 1
+    assert Like.objects.filter(like_owner=user, like_parent_post=new_post).exists()
+
+    assert likes.toggle_like(user, new_post.post_slug) == likes.UNLIKED
+    new_post.refresh_from_db()
+    assert new_post.post_like_count == 0
+    assert not Like.objects.exists()
+
+    assert likes.toggle_like(user, "doesnotexist") is None
+
+
+def test_like_post_is_idempotent(db, valid_data_for_post) -> None:
+    """
+    Tests that liking twice (e.g. a double tap) keeps a single like and counts it
+    once, and that unliking a post that wasn't liked does nothing.
+    """
+
+    user = valid_data_for_post["post_parent_user"]
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    assert likes.like_post(user, new_post.post_slug) is True
+    assert likes.like_post(user, new_post.post_slug) is False
+    new_post.refresh_from_db()
+    assert new_post.post_like_count == 1
+
+    assert likes.unlike_post(user, new_post.post_slug) is True
+    assert likes.unlike_post(user, new_post.post_slug) is False
+    new_post.refresh_from_db()
+    assert new_post.post_like_count == 0
+
+
+def test_apply_likes_records_changes_only(db, valid_data_for_post) -> None:
+    """
+    Tests that liking again a post already liked, or unliking one that wasn't, in
+    bulk writes no feed event, drops no cached response and pushes no stream event.
+    """
+
+    user = valid_data_for_post["post_parent_user"]
+    new_post = Post.objects.create(**valid_data_for_post)
+
+    assert likes.apply_likes(user, {new_post.post_slug: likes.LIKED}) == {
+        new_post.post_slug: likes.LIKED
+    }
+    events_count = FeedEvent.objects.count()
+
+    with mock.patch("helenite_app.likes.response_cache.bump_post") as bump, mock.patch(
+        "helenite_app.likes.events.publish_post_event"
+    ) as publish:
+        likes.apply_likes(user, {new_post.post_slug: likes.LIKED})
+        likes.apply_likes(user, {"doesnotexist": likes.UNLIKED})
+        assert FeedEvent.objects.count() == events_count
+        bump.assert_not_called()
+        publish.assert_not_called()
+
+        likes.apply_likes(user, {new_post.post_slug: likes.UNLIKED})
+        likes.apply_likes(user, {new_post.post_slug: likes.UNLIKED})
+        assert FeedEvent.objects.count() == events_count + 1
+        bump.assert_called_once()
+        publish.assert_called_once()
+
+    new_post.refresh_from_db()
+    assert new_post.post_like_count == 0
@@ -0,0 +1,207 @@
+import re
+import pytest
+import importlib
+
+from django.apps import apps
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.contrib.auth.models import User
+
+from helenite_app.models import Profile, Post
+from helenite_app.search import (
+    PostgresSearchBackend,
+    SearchResultCache,
+    get_search_backend,
+    perform_search,
+    result_cache,
+)
+
+
+@pytest.fixture
+def in_memory_backend(settings):
+    """
+    Switches the search to the in-memory backend, starting from an empty index.
+    """
+
+    settings.HELENITE_SEARCH_BACKEND = "helenite_app.search.InMemorySearchBackend"
+    backend = get_search_backend()
+    backend.reset()
+    yield backend
+    backend.reset()
+
+
+def test_in_memory_search_profiles(
+    db, in_memory_backend, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that profiles are found by the prefix of any indexed field, and that
+    private profiles are left out.
+    """
+
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    new_user_2 = User.objects.create(
+        username="private", email="email@myemail.com", password="dfhsjkalf6789"
+    )
+    valid_data_for_user_and_profile["user"] = new_user_2
+    valid_data_for_user_and_profile["custom_slug_profile"] = "private"
+    valid_data_for_user_and_profile["private_profile"] = True
+    Profile.objects.create(**valid_data_for_user_and_profile)
+
+    results = in_memory_backend.search("jo", "Helenite_Profile")
+
+    assert [hit["endpoint"] for hit in results["hits"]] == ["/api/v1/profile/test/"]
+    assert in_memory_backend.search("john do", "Helenite_Profile")["hits"] != []
+    assert in_memory_backend.search("jane", "Helenite_Profile")["hits"] == []
+
+
+def test_in_memory_search_follows_changes(
+    db, in_memory_backend, valid_data_for_user_and_profile, valid_data_for_post
+) -> None:
+    """
+    Tests that the index is kept up to date as posts are created and deleted and as
+    profiles change their privacy.
+    """
+
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    assert in_memory_backend.search("lorem", "Helenite_Post")["hits"] == []
+
+    valid_data_for_post["post_parent_user"] = profile.user
+    post = Post.objects.create(**valid_data_for_post)
+
+    assert len(in_memory_backend.search("lorem ips", "Helenite_Post")["hits"]) == 1
+
+    profile.private_profile = True
+    profile.save()
+
+    assert in_memory_backend.search("lorem", "Helenite_Post")["hits"] == []
+    assert in_memory_backend.search("john", "Helenite_Profile")["hits"] == []
+
+    profile.private_profile = False
+    profile.save()
+    post.delete()
+
+    assert in_memory_backend.search("lorem", "Helenite_Post")["hits"] == []
+    assert len(in_memory_backend.search("john", "Helenite_Profile")["hits"]) == 1
+
+
+def test_search_result_cache(mocker) -> None:
+    """
+    Tests that the result cache normalizes queries, expires entries and evicts the
+    least recently used ones.
+    """
+
+    now = mocker.patch("helenite_app.search.time.monotonic", return_value=100)
+    cache = SearchResultCache(max_size=2, timeout=60)
+
+    cache.set("Helenite_Profile", "John  Doe", {"hits": [1]})
+    cache.set("Helenite_Profile", "jane", {"hits": [2]})
+
+    assert cache.get("Helenite_Profile", " john doe") == {"hits": [1]}
+    assert cache.get("Helenite_Post", "john doe") is None
+
+    cache.set("Helenite_Profile", "joe", {"hits": [3]})
+
+    assert cache.get("Helenite_Profile", "jane") is None
+    assert cache.get("Helenite_Profile", "john doe") == {"hits": [1]}
+
+    now.return_value = 161
+
+    assert cache.get("Helenite_Profile", "john doe") is None
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 3,
+        "evictions": 1,
+        "size": 1,
+        "max_size": 2,
+    }
+
+
+def test_search_result_cache_invalidation(
+    db, mocker, valid_data_for_user_and_profile
+) -> None:
+    """
+    Tests that cached profile searches are dropped when a profile changes an indexed
+    field or its privacy, but not for other settings.
+    """
+
+    profile = Profile.objects.create(**valid_data_for_user_and_profile)
+    profile = Profile.objects.get(pk=profile.pk)
+
+    backend = mocker.patch("helenite_app.search.get_search_backend").return_value
+    backend.search.return_value = {"hits": []}
+
+    perform_search("john", "Helenite_Profile")
+    perform_search("lorem", "Helenite_Post")
+
+    profile.show_birthday = False
+    profile.save()
+    perform_search("john", "Helenite_Profile")
+
+    assert backend.search.call_count == 2
+
+    profile.first_name = "Jack"
+    profile.save()
+    perform_search("john", "Helenite_Profile")
+    perform_search("lorem", "Helenite_Post")
+
+    assert backend.search.call_count == 3
+
+    profile.private_profile = True
+    profile.save()
+    perform_search("lorem", "Helenite_Post")
+
+    assert backend.search.call_count == 4
+    assert result_cache.stats()["hits"] == 2
+
+
+def test_postgres_search_matches_gin_indexes() -> None:
+    """
+    Tests that the vectors searched by the Postgres backend are the expressions
+    of the GIN indexes created by the migrations, as Postgres only uses an
+    expression index for the exact same expression.
+    """
+
+    postgres = ConnectionHandler(
+        {"default": {"ENGINE": "django.db.backends.postgresql", "NAME": "helenite"}}
+    )["default"]
+    schema_editor = postgres.schema_editor(collect_sql=True, atomic=False)
+    queries = []
+    for index_name in ("Helenite_Profile", "Helenite_Post"):
+        sql, params = (
+            PostgresSearchBackend()
+            .get_queryset(["jo"], index_name)
+            .query.get_compiler(connection=postgres)
+            .as_sql()
+        )
+        # Parameters are sent inline by psycopg2, and indexes don't qualify
+        # columns (subqueries use "U0"-like aliases).
+        sql = sql % tuple(f"'{param}'" for param in params)
+        queries.append(re.sub(r'(?:"\w+"|U\d+)\.', "", sql))
+    sql = "\n".join(queries)
+
+    migration = importlib.import_module(
+        "helenite_app.migrations.0004_search_gin_indexes"
+    )
+    for label, index in migration.SEARCH_INDEXES:
+        model = apps.get_model(label)
+        index_sql = str(index.create_sql(model, schema_editor))
+        expression = re.search(r"USING gin \(\((.*)\)\)$", index_sql).group(1)
+
+        assert expression in sql
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Full-text search needs Postgres."
+)
+def test_postgres_search_uses_gin_indexes(db) -> None:
+    """
+    Tests that the plan of a search goes through the GIN indexes.
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = PostgresSearchBackend().get_queryset(["jo"], "Helenite_Profile").explain()
+
+    assert "profile_search_vector_gin" in plan
+    assert "user_search_vector_gin" in plan
@@ -23,6 +23,7 @@ def test_feed_serializer(
     Comment.objects.create(**valid_data_for_comment)
 
     Like.objects.create(like_owner=user, like_parent_post=new_post)
+    new_post.refresh_from_db()
 
     serializer = FeedSerializer(new_post)
 
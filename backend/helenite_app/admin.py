@@ -2,9 +2,14 @@ from helenite_app.models import Profile, FriendRequest, Post, Like, Comment
 
 from django.contrib import admin
 
+
+class PostAdmin(admin.ModelAdmin):
+    # The counters are kept up to date by the likes and comments themselves.
+    readonly_fields = Post.COUNTER_FIELDS
+
+
 admin.site.register(Profile)
 admin.site.register(FriendRequest)
-admin.site.register(Post)
+admin.site.register(Post, PostAdmin)
 admin.site.register(Like)
 admin.site.register(Comment)
-
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HeleniteAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'helenite_app'
+
+    def ready(self):
+        from helenite_app import checks, signals  # noqa: F401
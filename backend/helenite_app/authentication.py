@@ -1,7 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
 from rest_framework.authentication import TokenAuthentication
 
+TOKEN_VALID_DURATION = timedelta(days=7)
+TOKEN_CACHE_PREFIX = "helenite:token:"
+
+
+def token_expired(token):
+    """
+    Returns True if the token is older than 7 days.
+
+    Args:
+        - token: the ``Token`` to be checked.
+    """
+
+    return (timezone.now() - token.created) > TOKEN_VALID_DURATION
+
+
+def invalidate_token_cache(key):
+    """
+    Removes a token from the authentication cache. Must be called whenever a token
+    is deleted or its user changes credentials.
+
+    Args:
+        - key: the key of the token.
+    """
+
+    cache.delete(TOKEN_CACHE_PREFIX + key)
+
+
 class TokenAuthentication(TokenAuthentication):
     """
     Changes the default header keyword from 'Token' to 'Bearer'.
+
+    Also rejects expired tokens using the row that was already loaded, and keeps
+    the token alongside its user on the cache for `HELENITE_TOKEN_CACHE_TIMEOUT`
+    seconds (0 disables it), so most requests don't query the database at all to
+    be authenticated.
     """
-    keyword = 'Bearer'
\ No newline at end of file
+
+    keyword = "Bearer"
+
+    def authenticate_credentials(self, key):
+        timeout = getattr(settings, "HELENITE_TOKEN_CACHE_TIMEOUT", 0)
+        token = cache.get(TOKEN_CACHE_PREFIX + key) if timeout else None
+
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related("user").get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+            if timeout:
+                cache.set(TOKEN_CACHE_PREFIX + key, token, timeout)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        if token_expired(token):
+            raise exceptions.AuthenticationFailed(_("Token has expired."))
+
+        return (token.user, token)
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+# Cache backends whose data is only seen by the process storing it.
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+# The settings enabling a feature that keeps shared state on the default cache,
+# with what goes wrong on the other processes when it isn't shared, and the id
+# of the warning.
+SHARED_CACHE_SETTINGS = {
+    "HELENITE_TOKEN_CACHE_TIMEOUT": (
+        "tokens are cached: a revoked token stays valid on the other processes",
+        "helenite_app.W001",
+    ),
+    "HELENITE_RESPONSE_CACHE_TIMEOUT": (
+        "responses are cached: a change only invalidates the cached responses "
+        "and ETags of the process making it",
+        "helenite_app.W002",
+    ),
+}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warns when the token or response cache is on but the default cache isn't
+    shared between processes, since the other processes would keep serving
+    stale data.
+    """
+
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+
+    return [
+        Warning(
+            f"The default cache is local to each process, but {problem}.",
+            hint="Set REDIS_URL when serving the API with more than one process.",
+            id=check_id,
+        )
+        for name, (problem, check_id) in SHARED_CACHE_SETTINGS.items()
+        if getattr(settings, name, 0)
+    ]
@@ -1,24 +1,141 @@
-from algoliasearch_django import algolia_engine
+import time
+import asyncio
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+
+from algoliasearch.helpers import is_async_available
+from algoliasearch.configs import SearchConfig
+from algoliasearch.exceptions import AlgoliaException
+from algoliasearch.search_client import SearchClient
+
+
+class SearchUnavailable(Exception):
+    """
+    Raised when the search provider can't be reached in time, or when the circuit
+    breaker is open and the call wasn't even attempted.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing service for a while instead of having every request
+    wait for it to time out.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    fail immediately. Once ``reset_timeout`` seconds have passed, a single call is
+    let through: if it succeeds the circuit closes, otherwise it opens again.
+
+    Args:
+        - failure_threshold: consecutive failures needed to open the circuit;
+        - reset_timeout: seconds to wait before trying the service again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def before_call(self):
+        """
+        Raises `SearchUnavailable` if the call shouldn't be attempted.
+        """
+
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited < self.reset_timeout or self._trial_running:
+                raise SearchUnavailable("Search is temporarily unavailable.")
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """
+        Lets another call be the trial, when the running one was interrupted
+        without an outcome (e.g. a cancelled request).
+        """
+
+        with self._lock:
+            self._trial_running = False
+
+
+breaker = CircuitBreaker(
+    failure_threshold=getattr(settings, "HELENITE_SEARCH_FAILURE_THRESHOLD", 5),
+    reset_timeout=getattr(settings, "HELENITE_SEARCH_RESET_TIMEOUT", 30),
+)
+
+_local = threading.local()
+
+# Runs the sync searches, so they can be given up on once their time budget is
+# spent: the Algolia client retries on each of its hosts, with the timeouts
+# applying to every attempt.
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "HELENITE_SEARCH_THREADS", 10),
+    thread_name_prefix="search",
+)
 
 
 def get_client():
     """
-    Returns the Algolia-Django built-in client.
+    Returns the Algolia client for the current thread.
+
+    Clients are created once per thread and kept for the life of the process, so
+    their HTTP session (and its keep-alive connections) is reused across requests
+    without being shared between threads.
     """
 
-    return algolia_engine.client
+    client = getattr(_local, "client", None)
+    if client is None:
+        config = SearchConfig(
+            settings.ALGOLIA.get("APPLICATION_ID"), settings.ALGOLIA.get("API_KEY")
+        )
+        config.connect_timeout = getattr(settings, "HELENITE_SEARCH_TIMEOUT", 2)
+        config.read_timeout = getattr(settings, "HELENITE_SEARCH_TIMEOUT", 2)
+        client = SearchClient.create_with_config(config)
+        _local.client = client
+        _local.indexes = {}
+    return client
 
 
 def get_index(index_name):
     """
-    Initializes the specified index on the Algolia servers.
+    Returns the handle for the specified index on the Algolia servers, reusing the
+    one created earlier by the current thread.
 
     Args:
         - index_name: the name of the index as specified when indexing new models.
     """
 
     client = get_client()
-    index = client.init_index(index_name)
+    index = _local.indexes.get(index_name)
+    if index is None:
+        index = client.init_index(index_name)
+        _local.indexes[index_name] = index
     return index
 
 
@@ -26,11 +143,98 @@ def perform_search(query, index="Helenite_Profile", **kwargs):
     """
     Reaches for the Algolia servers for the perform the actual serach.
 
+    The call goes through the circuit breaker and is bounded by
+    `HELENITE_SEARCH_TIMEOUT` as a whole, across the retries of the Algolia client
+    on its other hosts; it raises `SearchUnavailable` when Algolia fails, is too
+    slow, or has been failing recently.
+
+    Args:
+        - query: the query specified by the user;
+        - index: the index specified by the user (defaults to "Helenite_Profile").
+    """
+
+    timeout = getattr(settings, "HELENITE_SEARCH_TIMEOUT", 2)
+    request_options = {"readTimeout": timeout, "connectTimeout": timeout}
+
+    breaker.before_call()
+    started = time.monotonic()
+    try:
+        future = _executor.submit(_search, query, index, request_options)
+        results = future.result(timeout=timeout)
+    except FutureTimeout as error:
+        # The call keeps running on its thread, its result is dropped.
+        breaker.record_failure()
+        raise SearchUnavailable("Search timed out.") from error
+    except AlgoliaException as error:
+        breaker.record_failure()
+        raise SearchUnavailable(str(error)) from error
+    except Exception:
+        # Any other error (e.g. from the HTTP client) has to end the trial as
+        # well, or the circuit would never close again.
+        breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.release_trial()
+        raise
+
+    _record_outcome(started, timeout)
+    return results
+
+
+async def aperform_search(query, index="Helenite_Profile"):
+    """
+    Async variant of `perform_search`, used by the async views.
+
+    When the async requester of the Algolia client is available (it needs the
+    ``aiohttp`` and ``async_timeout`` packages), the request is awaited on the
+    event loop without holding a thread. Otherwise, it runs on a worker thread.
+
     Args:
         - query: the query specified by the user;
         - index: the index specified by the user (defaults to "Helenite_Profile").
     """
 
-    index = get_index(index)
-    results = index.search(query)
+    timeout = getattr(settings, "HELENITE_SEARCH_TIMEOUT", 2)
+    request_options = {"readTimeout": timeout, "connectTimeout": timeout}
+
+    breaker.before_call()
+    started = time.monotonic()
+    try:
+        if is_async_available():
+            # The event loop thread keeps its own client, whose HTTP session is
+            # bound to the loop.
+            call = get_index(index).search_async(query, request_options)
+        else:
+            call = sync_to_async(_search, thread_sensitive=False)(
+                query, index, request_options
+            )
+        results = await asyncio.wait_for(call, timeout)
+    except asyncio.TimeoutError as error:
+        breaker.record_failure()
+        raise SearchUnavailable("Search timed out.") from error
+    except AlgoliaException as error:
+        breaker.record_failure()
+        raise SearchUnavailable(str(error)) from error
+    except Exception:
+        breaker.record_failure()
+        raise
+    except BaseException:
+        # The request was cancelled, e.g. the client went away.
+        breaker.release_trial()
+        raise
+
+    _record_outcome(started, timeout)
     return results
+
+
+def _search(query, index, request_options):
+    return get_index(index).search(query, request_options)
+
+
+def _record_outcome(started, timeout):
+    if time.monotonic() - started > timeout:
+        # Answered, but slower than the budget: counts towards opening the
+        # circuit, so the next requests fail fast.
+        breaker.record_failure()
+    else:
+        breaker.record_success()
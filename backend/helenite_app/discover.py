@@ -0,0 +1,73 @@
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Min
+
+from helenite_app.models import Post
+
+
+POOL_CACHE_KEY = "helenite:discover:pool"
+
+
+def refresh_candidate_pool():
+    """
+    Rebuilds the pool of candidate posts for the discover page and stores it on
+    the cache.
+
+    The pool holds the ids of public posts alongside their authors, read from
+    `HELENITE_DISCOVER_POOL_WINDOWS` windows starting at random ids, so posts
+    from the whole history can be discovered. Each window is a bounded scan over
+    the primary key index instead of a full table scan.
+    """
+
+    pool_size = getattr(settings, "HELENITE_DISCOVER_POOL_SIZE", 1000)
+    pool_timeout = getattr(settings, "HELENITE_DISCOVER_POOL_TIMEOUT", 300)
+    windows = getattr(settings, "HELENITE_DISCOVER_POOL_WINDOWS", 10)
+
+    public_posts = Post.objects.filter(
+        post_parent_user__profile__private_profile=False
+    ).order_by("id")
+    bounds = Post.objects.aggregate(first=Min("id"), last=Max("id"))
+
+    pool = {}
+    if bounds["first"] is not None:
+        window_size = max(1, pool_size // windows)
+        for _ in range(windows):
+            start = random.randint(bounds["first"], bounds["last"])
+            pool.update(
+                public_posts.filter(id__gte=start).values_list(
+                    "id", "post_parent_user_id"
+                )[:window_size]
+            )
+
+    pool = list(pool.items())
+    cache.set(POOL_CACHE_KEY, pool, pool_timeout)
+    return pool
+
+
+def get_candidate_pool():
+    """
+    Returns the cached pool of candidate posts, rebuilding it when it expired.
+    """
+
+    pool = cache.get(POOL_CACHE_KEY)
+    if pool is None:
+        pool = refresh_candidate_pool()
+    return pool
+
+
+def sample_post_ids(user, size=30):
+    """
+    Picks random post ids from the candidate pool, leaving out the posts made by
+    the user.
+
+    Args:
+        - user: the ``User`` requesting the discover page;
+        - size: the maximum amount of ids returned (defaults to 30).
+    """
+
+    candidates = [
+        post_id for post_id, author_id in get_candidate_pool() if author_id != user.pk
+    ]
+    return random.sample(candidates, min(size, len(candidates)))
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+
+from django.urls import reverse
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from helenite_app.models import Profile
+
+
+# Types of the events pushed to the feed stream.
+POST = "post"
+POST_DELETED = "post_deleted"
+LIKE = "like"
+UNLIKE = "unlike"
+COMMENT = "comment"
+COMMENT_DELETED = "comment_deleted"
+
+
+class Subscription:
+    """
+    The events waiting to be sent to a single connection of the feed stream.
+
+    Must be created from the event loop serving the connection. Events can be
+    pushed from any thread; when the connection falls more than ``max_size``
+    events behind, the newest ones are dropped (the client catches up through
+    the feed sync endpoint).
+    """
+
+    def __init__(self, user_id, max_size=100):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_size)
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The event loop of the connection was closed.
+            pass
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class BaseBroker:
+    """
+    Interface for the pub/sub brokers delivering events to the feed stream.
+    """
+
+    def subscribe(self, user_id):
+        """
+        Returns a new `Subscription` receiving the events sent to the user.
+        """
+
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def has_subscribers(self):
+        """
+        Returns whether anyone may receive events, so publishers can skip
+        looking up the recipients otherwise.
+        """
+
+        return True
+
+    def publish(self, user_ids, event):
+        """
+        Sends an event to every subscription of the given users.
+        """
+
+        raise NotImplementedError
+
+
+class LocalBroker(BaseBroker):
+    """
+    Delivers the events in memory, to the connections of the current process.
+
+    Stands in for an external broker (e.g. Redis pub/sub) on a single process
+    deployment and during development; with many processes, each connection
+    only gets the events published by the process serving it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, user_id):
+        max_size = getattr(settings, "HELENITE_STREAM_QUEUE_SIZE", 100)
+        subscription = Subscription(user_id, max_size)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+
+    def publish(self, user_ids, event):
+        with self._lock:
+            targets = [
+                subscription
+                for user_id in set(user_ids)
+                for subscription in self._subscriptions.get(user_id, ())
+            ]
+        for subscription in targets:
+            subscription.put(event)
+
+
+_brokers = {}
+
+
+def get_broker():
+    """
+    Returns the broker configured on `HELENITE_STREAM_BROKER`. Brokers are
+    instantiated once per process.
+    """
+
+    path = getattr(
+        settings, "HELENITE_STREAM_BROKER", "helenite_app.events.LocalBroker"
+    )
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+def _deliver(kind, post_slug, author_id):
+    broker = get_broker()
+    if not broker.has_subscribers():
+        return
+
+    # The users who have the post on their feed: the author and their friends.
+    recipients = [author_id] + list(
+        Profile.objects.filter(friends__user_id=author_id).values_list(
+            "user_id", flat=True
+        )
+    )
+    broker.publish(
+        recipients,
+        {
+            "type": kind,
+            "endpoint": reverse(
+                "single_post_endpoint", kwargs={"post_slug": post_slug}
+            ),
+        },
+    )
+
+
+def publish_post_event(kind, post_slug, author_id):
+    """
+    Pushes a change to a post to the feed streams of the users who have it on
+    their feed, once the transaction commits.
+
+    Args:
+        - kind: the type of the event, e.g. `POST` or `LIKE`;
+        - post_slug: the slug of the post;
+        - author_id: the id of the author of the post.
+    """
+
+    transaction.on_commit(lambda: _deliver(kind, post_slug, author_id))
@@ -0,0 +1,147 @@
+import json
+import base64
+import binascii
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import NotFound
+
+from helenite_app.models import Profile, FeedEvent
+
+
+class CursorExpired(Exception):
+    """
+    Raised when the events after a sync cursor may have been pruned already, so
+    the client has to reload its feed instead.
+    """
+
+
+def get_retention():
+    """
+    Returns for how long the feed events are kept.
+    """
+
+    return timedelta(days=getattr(settings, "HELENITE_FEED_EVENTS_RETENTION", 7))
+
+
+def get_commit_lag():
+    """
+    Returns how old events have to be before they're handed out. Event ids are
+    taken when the events are written, but a transaction may commit after
+    another that took a later id: a client syncing in between would move past
+    the earlier event without ever seeing it. Events older than the lag are
+    assumed to be committed already.
+    """
+
+    return timedelta(seconds=getattr(settings, "HELENITE_FEED_SYNC_COMMIT_LAG", 5))
+
+
+def encode_cursor(event_id, known_until):
+    """
+    Encodes the position of a client on the change log as an opaque, URL-safe
+    string.
+
+    Args:
+        - event_id: the id of the last event the client knows about;
+        - known_until: the time up to which the client knows every event, so the
+        cursor expires once the events after it may have been pruned.
+    """
+
+    raw = json.dumps([event_id, known_until.isoformat()]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(encoded):
+    """
+    Returns the id of the last event known by the client.
+
+    Args:
+        - encoded: the cursor provided by the client.
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(encoded.encode("ascii"))
+        event_id, known_until = json.loads(raw)
+        event_id = int(event_id)
+        known_until = parse_datetime(known_until)
+    except (TypeError, ValueError, UnicodeError, binascii.Error):
+        raise NotFound("Invalid cursor")
+
+    if known_until is None:
+        raise NotFound("Invalid cursor")
+    # Events are pruned by age, so the events the client doesn't know about are
+    # still there as long as they're newer than the retention period.
+    if known_until < timezone.now() - get_retention():
+        raise CursorExpired()
+    return event_id
+
+
+def get_start_cursor():
+    """
+    Returns the cursor where a client that just loaded its feed starts syncing
+    from: after the most recent event older than the commit lag. The changes of
+    the last seconds may be sent again on the first sync, but none is skipped.
+    """
+
+    cutoff = timezone.now() - get_commit_lag()
+    event_id = (
+        FeedEvent.objects.filter(event_created_at__lte=cutoff)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+    )
+    return encode_cursor(event_id or 0, cutoff)
+
+
+def get_changes(user, after_id, limit):
+    """
+    Returns the changes to the feed of the user after the given event, reading up
+    to ``limit`` events older than the commit lag: the ids of the new posts, the
+    ids of the posts whose counters changed, and the slugs of the deleted posts.
+    Also returns the cursor after the last event read and whether there are more
+    events after it.
+
+    Args:
+        - user: the ``User`` syncing their feed;
+        - after_id: the id of the last event known by the client;
+        - limit: the maximum amount of events read.
+    """
+
+    cutoff = timezone.now() - get_commit_lag()
+    friends = Profile.objects.filter(friends__user=user).values("user_id")
+    events = list(
+        FeedEvent.objects.filter(
+            Q(event_author_id=user.pk) | Q(event_author_id__in=friends),
+            id__gt=after_id,
+            event_created_at__lte=cutoff,
+        ).order_by("id")[: limit + 1]
+    )
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    created, updated, deleted = {}, {}, {}
+    for event in events:
+        if event.event_kind == FeedEvent.CREATED:
+            created[event.event_post_id] = True
+        elif event.event_kind == FeedEvent.UPDATED:
+            updated[event.event_post_id] = True
+        else:
+            created.pop(event.event_post_id, None)
+            updated.pop(event.event_post_id, None)
+            deleted[event.event_post_id] = event.event_post_slug
+
+    # A client with more events to read only knows them up to the last one read.
+    known_until = events[-1].event_created_at if has_more else cutoff
+    return {
+        "created": list(created),
+        # The new posts are sent whole, with their current counters.
+        "updated": [post_id for post_id in updated if post_id not in created],
+        "deleted": list(deleted.values()),
+        "cursor": encode_cursor(events[-1].id if events else after_id, known_until),
+        "has_more": has_more,
+    }
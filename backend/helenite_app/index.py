@@ -24,6 +24,13 @@ class ProfileIndex(AlgoliaIndex):
     should_index = "is_public"
     fields = ["user", "custom_slug_profile", "first_name", "last_name", "endpoint"]
 
+    def get_queryset(self):
+        """
+        Loads the user of each profile alongside it.
+        """
+
+        return Profile.objects.select_related("user")
+
 
 @register(Post)
 class PostIndex(AlgoliaIndex):
@@ -42,3 +49,11 @@ class PostIndex(AlgoliaIndex):
 
     should_index = "is_public"
     fields = ["post_parent_user", "post_text", "endpoint"]
+
+    def get_queryset(self):
+        """
+        Loads the author of each post and their profile alongside it, since
+        `Post.is_public` reads "private_profile" from it.
+        """
+
+        return Post.objects.select_related("post_parent_user__profile")
@@ -0,0 +1,234 @@
+import logging
+
+from collections import deque
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from algoliasearch_django import algolia_engine
+
+from helenite_app.models import IndexChange, IndexCheckpoint
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_retry_delay(attempts):
+    """
+    Returns how long a change waits before being retried, doubling on every
+    failed attempt.
+
+    Args:
+        - attempts: how many times syncing the change failed so far.
+    """
+
+    delay = getattr(settings, "HELENITE_INDEXING_RETRY_DELAY", 5)
+    max_delay = getattr(settings, "HELENITE_INDEXING_MAX_RETRY_DELAY", 600)
+    return timedelta(seconds=min(delay * 2 ** (attempts - 1), max_delay))
+
+
+def get_index_queryset(adapter):
+    """
+    Returns the queryset used to build the records of an index: the
+    ``get_queryset`` of its registration (which loads the related objects read by
+    the records), if any.
+
+    Args:
+        - adapter: the `AlgoliaIndex` registered for the model.
+    """
+
+    if hasattr(adapter, "get_queryset"):
+        return adapter.get_queryset()
+    return adapter.model.objects.all()
+
+
+def get_record(adapter, instance):
+    """
+    Returns the index record of an instance, or None if it shouldn't be indexed.
+    An instance whose record can't be built (e.g. a post whose author has no
+    profile) is logged and left out of the index, instead of failing its batch.
+
+    Args:
+        - adapter: the `AlgoliaIndex` registered for the model;
+        - instance: the object indexed.
+    """
+
+    try:
+        if adapter._should_index(instance):
+            return adapter.get_raw_record(instance)
+    except Exception:
+        logger.exception(
+            "Could not build the index record of %s #%s.",
+            instance._meta.label_lower,
+            instance.pk,
+        )
+    return None
+
+
+def sync_objects(model, object_ids):
+    """
+    Makes the index records of the given objects match the database: the ones
+    that exist and should be indexed are sent with a single ``save_objects``
+    call, and the rest are removed with a single ``delete_objects`` call.
+
+    Since records are always built from the current rows, syncing an object
+    twice or out of order still leaves the index with its latest state.
+
+    Args:
+        - model: the indexed model;
+        - object_ids: the primary keys of the objects that changed.
+    """
+
+    adapter = algolia_engine.get_adapter(model)
+    index = algolia_engine.client.init_index(adapter.index_name)
+
+    records = []
+    for instance in get_index_queryset(adapter).filter(pk__in=object_ids):
+        record = get_record(adapter, instance)
+        if record is not None:
+            records.append(record)
+
+    removed = set(object_ids) - {record["objectID"] for record in records}
+    if records:
+        index.save_objects(records)
+    if removed:
+        index.delete_objects(sorted(removed))
+
+
+def process_pending_changes(batch_size=None):
+    """
+    Syncs a batch of pending changes with Algolia and returns how many changes
+    were consumed.
+
+    Changes are grouped per model and object, so an object changed many times is
+    sent once. Synced changes are deleted; the ones that failed are kept and
+    pushed back with an exponential delay.
+
+    The batch is claimed in a short transaction: its rows are locked (skipping the
+    ones other workers hold) and pushed back by `HELENITE_INDEXING_CLAIM_TIMEOUT`,
+    so concurrent workers get distinct changes. Algolia is then called outside of
+    the transaction; if the worker dies meanwhile, the changes are picked up again
+    once the claim expires.
+
+    Args:
+        - batch_size: the maximum amount of changes consumed (defaults to
+        `HELENITE_INDEXING_BATCH_SIZE`).
+    """
+
+    batch_size = batch_size or getattr(settings, "HELENITE_INDEXING_BATCH_SIZE", 500)
+    claim_timeout = getattr(settings, "HELENITE_INDEXING_CLAIM_TIMEOUT", 300)
+
+    with transaction.atomic():
+        now = timezone.now()
+        changes = list(
+            IndexChange.objects.select_for_update(skip_locked=True)
+            .filter(change_available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        if changes:
+            IndexChange.objects.filter(id__in=[change.id for change in changes]).update(
+                change_available_at=now + timedelta(seconds=claim_timeout)
+            )
+
+    pending = {}
+    for change in changes:
+        pending.setdefault(change.change_model, []).append(change)
+
+    for label, model_changes in pending.items():
+        object_ids = {change.change_object_id for change in model_changes}
+        try:
+            sync_objects(apps.get_model(label), object_ids)
+        except Exception:
+            logger.exception("Could not sync %s with Algolia.", label)
+            now = timezone.now()
+            for change in model_changes:
+                change.change_attempts += 1
+                change.change_available_at = now + get_retry_delay(
+                    change.change_attempts
+                )
+            IndexChange.objects.bulk_update(
+                model_changes, ["change_attempts", "change_available_at"]
+            )
+        else:
+            IndexChange.objects.filter(
+                id__in=[change.id for change in model_changes]
+            ).delete()
+
+    return len(changes)
+
+
+def reindex_model(model, batch_size=1000, workers=4, full=False):
+    """
+    Sends the rows created since the last run to the index and returns how many
+    records were sent.
+
+    Rows are streamed in primary key order, after the model's ``IndexCheckpoint``,
+    and sent as bulk ``save_objects`` calls running on up to ``workers`` threads.
+    The checkpoint only moves past a batch once it and every batch before it were
+    sent, so an interrupted run resumes where it stopped.
+
+    Args:
+        - model: the indexed model;
+        - batch_size: the amount of records per ``save_objects`` call;
+        - workers: the amount of batches sent at the same time;
+        - full: starts over from the first row instead of the checkpoint.
+    """
+
+    adapter = algolia_engine.get_adapter(model)
+    index = algolia_engine.client.init_index(adapter.index_name)
+    checkpoint, _ = IndexCheckpoint.objects.get_or_create(
+        checkpoint_model=model._meta.label_lower
+    )
+    if full:
+        checkpoint.checkpoint_last_id = 0
+        checkpoint.save()
+
+    def advance(pending):
+        future, last_id = pending.popleft()
+        future.result()
+        checkpoint.checkpoint_last_id = last_id
+        checkpoint.save()
+
+    queryset = (
+        get_index_queryset(adapter)
+        .filter(pk__gt=checkpoint.checkpoint_last_id)
+        .order_by("pk")
+    )
+    sent = 0
+    records = []
+    last_id = None
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for instance in queryset.iterator(chunk_size=batch_size):
+                last_id = instance.pk
+                record = get_record(adapter, instance)
+                if record is not None:
+                    records.append(record)
+                if len(records) < batch_size:
+                    continue
+
+                pending.append((executor.submit(index.save_objects, records), last_id))
+                sent += len(records)
+                records = []
+                if len(pending) >= workers:
+                    advance(pending)
+
+            if records:
+                pending.append((executor.submit(index.save_objects, records), last_id))
+                sent += len(records)
+            while pending:
+                advance(pending)
+        except BaseException:
+            executor.shutdown(cancel_futures=True)
+            raise
+
+    # The rows after the last batch (if any) were all left out of the index.
+    if last_id is not None and checkpoint.checkpoint_last_id != last_id:
+        checkpoint.checkpoint_last_id = last_id
+        checkpoint.save()
+    return sent
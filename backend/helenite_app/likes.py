@@ -0,0 +1,253 @@
+from django.db import connection, transaction
+
+from helenite_app import events, response_cache
+from helenite_app.models import Post, Like, FeedEvent
+
+
+LIKED = "liked"
+UNLIKED = "unliked"
+
+# On Postgres the counter is updated by the same statement that inserts or deletes
+# the like, through a data-modifying CTE. Other databases run the UPDATE after it.
+INSERT_LIKE = """
+    INSERT INTO {like} (like_owner_id, like_parent_post_id)
+    SELECT %s, id FROM {post} WHERE post_slug = %s
+    ON CONFLICT DO NOTHING
+    RETURNING like_parent_post_id
+"""
+DELETE_LIKE = """
+    DELETE FROM {like}
+    WHERE like_owner_id = %s
+    AND like_parent_post_id = (SELECT id FROM {post} WHERE post_slug = %s)
+    RETURNING like_parent_post_id
+"""
+UPDATE_COUNTER = """
+    UPDATE {post} SET post_like_count = {count}
+    WHERE id = %s
+    RETURNING id, post_parent_user_id, post_slug
+"""
+UPDATE_COUNTER_WITH = """
+    WITH changed AS ({statement})
+    UPDATE {post} SET post_like_count = {count}
+    FROM changed WHERE {post}.id = changed.like_parent_post_id
+    RETURNING {post}.id, {post}.post_parent_user_id, {post}.post_slug
+"""
+# Used by `apply_likes`, which recounts the affected posts afterwards.
+INSERT_LIKES = """
+    INSERT INTO {like} (like_owner_id, like_parent_post_id)
+    VALUES {values}
+    ON CONFLICT DO NOTHING
+    RETURNING like_parent_post_id
+"""
+DELETE_LIKES = """
+    DELETE FROM {like}
+    WHERE like_owner_id = %s AND like_parent_post_id IN ({ids})
+    RETURNING like_parent_post_id
+"""
+INCREMENT = "post_like_count + 1"
+DECREMENT = "CASE WHEN post_like_count > 0 THEN post_like_count - 1 ELSE 0 END"
+
+
+def _execute(statement, count, params, event):
+    """
+    Runs the statement inserting or deleting a like alongside the update of the
+    counter of its post, and returns whether a like was changed. Raw statements
+    send no signals, so the cached responses showing the post are dropped, the
+    change is logged for the feed sync and pushed to the feed streams here.
+
+    Args:
+        - statement: `INSERT_LIKE` or `DELETE_LIKE`;
+        - count: the new value of the counter, as a SQL expression;
+        - params: the id of the user and the slug of the post;
+        - event: the event pushed to the feed streams.
+    """
+
+    tables = {
+        "like": connection.ops.quote_name(Like._meta.db_table),
+        "post": connection.ops.quote_name(Post._meta.db_table),
+    }
+    statement = statement.format(**tables)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                UPDATE_COUNTER_WITH.format(statement=statement, count=count, **tables),
+                params,
+            )
+        else:
+            cursor.execute(statement, params)
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            cursor.execute(UPDATE_COUNTER.format(count=count, **tables), [row[0]])
+
+        row = cursor.fetchone()
+        if row is None:
+            return False
+        post_id, author_id, post_slug = row
+        response_cache.bump_post(post_id, author_id)
+        FeedEvent.objects.record(FeedEvent.UPDATED, post_id, author_id)
+        events.publish_post_event(event, post_slug, author_id)
+        return True
+
+
+def like_post(user, post_slug):
+    """
+    Likes a post, doing nothing if it was already liked. Returns True if the like
+    was created.
+
+    Args:
+        - user: the ``User`` liking the post;
+        - post_slug: the slug of the post.
+    """
+
+    return _execute(INSERT_LIKE, INCREMENT, [user.pk, post_slug], events.LIKE)
+
+
+def unlike_post(user, post_slug):
+    """
+    Removes the like left by the user on a post. Returns True if there was one.
+
+    Args:
+        - user: the ``User`` unliking the post;
+        - post_slug: the slug of the post.
+    """
+
+    return _execute(DELETE_LIKE, DECREMENT, [user.pk, post_slug], events.UNLIKE)
+
+
+def toggle_like(user, post_slug):
+    """
+    Likes the post if the user didn't like it yet, and unlikes it otherwise.
+    Returns `LIKED` or `UNLIKED`, or None if the post doesn't exist.
+
+    Both steps are single statements guarded by the (owner, post) unique
+    constraint, so concurrent toggles can't fail nor count a like twice.
+
+    Args:
+        - user: the ``User`` toggling the like;
+        - post_slug: the slug of the post.
+    """
+
+    if unlike_post(user, post_slug):
+        return UNLIKED
+    if like_post(user, post_slug):
+        return LIKED
+
+    # Nothing was inserted: either the post doesn't exist, or a concurrent
+    # request liked it in the meantime.
+    if not Post.objects.filter(post_slug=post_slug).exists():
+        return None
+    return LIKED
+
+
+def apply_likes(user, intents):
+    """
+    Likes and unlikes many posts at once, e.g. the likes queued by a client while
+    offline. Returns the outcome for every slug: `LIKED`, `UNLIKED` or None if the
+    post doesn't exist.
+
+    The likes are inserted with a single INSERT ignoring the existing ones, the
+    unlikes removed with a single DELETE, and the counters of the posts whose like
+    actually changed recomputed with a single UPDATE.
+
+    Args:
+        - user: the ``User`` liking and unliking the posts;
+        - intents: maps post slugs to `LIKED` or `UNLIKED`.
+    """
+
+    posts = {
+        slug: (post_id, author_id)
+        for slug, post_id, author_id in Post.objects.filter(
+            post_slug__in=intents
+        ).values_list("post_slug", "id", "post_parent_user_id")
+    }
+    post_ids = {slug: post_id for slug, (post_id, _) in posts.items()}
+    to_like = [
+        post_ids[slug]
+        for slug, intent in intents.items()
+        if intent == LIKED and slug in post_ids
+    ]
+    to_unlike = [
+        post_ids[slug]
+        for slug, intent in intents.items()
+        if intent == UNLIKED and slug in post_ids
+    ]
+
+    like = connection.ops.quote_name(Like._meta.db_table)
+    liked, unliked = set(), set()
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Raw statements rather than a ``bulk_create`` and a queryset delete, so
+        # that RETURNING tells which likes actually changed, and no signal is
+        # sent for each like: the counters are recomputed below instead.
+        if to_like:
+            cursor.execute(
+                INSERT_LIKES.format(
+                    like=like, values=", ".join(["(%s, %s)"] * len(to_like))
+                ),
+                [param for post_id in to_like for param in (user.pk, post_id)],
+            )
+            liked = {row[0] for row in cursor.fetchall()}
+        if to_unlike:
+            cursor.execute(
+                DELETE_LIKES.format(like=like, ids=", ".join(["%s"] * len(to_unlike))),
+                [user.pk, *to_unlike],
+            )
+            unliked = {row[0] for row in cursor.fetchall()}
+
+        # Liking a post already liked, or unliking one that wasn't, changes
+        # nothing: it is neither logged, nor dropped from the cache, nor pushed.
+        changed = {
+            slug: (post_id, author_id)
+            for slug, (post_id, author_id) in posts.items()
+            if post_id in liked or post_id in unliked
+        }
+        if changed:
+            Post.objects.filter(id__in=liked | unliked).recount()
+            FeedEvent.objects.record_updates(changed.values())
+            for slug, (post_id, author_id) in changed.items():
+                response_cache.bump_post(post_id, author_id)
+                events.publish_post_event(
+                    events.LIKE if post_id in liked else events.UNLIKE,
+                    slug,
+                    author_id,
+                )
+
+    return {
+        slug: intent if slug in post_ids else None for slug, intent in intents.items()
+    }
+
+
+def liked_post_slugs(user, post_slugs):
+    """
+    Returns which of the given posts the user liked, with a single query.
+
+    Args:
+        - user: the ``User`` whose likes are checked;
+        - post_slugs: the slugs of the posts.
+    """
+
+    return set(
+        Like.objects.filter(
+            like_owner=user, like_parent_post__post_slug__in=post_slugs
+        ).values_list("like_parent_post__post_slug", flat=True)
+    )
+
+
+def liked_post_ids(user, post_ids):
+    """
+    Returns which of the given posts the user liked, with a single query (none for
+    anonymous users).
+
+    Args:
+        - user: the ``User`` whose likes are checked;
+        - post_ids: the ids of the posts.
+    """
+
+    if user is None or not user.is_authenticated:
+        return set()
+    return set(
+        Like.objects.filter(
+            like_owner=user, like_parent_post_id__in=post_ids
+        ).values_list("like_parent_post_id", flat=True)
+    )
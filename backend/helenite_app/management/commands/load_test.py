@@ -0,0 +1,201 @@
+import json
+import time
+import statistics
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.authtoken.models import Token
+
+from helenite_app.authentication import token_expired
+
+
+ENDPOINTS = ("feed", "discover", "search", "profile")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def run_load(url, headers, concurrency, duration):
+    """
+    Sends requests to a URL from ``concurrency`` clients at once for ``duration``
+    seconds, and returns the throughput, the latencies and the amount of errors.
+
+    Args:
+        - url: the URL requested;
+        - headers: the headers sent with every request;
+        - concurrency: amount of clients waiting on a response at the same time;
+        - duration: seconds the load is kept for.
+    """
+
+    lock = threading.Lock()
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    def client():
+        nonlocal errors
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, headers=headers, timeout=30)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if failed:
+                    errors += 1
+                else:
+                    latencies.append(elapsed)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    elapsed = time.monotonic() - started
+
+    return {
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95), 3) if latencies else None,
+        "requests": len(latencies),
+        "errors": errors,
+    }
+
+
+class Command(BaseCommand):
+    """
+    Compares the throughput of the read-heavy endpoints between running servers,
+    e.g. the WSGI application with the DRF views and the ASGI application with
+    their async variants (`HELENITE_ASYNC_VIEWS`), both using the same database:
+
+        gunicorn helenite.wsgi --workers 1 --threads 4 --bind :8001
+        HELENITE_ASYNC_VIEWS=1 uvicorn helenite.asgi:application --port 8002
+        python manage.py load_test wsgi=http://localhost:8001 \
+            asgi=http://localhost:8002 --username bench0
+
+    Every endpoint is loaded on each server in turn, and the requests per second
+    and latencies are printed (and written to ``--report``). The load is
+    generated by threads of this process, so it should run on another machine
+    than the servers for precise numbers.
+    """
+
+    help = "Compares the throughput of the read-heavy endpoints between servers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "servers",
+            nargs="+",
+            help="The servers compared, as name=base_url.",
+        )
+        parser.add_argument(
+            "--username",
+            required=True,
+            help="User making the requests; a token is created if needed.",
+        )
+        parser.add_argument(
+            "--endpoints",
+            default=",".join(ENDPOINTS),
+            help="Endpoints loaded, separated by commas.",
+        )
+        parser.add_argument(
+            "--query",
+            default="a",
+            help="Query sent to the search endpoint.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Amount of requests waiting on a response at the same time.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds each endpoint is loaded for, on each server.",
+        )
+        parser.add_argument(
+            "--report",
+            help="Path of the JSON report.",
+        )
+
+    def get_token(self, user):
+        token, created = Token.objects.get_or_create(user=user)
+        if not created and token_expired(token):
+            token.delete()
+            token = Token.objects.create(user=user)
+        return token
+
+    def get_paths(self, user, query):
+        return {
+            "feed": reverse("feed_endpoint"),
+            "discover": reverse("discover_endpoint"),
+            "search": f"{reverse('search_endpoint')}?{urlencode({'q': query})}",
+            "profile": reverse(
+                "profile_info_endpoint",
+                kwargs={"custom_slug_profile": user.profile.custom_slug_profile},
+            ),
+        }
+
+    def handle(self, *args, **options):
+        servers = {}
+        for server in options["servers"]:
+            name, _, base_url = server.partition("=")
+            if not base_url:
+                raise CommandError(f"Expected name=base_url, got {server!r}.")
+            servers[name] = base_url.rstrip("/")
+
+        endpoints = [name for name in options["endpoints"].split(",") if name]
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}.")
+
+        try:
+            user = User.objects.select_related("profile").get(
+                username=options["username"]
+            )
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} not found.")
+
+        headers = {"Authorization": f"Bearer {self.get_token(user)}"}
+        paths = self.get_paths(user, options["query"])
+
+        results = {}
+        for endpoint in endpoints:
+            for name, base_url in servers.items():
+                result = run_load(
+                    base_url + paths[endpoint],
+                    headers,
+                    options["concurrency"],
+                    options["duration"],
+                )
+                results.setdefault(endpoint, {})[name] = result
+                self.stdout.write(
+                    f"{endpoint:<10} {name:<10} "
+                    f"{result['requests_per_second']:>8} req/s  "
+                    f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  "
+                    f"{result['errors']} errors"
+                )
+
+        if options["report"]:
+            report = {
+                "concurrency": options["concurrency"],
+                "duration": options["duration"],
+                "servers": servers,
+                "endpoints": results,
+            }
+            with open(options["report"], "w") as report_file:
+                json.dump(report, report_file, indent=4)
+            self.stdout.write(f"Report written to {options['report']}")
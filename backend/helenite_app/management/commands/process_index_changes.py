@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from helenite_app.indexing import process_pending_changes
+
+
+class Command(BaseCommand):
+    """
+    Background worker that syncs the queued index changes with Algolia.
+    """
+
+    help = "Syncs the pending index changes with Algolia, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no pending changes instead of waiting for more.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Maximum amount of changes synced per batch.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling again when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_pending_changes(options["batch_size"])
+            total += processed
+            if processed:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(f"Processed {total} index changes.")
@@ -0,0 +1,40 @@
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+
+from helenite_app.models import FeedEvent
+from helenite_app.feed_sync import get_retention
+
+
+class Command(BaseCommand):
+    """
+    Removes the feed events older than `HELENITE_FEED_EVENTS_RETENTION` days.
+    Meant to be run periodically, e.g. daily.
+    """
+
+    help = "Removes the feed events older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Amount of events removed per statement.",
+        )
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - get_retention()
+        total = 0
+        while True:
+            # Events are removed in batches, so each statement only locks a
+            # bounded amount of rows.
+            ids = list(
+                FeedEvent.objects.filter(event_created_at__lt=threshold)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not ids:
+                break
+
+            total += FeedEvent.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(f"Removed {total} feed events.")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from helenite_app.models import Post
+
+
+class Command(BaseCommand):
+    """
+    Repairs the like and comment counters of the posts, recomputing them from the
+    actual rows.
+    """
+
+    help = "Recomputes the like and comment counters of every post."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Amount of posts updated per statement.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = 0
+        total = 0
+        while True:
+            # Posts are updated in primary key ranges, so each statement only
+            # locks a bounded amount of rows.
+            ids = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            total += Post.objects.filter(pk__gte=ids[0], pk__lte=ids[-1]).recount()
+            last_id = ids[-1]
+
+        self.stdout.write(f"Recounted {total} posts.")
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.6 on 2026-10-18 08:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_timelines(apps, schema_editor):
+    """
+    Materializes the timelines for the posts that already exist.
+    """
+
+    Post = apps.get_model("helenite_app", "Post")
+    Profile = apps.get_model("helenite_app", "Profile")
+    TimelineEntry = apps.get_model("helenite_app", "TimelineEntry")
+
+    friends_of = {}
+    for profile in Profile.objects.prefetch_related("friends"):
+        friends_of[profile.user_id] = [
+            friend.user_id for friend in profile.friends.all()
+        ]
+
+    batch = []
+    posts = Post.objects.values_list(
+        "id", "post_parent_user_id", "post_publication_date"
+    )
+    for post_id, author_id, publication_date in posts.iterator():
+        for owner_id in [author_id] + friends_of.get(author_id, []):
+            batch.append(
+                TimelineEntry(
+                    entry_owner_id=owner_id,
+                    entry_post_id=post_id,
+                    entry_publication_date=publication_date,
+                )
+            )
+        if len(batch) >= 500:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("helenite_app", "0002_friendrequest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimelineEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("entry_publication_date", models.DateTimeField()),
+                (
+                    "entry_owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "entry_post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to="helenite_app.post",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "entry_owner",
+                            "-entry_publication_date",
+                            "-entry_post",
+                        ],
+                        name="timeline_owner_date_idx",
+                    )
+                ],
+                "unique_together": {("entry_owner", "entry_post")},
+            },
+        ),
+        migrations.RunPython(build_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import migrations
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+
+
+# The GIN indexes used by `PostgresSearchBackend`, as (model, index) pairs: one
+# over the local fields of each searchable model, and one over the usernames. The
+# backend has to keep querying these exact expressions for Postgres to use them.
+SEARCH_INDEXES = [
+    (
+        "helenite_app.Profile",
+        GinIndex(
+            SearchVector(
+                "custom_slug_profile", "first_name", "last_name", config="simple"
+            ),
+            name="profile_search_vector_gin",
+        ),
+    ),
+    (
+        "helenite_app.Post",
+        GinIndex(
+            SearchVector("post_text", config="simple"),
+            name="post_search_vector_gin",
+        ),
+    ),
+    (
+        settings.AUTH_USER_MODEL,
+        GinIndex(
+            SearchVector("username", config="simple"),
+            name="user_search_vector_gin",
+        ),
+    ),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    Creates the GIN indexes used by `PostgresSearchBackend`. Other databases have
+    no full-text search, so nothing is done there.
+    """
+
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for label, index in SEARCH_INDEXES:
+        schema_editor.add_index(apps.get_model(label), index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for label, index in SEARCH_INDEXES:
+        schema_editor.remove_index(apps.get_model(label), index)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("helenite_app", "0003_timelineentry"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.6 on 2026-10-18 08:14
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("helenite_app", "0004_search_gin_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("change_model", models.CharField(max_length=100)),
+                ("change_object_id", models.BigIntegerField()),
+                ("change_created_at", models.DateTimeField(auto_now_add=True)),
+                ("change_attempts", models.PositiveIntegerField(default=0)),
+                (
+                    "change_available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["change_available_at", "id"],
+                        name="index_change_available_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.6 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("helenite_app", "0005_indexchange"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("checkpoint_model", models.CharField(max_length=100, unique=True)),
+                ("checkpoint_last_id", models.BigIntegerField(default=0)),
+                ("checkpoint_updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.6 on 2026-10-18 08:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_likes_and_comments(apps, schema_editor):
+    """
+    Fills the counters of the posts that already exist.
+    """
+
+    Post = apps.get_model("helenite_app", "Post")
+    Like = apps.get_model("helenite_app", "Like")
+    Comment = apps.get_model("helenite_app", "Comment")
+
+    likes = (
+        Like.objects.filter(like_parent_post=OuterRef("pk"))
+        .values("like_parent_post")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    comments = (
+        Comment.objects.filter(comment_parent_post=OuterRef("pk"))
+        .values("comment_parent_post")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    Post.objects.update(
+        post_like_count=Coalesce(Subquery(likes), 0),
+        post_comment_count=Coalesce(Subquery(comments), 0),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("helenite_app", "0006_indexcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="post_comment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="post_like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_likes_and_comments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.6 on 2026-10-18 08:22
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_friend_requests(apps, schema_editor):
+    """
+    Keeps only the oldest request for each pair of users, so the unique
+    constraint can be created.
+    """
+
+    FriendRequest = apps.get_model("helenite_app", "FriendRequest")
+
+    oldest = (
+        FriendRequest.objects.values("request_made_by", "request_sent_to")
+        .annotate(oldest_id=Min("id"))
+        .values_list("oldest_id", flat=True)
+    )
+    FriendRequest.objects.exclude(id__in=list(oldest)).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("helenite_app", "0007_post_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["comment_parent_post", "comment_publication_date", "id"],
+                name="comment_post_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["post_parent_user", "-post_publication_date", "-id"],
+                name="post_user_date_idx",
+            ),
+        ),
+        migrations.RunPython(
+            remove_duplicate_friend_requests, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="friendrequest",
+            constraint=models.UniqueConstraint(
+                fields=("request_made_by", "request_sent_to"),
+                name="unique_friend_request",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.6 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("helenite_app", "0008_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "event_kind",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                        ],
+                        max_length=7,
+                    ),
+                ),
+                ("event_post_id", models.BigIntegerField()),
+                (
+                    "event_post_slug",
+                    models.SlugField(blank=True, max_length=15, null=True),
+                ),
+                ("event_author_id", models.BigIntegerField()),
+                ("event_created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["event_author_id", "id"], name="feed_event_author_idx"
+                    ),
+                    models.Index(
+                        fields=["event_created_at"], name="feed_event_created_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -1,9 +1,11 @@
 import random
 import string
 
-from django.db import models
+from django.db import models, connections, transaction
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
+from django.db.models.functions import Coalesce
 from django.forms import ValidationError
 from django.contrib.auth.models import User
 
@@ -41,10 +43,37 @@ class Profile(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} (@{self.user.username})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Keeps the values loaded from the database, so changes can be detected on
+        save.
+        """
+
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
+    def get_changed_fields(self):
+        """
+        Returns the names of the fields changed since the profile was loaded from
+        the database. For new profiles, all fields are considered changed.
+        """
+
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return {field.attname for field in self._meta.concrete_fields}
+        return {name for name, value in loaded.items() if getattr(self, name) != value}
+
     def save(self, **kwargs):
         """
         Provides an automatic slug based on username as well as a default profile
-        picture.
+        picture. The fields changed by the save are available on `changed_fields`
+        afterwards.
         """
 
         if not self.custom_slug_profile:
@@ -58,7 +87,16 @@ class Profile(models.Model):
 
         if not self.pfp:
             self.pfp = "profile_pictures/default_pfp.png"
-        super().save(**kwargs)
+
+        self.changed_fields = self.get_changed_fields()
+        # The post_save handlers queue the index changes, which must be committed
+        # (or rolled back) together with the profile.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(**kwargs)
+        self._loaded_values = {
+            field.attname: field.value_from_object(self)
+            for field in self._meta.concrete_fields
+        }
 
     def is_public(self) -> bool:
         """
@@ -113,6 +151,14 @@ class FriendRequest(models.Model):
     request_id = models.CharField(max_length=5, null=False, blank=False)
     accepted = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["request_made_by", "request_sent_to"],
+                name="unique_friend_request",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.request_made_by} -> {self.request_sent_to} (status: {'accepted' if self.accepted else 'pending'})"
 
@@ -127,6 +173,35 @@ class FriendRequest(models.Model):
         super().save(**kwargs)
 
 
+class PostQuerySet(models.QuerySet):
+    """
+    Maintains the denormalized counters of the posts in bulk.
+    """
+
+    def recount(self):
+        """
+        Recomputes the like and comment counters of the posts with a single
+        set-based UPDATE, for when they drifted from the actual rows.
+        """
+
+        likes = (
+            Like.objects.filter(like_parent_post=models.OuterRef("pk"))
+            .values("like_parent_post")
+            .annotate(total=models.Count("*"))
+            .values("total")
+        )
+        comments = (
+            Comment.objects.filter(comment_parent_post=models.OuterRef("pk"))
+            .values("comment_parent_post")
+            .annotate(total=models.Count("*"))
+            .values("total")
+        )
+        return self.update(
+            post_like_count=Coalesce(models.Subquery(likes), 0),
+            post_comment_count=Coalesce(models.Subquery(comments), 0),
+        )
+
+
 class Post(models.Model):
     """
     Represents a post object.
@@ -137,7 +212,11 @@ class Post(models.Model):
         post_image: the image content of the post (can be blank);
         post_publication_date: auto generated publication date for post;
         post_slug: slug for post;
-        post_likes: many-to-many relation to ``Like`` model.
+        post_likes: many-to-many relation to ``Like`` model;
+        post_like_count: how many likes the post has (kept up to date on every
+        like and unlike);
+        post_comment_count: how many comments the post has (kept up to date on
+        every new and deleted comment).
     """
 
     post_parent_user = models.ForeignKey(
@@ -150,6 +229,22 @@ class Post(models.Model):
     post_likes = models.ManyToManyField(
         User, through="Like", related_name="liked_posts"
     )
+    post_like_count = models.PositiveIntegerField(default=0)
+    post_comment_count = models.PositiveIntegerField(default=0)
+
+    # Only changed through ``F()`` updates (see signals and likes), never by saves.
+    COUNTER_FIELDS = ("post_like_count", "post_comment_count")
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Posts of a single profile, newest first (profile pages).
+            models.Index(
+                fields=["post_parent_user", "-post_publication_date", "-id"],
+                name="post_user_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.post_text[:16]}... - by {self.post_parent_user.username}"
@@ -165,7 +260,9 @@ class Post(models.Model):
         """
         Provides an automatic slug generator for posts based on username and
         random string, as well as guarantees that either an image or a text is
-        present on the instance before saving
+        present on the instance before saving. Updates leave the counters out
+        unless they're listed on ``update_fields``, so a stale instance doesn't
+        overwrite the likes and comments made since it was loaded.
         """
 
         if not self.post_text and not self.post_image:
@@ -176,7 +273,22 @@ class Post(models.Model):
                 random.SystemRandom().choice(string.ascii_uppercase + string.digits)
                 for _ in range(14)
             )
-        super().save(**kwargs)
+
+        created = self.pk is None
+        updating = not self._state.adding and not kwargs.get("force_insert")
+        if updating and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        # The post_save handlers queue the index change and log the feed event,
+        # which must be committed (or rolled back) together with the post.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(**kwargs)
+
+            if created:
+                TimelineEntry.objects.fan_out(self)
 
     def get_absolute_url(self):
         """
@@ -243,6 +355,15 @@ class Comment(models.Model):
     comment_text = models.TextField(max_length=500, null=False, blank=False)
     comment_publication_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Comments of a single post, oldest first.
+            models.Index(
+                fields=["comment_parent_post", "comment_publication_date", "id"],
+                name="comment_post_date_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.comment_text[:16]}... - by: {self.comment_user.username}, in {self.comment_parent_post.post_parent_user.username}"
 
@@ -251,3 +372,308 @@ class Comment(models.Model):
             raise ValidationError("You can't create a comment with no text.")
 
         super().save(**kwargs)
+
+
+class TimelineEntryManager(models.Manager):
+    """
+    Keeps the materialized timelines up to date.
+    """
+
+    def fan_out(self, post):
+        """
+        Pushes a new post to the timeline of its author and of every friend of
+        the author.
+
+        Args:
+            - post: the freshly created ``Post``.
+        """
+
+        author_id = post.post_parent_user_id
+        owners = [author_id] + list(
+            Profile.objects.filter(friends__user_id=author_id).values_list(
+                "user_id", flat=True
+            )
+        )
+        self.bulk_create(
+            [
+                self.model(
+                    entry_owner_id=owner_id,
+                    entry_post=post,
+                    entry_publication_date=post.post_publication_date,
+                )
+                for owner_id in owners
+            ],
+            ignore_conflicts=True,
+        )
+
+    def backfill(self, owner, author, batch_size=500):
+        """
+        Copies every post made by ``author`` into the timeline of ``owner``. Used
+        when a new friendship is created.
+
+        Args:
+            - owner: the ``User`` whose timeline will receive the posts;
+            - author: the ``User`` whose posts will be copied;
+            - batch_size: how many entries are written per INSERT.
+        """
+
+        posts = Post.objects.filter(post_parent_user=author).values_list(
+            "id", "post_publication_date"
+        )
+        batch = []
+        for post_id, publication_date in posts.iterator(chunk_size=batch_size):
+            batch.append(
+                self.model(
+                    entry_owner=owner,
+                    entry_post_id=post_id,
+                    entry_publication_date=publication_date,
+                )
+            )
+            if len(batch) >= batch_size:
+                self.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            self.bulk_create(batch, ignore_conflicts=True)
+
+
+class TimelineEntry(models.Model):
+    """
+    Represents a post on the materialized feed of a given user. Entries are
+    written when a post is created (fan-out on write) and when a friendship is
+    accepted, so reading the feed is a single range scan over
+    (``entry_owner``, ``entry_publication_date``).
+
+    Attributes:
+        entry_owner: the ``User`` whose feed contains the post;
+        entry_post: the ``Post`` on the feed;
+        entry_publication_date: copy of ``Post.post_publication_date`` used for
+        ordering.
+    """
+
+    entry_owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline"
+    )
+    entry_post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    entry_publication_date = models.DateTimeField()
+
+    objects = TimelineEntryManager()
+
+    class Meta:
+        unique_together = (
+            "entry_owner",
+            "entry_post",
+        )
+        indexes = [
+            models.Index(
+                fields=["entry_owner", "-entry_publication_date", "-entry_post"],
+                name="timeline_owner_date_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.entry_post.post_slug} on the feed of {self.entry_owner.username}"
+
+
+class IndexChangeManager(models.Manager):
+    """
+    Records the objects whose search index records are out of date.
+    """
+
+    def record(self, instance):
+        """
+        Queues an instance of an indexed model to be synced with the search index.
+        Meant to be called from the same transaction that changed the instance, so
+        the change and its record are committed (or rolled back) together.
+
+        Args:
+            - instance: the ``Profile`` or ``Post`` that was saved or deleted.
+        """
+
+        return self.create(
+            change_model=instance._meta.label_lower, change_object_id=instance.pk
+        )
+
+    def record_queryset(self, queryset):
+        """
+        Queues every object of a queryset with a single ``INSERT ... SELECT``, so
+        the objects are never loaded nor saved one by one.
+
+        Args:
+            - queryset: the objects whose index records are out of date.
+        """
+
+        now = timezone.now()
+        columns = {
+            "change_model": models.Value(queryset.model._meta.label_lower),
+            "change_created_at": models.Value(now),
+            "change_attempts": models.Value(0),
+            "change_available_at": models.Value(now),
+        }
+        select = queryset.annotate(**columns).values_list("pk", *columns)
+        sql, params = select.query.get_compiler(using=queryset.db).as_sql()
+
+        connection = connections[queryset.db]
+        names = [
+            connection.ops.quote_name(name) for name in ["change_object_id", *columns]
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {connection.ops.quote_name(self.model._meta.db_table)} "
+                f"({', '.join(names)}) {sql}",
+                params,
+            )
+            return cursor.rowcount
+
+
+class IndexChange(models.Model):
+    """
+    Represents a pending change to the search index (transactional outbox).
+
+    Changes are written alongside the saves and deletes of indexed models and
+    consumed in batches by the ``process_index_changes`` command, so requests
+    never wait on the search provider.
+
+    Attributes:
+        change_model: the label of the model that changed (e.g. "helenite_app.post");
+        change_object_id: the primary key of the object that changed;
+        change_created_at: the time the change was recorded;
+        change_attempts: how many times syncing the change failed;
+        change_available_at: the time from which the change can be processed
+        (pushed back after every failure).
+    """
+
+    change_model = models.CharField(max_length=100)
+    change_object_id = models.BigIntegerField()
+    change_created_at = models.DateTimeField(auto_now_add=True)
+    change_attempts = models.PositiveIntegerField(default=0)
+    change_available_at = models.DateTimeField(default=timezone.now)
+
+    objects = IndexChangeManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["change_available_at", "id"],
+                name="index_change_available_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.change_model} #{self.change_object_id} (attempts: {self.change_attempts})"
+
+
+class IndexCheckpoint(models.Model):
+    """
+    Represents how far the ``incremental_reindex`` command got for a given model.
+
+    Rows are sent in primary key order, so everything up to ``checkpoint_last_id``
+    is known to be on the index and later runs only send newer rows. Changes to
+    older rows are synced through ``IndexChange``.
+
+    Attributes:
+        checkpoint_model: the label of the indexed model (e.g. "helenite_app.post");
+        checkpoint_last_id: the primary key of the last row sent to the index;
+        checkpoint_updated_at: the last time the checkpoint moved.
+    """
+
+    checkpoint_model = models.CharField(max_length=100, unique=True)
+    checkpoint_last_id = models.BigIntegerField(default=0)
+    checkpoint_updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.checkpoint_model} up to #{self.checkpoint_last_id}"
+
+
+class FeedEventManager(models.Manager):
+    """
+    Records the changes to posts that feed clients sync incrementally.
+    """
+
+    def record(self, kind, post_id, author_id, post_slug=None):
+        """
+        Logs a change to a post. Meant to be called from the same transaction that
+        changed the post.
+
+        Args:
+            - kind: `FeedEvent.CREATED`, `FeedEvent.UPDATED` or `FeedEvent.DELETED`;
+            - post_id: the id of the post;
+            - author_id: the id of the author, or an expression selecting it;
+            - post_slug: the slug of the post, kept for the deleted ones.
+        """
+
+        return self.create(
+            event_kind=kind,
+            event_post_id=post_id,
+            event_author_id=author_id,
+            event_post_slug=post_slug,
+        )
+
+    def record_updates(self, posts):
+        """
+        Logs that the counters of many posts changed, with a single INSERT.
+
+        Args:
+            - posts: (post id, author id) pairs.
+        """
+
+        return self.bulk_create(
+            [
+                self.model(
+                    event_kind=self.model.UPDATED,
+                    event_post_id=post_id,
+                    event_author_id=author_id,
+                )
+                for post_id, author_id in posts
+            ]
+        )
+
+
+class FeedEvent(models.Model):
+    """
+    Represents a change to a post on the change log read by the feed sync
+    endpoint: a new post, a post whose counters changed, or a deleted post.
+
+    Events are only appended, and their ids are the positions clients sync from.
+    They're kept for `HELENITE_FEED_EVENTS_RETENTION` days (see the
+    ``prune_feed_events`` command).
+
+    Attributes:
+        event_kind: what happened to the post;
+        event_post_id: the id of the post (not a foreign key, since the events of
+        deleted posts are kept);
+        event_post_slug: the slug of the post, for the deleted ones;
+        event_author_id: the id of the author of the post, used to find the feeds
+        the post is on;
+        event_created_at: the time the change happened.
+    """
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    KINDS = [
+        (CREATED, "Created"),
+        (UPDATED, "Updated"),
+        (DELETED, "Deleted"),
+    ]
+
+    event_kind = models.CharField(max_length=7, choices=KINDS)
+    event_post_id = models.BigIntegerField()
+    event_post_slug = models.SlugField(max_length=15, null=True, blank=True)
+    event_author_id = models.BigIntegerField()
+    event_created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = FeedEventManager()
+
+    class Meta:
+        indexes = [
+            # Events on the feed of a user: the posts of the user and friends.
+            models.Index(
+                fields=["event_author_id", "id"], name="feed_event_author_idx"
+            ),
+            models.Index(fields=["event_created_at"], name="feed_event_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Post #{self.event_post_id} {self.event_kind}"
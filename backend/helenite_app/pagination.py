@@ -0,0 +1,174 @@
+import json
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (a.k.a. seek) pagination over a (date, id) pair.
+
+    Instead of an offset, every page ends with an opaque cursor holding the date
+    and id of its last row. The next page is then fetched with a
+    ``(date, id) < (cursor_date, cursor_id)`` condition, so its cost doesn't
+    depend on how deep the user scrolled and rows inserted in the meantime
+    don't shift the pages.
+
+    The ordering defaults to newest posts first and can be overridden by setting
+    ``keyset_ordering`` on the view. Both fields must be attributes of the
+    paginated objects and share the same direction.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+    ordering = ("-post_publication_date", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = getattr(view, "keyset_ordering", self.ordering)
+        self.page_size = getattr(view, "keyset_page_size", self.page_size)
+
+        return self.paginate(queryset, self.decode_cursor(request))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async variant of ``paginate_queryset``, reading the page through Django's
+        async ORM interface.
+        """
+
+        self.request = request
+        self.ordering = getattr(view, "keyset_ordering", self.ordering)
+        self.page_size = getattr(view, "keyset_page_size", self.page_size)
+
+        queryset = self.get_page_queryset(queryset, self.decode_cursor(request))
+        return self.set_page([obj async for obj in queryset])
+
+    def paginate(self, queryset, cursor=None):
+        """
+        Returns the page after the cursor and keeps track of the next one. Can be
+        used outside of a view, e.g. to embed the first page of a listing on
+        another response.
+
+        Args:
+            - queryset: the queryset to paginate;
+            - cursor: a (date, id) tuple or None for the first page.
+        """
+
+        return self.set_page(self.get_page(queryset, cursor))
+
+    def set_page(self, page):
+        self.has_next = len(page) > self.page_size
+        self.page = page[: self.page_size]
+        return self.page
+
+    def get_page(self, queryset, cursor):
+        """
+        Returns up to ``page_size + 1`` objects after the cursor, the extra one
+        being used to know if there's a next page.
+
+        Args:
+            - queryset: the queryset to paginate;
+            - cursor: a (date, id) tuple or None for the first page.
+        """
+
+        return list(self.get_page_queryset(queryset, cursor))
+
+    def get_page_queryset(self, queryset, cursor):
+        """
+        Returns the (unevaluated) queryset behind `get_page`.
+
+        Args:
+            - queryset: the queryset to paginate;
+            - cursor: a (date, id) tuple or None for the first page.
+        """
+
+        date_field, id_field = (field.lstrip("-") for field in self.ordering)
+        queryset = queryset.order_by(*self.ordering)
+
+        if cursor is not None:
+            date, pk = cursor
+            lookup = "lt" if self.ordering[0].startswith("-") else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{date_field}__{lookup}": date})
+                | Q(**{date_field: date, f"{id_field}__{lookup}": pk})
+            )
+
+        return queryset[: self.page_size + 1]
+
+    def get_next_cursor(self):
+        """
+        Returns the cursor pointing after the last object of the current page, or
+        None if this is the last page.
+        """
+
+        if not self.has_next:
+            return None
+
+        date_field, id_field = (field.lstrip("-") for field in self.ordering)
+        last = self.page[-1]
+        return self.encode_cursor(getattr(last, date_field), getattr(last, id_field))
+
+    def get_next_link(self):
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def encode_cursor(self, date, pk):
+        """
+        Encodes a position as an opaque, URL-safe string.
+
+        Args:
+            - date: the date of the last object on the page;
+            - pk: the id of the last object on the page.
+        """
+
+        raw = json.dumps([date.isoformat(), pk]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def decode_cursor(self, request):
+        """
+        Returns the (date, id) position provided by the client, if any.
+
+        Args:
+            - request: the current request.
+        """
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii"))
+            date, pk = json.loads(raw)
+            date = parse_datetime(date)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return date, pk
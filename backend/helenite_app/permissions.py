@@ -1,19 +1,26 @@
-from datetime import timedelta
-from django.utils import timezone
 from rest_framework import permissions
 from rest_framework.authtoken.models import Token
 
+from helenite_app.authentication import token_expired
+
 
 class TokenAgePermission(permissions.BasePermission):
     """
     Checks that the token age is less than 7 days.
+
+    Reuses the token loaded by `TokenAuthentication` when there is one, and only
+    queries it for other authentication methods.
     """
 
     def has_permission(self, request, view):
         if request.user.is_authenticated:
+            token = getattr(request, "auth", None)
+            if isinstance(token, Token):
+                return not token_expired(token)
+
             try:
                 token = Token.objects.get(user=request.user)
-                if (timezone.now() - token.created) > timedelta(days=7):
+                if token_expired(token):
                     return False
 
                 return True
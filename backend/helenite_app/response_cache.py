@@ -0,0 +1,243 @@
+import time
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+from django.core.cache import cache
+from django.utils.http import http_date, quote_etag
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from helenite_app.models import Post
+
+
+VERSION_CACHE_PREFIX = "helenite:version:"
+RESPONSE_CACHE_PREFIX = "helenite:response:"
+
+
+def _version_key(kind, pk):
+    return f"{VERSION_CACHE_PREFIX}{kind}:{pk}"
+
+
+def get_version_timeout():
+    """
+    Returns for how many seconds versions are kept, at least twice as long as the
+    responses cached under them (see `HELENITE_RESPONSE_VERSION_TIMEOUT`). A
+    version that expired is just a miss, of the cached responses and of the ETags.
+    """
+
+    return max(
+        getattr(settings, "HELENITE_RESPONSE_VERSION_TIMEOUT", 60 * 60),
+        2 * getattr(settings, "HELENITE_RESPONSE_CACHE_TIMEOUT", 300),
+    )
+
+
+def _new_versions(keys):
+    return {key: time.time_ns() for key in keys}
+
+
+def get_versions(*objects):
+    """
+    Returns the current version of each given object, with a single cache read
+    (and a single write for the versions the cache doesn't know).
+
+    A version is the time (in nanoseconds) of the last change of the object, or
+    of the first read if the cache doesn't know it, so a version that expired
+    never matches a response cached before.
+
+    Args:
+        - objects: (kind, pk) pairs, e.g. ("post", 1), ("profile", user_id) or
+        ("feed", user_id).
+    """
+
+    keys = [_version_key(kind, pk) for kind, pk in objects]
+    versions = cache.get_many(keys)
+    missing = _new_versions(key for key in keys if key not in versions)
+    if missing:
+        # Concurrent misses each write their own version and the last one wins:
+        # the responses cached under the others are just missed.
+        cache.set_many(missing, get_version_timeout())
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(*objects):
+    """
+    Async variant of `get_versions`.
+    """
+
+    keys = [_version_key(kind, pk) for kind, pk in objects]
+    versions = await cache.aget_many(keys)
+    missing = _new_versions(key for key in keys if key not in versions)
+    if missing:
+        await cache.aset_many(missing, get_version_timeout())
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _touch(key):
+    cache.set(key, time.time_ns(), get_version_timeout())
+
+
+def bump_version(kind, pk):
+    """
+    Moves the version of an object forward, so every response cached for the
+    previous one stops being used.
+
+    The version is bumped right away and once more when the transaction commits,
+    since a request reading in the meantime caches the data from before the
+    change under the new version.
+
+    Args:
+        - kind: "post", "profile" or "feed";
+        - pk: the id of the post, or of the user owning the profile or feed.
+    """
+
+    key = _version_key(kind, pk)
+    _touch(key)
+    transaction.on_commit(lambda: _touch(key))
+
+
+def bump_profile(user_id):
+    """
+    Invalidates the cached representation of a profile.
+
+    Args:
+        - user_id: the id of the user owning the profile.
+    """
+
+    bump_version("profile", user_id)
+
+
+def bump_feeds(user_ids):
+    """
+    Invalidates the validators of the feeds of the given users, for the changes
+    that don't touch the posts left on them (e.g. a post removed from the feed).
+
+    Args:
+        - user_ids: the ids of the users owning the feeds.
+    """
+
+    for user_id in user_ids:
+        bump_version("feed", user_id)
+
+
+def bump_post(post_id, author_id=None):
+    """
+    Invalidates the cached representation of a post, and of the profile of its
+    author (which embeds the post).
+
+    Args:
+        - post_id: the id of the post;
+        - author_id: the id of the author, looked up when not given.
+    """
+
+    if author_id is None:
+        author_id = (
+            Post.objects.filter(pk=post_id)
+            .values_list("post_parent_user_id", flat=True)
+            .first()
+        )
+    bump_version("post", post_id)
+    if author_id is not None:
+        bump_profile(author_id)
+
+
+def get_or_set(name, versions, build):
+    """
+    Returns the cached representation stored under ``name`` for the given
+    versions, building and storing it on a miss. Representations are kept for
+    `HELENITE_RESPONSE_CACHE_TIMEOUT` seconds, and always built when it's 0.
+
+    Args:
+        - name: identifies the representation, e.g. the URL of the response;
+        - versions: the versions of every object the representation reads from;
+        - build: a function returning the representation.
+    """
+
+    timeout = getattr(settings, "HELENITE_RESPONSE_CACHE_TIMEOUT", 300)
+    if not timeout:
+        return build()
+
+    key = f"{RESPONSE_CACHE_PREFIX}{name}:" + ":".join(map(str, versions))
+    representation = cache.get(key)
+    if representation is None:
+        representation = build()
+        cache.set(key, representation, timeout)
+    return representation
+
+
+async def aget_or_set(name, versions, build):
+    """
+    Async variant of `get_or_set`, where ``build`` is a coroutine function.
+    """
+
+    timeout = getattr(settings, "HELENITE_RESPONSE_CACHE_TIMEOUT", 300)
+    if not timeout:
+        return await build()
+
+    key = f"{RESPONSE_CACHE_PREFIX}{name}:" + ":".join(map(str, versions))
+    representation = await cache.aget(key)
+    if representation is None:
+        representation = await build()
+        await cache.aset(key, representation, timeout)
+    return representation
+
+
+def get_validators(versions, *extra):
+    """
+    Returns the ETag and Last-Modified validators (as a timestamp) of a response
+    built from the objects with the given versions.
+
+    Args:
+        - versions: the versions of every object the response reads from;
+        - extra: anything else the response depends on, e.g. the requesting user.
+    """
+
+    digest = hashlib.md5(
+        ":".join(map(str, [*extra, *versions])).encode(), usedforsecurity=False
+    ).hexdigest()
+    return quote_etag(digest), max(versions) // 10**9
+
+
+def conditional_get(request, versions, get_response):
+    """
+    Answers a GET with "304 Not Modified" when the client already has the current
+    response, without building it. Otherwise, returns the response built by
+    ``get_response`` with its ETag and Last-Modified headers.
+
+    The validators are derived from the versions and the requesting user, so
+    checking them costs a cache read. The ETag is exact, while Last-Modified has
+    a one second resolution: clients should prefer If-None-Match.
+
+    Args:
+        - request: the current request;
+        - versions: the versions of every object the response reads from;
+        - get_response: a function building the full response.
+    """
+
+    etag, last_modified = get_validators(versions, request.user.pk)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = get_response()
+    return _set_validators(response, etag, last_modified)
+
+
+async def aconditional_get(request, versions, get_response):
+    """
+    Async variant of `conditional_get`, where ``get_response`` is a coroutine
+    function.
+    """
+
+    etag, last_modified = get_validators(versions, request.user.pk)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await get_response()
+    return _set_validators(response, etag, last_modified)
+
+
+def _set_validators(response, etag, last_modified):
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    # The responses depend on the user, and must be revalidated on every use.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,485 @@
+import re
+import time
+import bisect
+import threading
+
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+from helenite_app import client
+from helenite_app.models import Profile, Post
+
+
+class SearchableIndex:
+    """
+    Describes how a model is searched locally. Mirrors the registrations on
+    `helenite_app.index`: the same fields are searchable and only the rows
+    for which ``should_index`` ("is_public") is true are returned.
+
+    Attributes:
+        - model: the model being searched;
+        - fields: the lookups for the text fields of the index;
+        - public: the filter equivalent to the model's ``is_public``;
+        - vector_fields: the local columns used by the Postgres full-text index
+        (joined fields can't be part of an index);
+        - user_field: the relation to the ``User`` whose username is searched
+        (through its own index).
+    """
+
+    def __init__(self, model, fields, public, vector_fields, user_field):
+        self.model = model
+        self.fields = fields
+        self.public = public
+        self.vector_fields = vector_fields
+        self.user_field = user_field
+
+    def get_queryset(self):
+        related = {field.rsplit("__", 1)[0] for field in self.fields if "__" in field}
+        return self.model.objects.filter(self.public).select_related(*related)
+
+
+INDEXES = {
+    "Helenite_Profile": SearchableIndex(
+        model=Profile,
+        fields=("user__username", "custom_slug_profile", "first_name", "last_name"),
+        public=Q(private_profile=False),
+        vector_fields=("custom_slug_profile", "first_name", "last_name"),
+        user_field="user",
+    ),
+    "Helenite_Post": SearchableIndex(
+        model=Post,
+        fields=("post_parent_user__username", "post_text"),
+        public=Q(post_parent_user__profile__private_profile=False),
+        vector_fields=("post_text",),
+        user_field="post_parent_user",
+    ),
+}
+
+SEARCH_CONFIG = "simple"
+
+
+def search_vector(*fields):
+    """
+    Returns the full-text vector of the given fields, as searched by
+    `PostgresSearchBackend`. It must stay the expression of the GIN indexes
+    created by ``0004_search_gin_indexes``, since Postgres only uses an
+    expression index for the exact same expression.
+
+    Args:
+        - fields: the columns (or lookups, outside of indexes) of the vector.
+    """
+
+    return SearchVector(*fields, config=SEARCH_CONFIG)
+
+
+def tokenize(text):
+    """
+    Splits a text into lowercase words.
+
+    Args:
+        - text: the text to be split.
+    """
+
+    return re.findall(r"\w+", str(text or "").lower())
+
+
+class BaseSearchBackend:
+    """
+    Interface for the search backends used by `SearchListView`.
+
+    ``search`` returns the same shape as the Algolia API: a dictionary with a
+    "hits" list, each hit holding at least the "endpoint" of the object, ordered
+    by relevance.
+    """
+
+    hits_per_page = 20
+
+    def search(self, query, index_name):
+        raise NotImplementedError
+
+    async def asearch(self, query, index_name):
+        """
+        Async variant of ``search``. Runs ``search`` on the thread of the request
+        by default, since the local backends read the database.
+        """
+
+        return await sync_to_async(self.search)(query, index_name)
+
+    def update(self, instance):
+        """
+        Called after an instance of an indexed model is saved.
+        """
+
+    def remove(self, instance):
+        """
+        Called after an instance of an indexed model is deleted.
+        """
+
+
+class AlgoliaSearchBackend(BaseSearchBackend):
+    """
+    Searches on the Algolia servers through `helenite_app.client`.
+    """
+
+    def search(self, query, index_name):
+        return client.perform_search(query, index_name)
+
+    async def asearch(self, query, index_name):
+        return await client.aperform_search(query, index_name)
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Searches the database with Postgres full-text search, on the same fields as
+    the Algolia indexes. Every word of the query is matched as a prefix, and the
+    results are ranked with ``ts_rank``.
+
+    An object matches when every word is found on its local fields, or on the
+    username of its user. Each side goes through its own GIN index (see
+    ``0004_search_gin_indexes``), since an index can't span the join.
+    """
+
+    def get_queryset(self, terms, index_name):
+        """
+        Returns the objects matching every term, best ranked first.
+
+        Args:
+            - terms: the words of the query, as returned by `tokenize`;
+            - index_name: "Helenite_Profile" or "Helenite_Post".
+        """
+
+        spec = INDEXES[index_name]
+        search_query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            search_type="raw",
+            config=SEARCH_CONFIG,
+        )
+        matching = (
+            spec.model.objects.annotate(document=search_vector(*spec.vector_fields))
+            .filter(document=search_query)
+            .values("pk")
+        )
+        matching_users = (
+            User.objects.annotate(document=search_vector("username"))
+            .filter(document=search_query)
+            .values("pk")
+        )
+        rank = SearchRank(
+            search_vector(*spec.vector_fields, f"{spec.user_field}__username"),
+            search_query,
+        )
+        return (
+            spec.get_queryset()
+            .filter(
+                Q(pk__in=matching) | Q(**{f"{spec.user_field}__in": matching_users})
+            )
+            .annotate(rank=rank)
+            .order_by("-rank", "-pk")
+        )
+
+    def search(self, query, index_name):
+        terms = tokenize(query)
+        if not terms:
+            return {"hits": []}
+
+        queryset = self.get_queryset(terms, index_name)[: self.hits_per_page]
+        return {
+            "hits": [
+                {"objectID": str(obj.pk), "endpoint": obj.endpoint} for obj in queryset
+            ]
+        }
+
+
+class InMemorySearchBackend(BaseSearchBackend):
+    """
+    Keeps an inverted index of the public profiles and posts in the process
+    memory. Meant for development and test runs on SQLite, where there's no
+    full-text search and no network.
+
+    The index is built from the database on the first search and then kept up to
+    date by the ``post_save``/``post_delete`` signals. Every word of the query
+    must prefix a word of the object; exact words rank higher than prefixes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the index, so it will be rebuilt on the next search.
+        """
+
+        with self._lock:
+            self._built = False
+            self._documents = {name: {} for name in INDEXES}
+            self._postings = {name: {} for name in INDEXES}
+            self._vocabulary = {name: [] for name in INDEXES}
+
+    def _build(self):
+        for index_name, spec in INDEXES.items():
+            for obj in spec.get_queryset().iterator():
+                self._add(index_name, spec, obj)
+        self._built = True
+
+    def _add(self, index_name, spec, obj):
+        words = set()
+        for field in spec.fields:
+            value = obj
+            for attr in field.split("__"):
+                value = getattr(value, attr, None)
+            words.update(tokenize(value))
+
+        self._documents[index_name][obj.pk] = (obj.endpoint, words)
+        postings = self._postings[index_name]
+        for word in words:
+            if word not in postings:
+                postings[word] = set()
+                bisect.insort(self._vocabulary[index_name], word)
+            postings[word].add(obj.pk)
+
+    def _discard(self, index_name, pk):
+        document = self._documents[index_name].pop(pk, None)
+        if document is None:
+            return
+
+        postings = self._postings[index_name]
+        for word in document[1]:
+            postings[word].discard(pk)
+            if not postings[word]:
+                del postings[word]
+                vocabulary = self._vocabulary[index_name]
+                vocabulary.pop(bisect.bisect_left(vocabulary, word))
+
+    def _index_name_for(self, instance):
+        for index_name, spec in INDEXES.items():
+            if isinstance(instance, spec.model):
+                return index_name
+        return None
+
+    def update(self, instance):
+        index_name = self._index_name_for(instance)
+        if index_name is None:
+            return
+
+        with self._lock:
+            if not self._built:
+                return
+            self._discard(index_name, instance.pk)
+            try:
+                public = instance.is_public()
+            except ObjectDoesNotExist:
+                public = False
+            if public:
+                self._add(index_name, INDEXES[index_name], instance)
+
+        # The posts of a profile follow its privacy setting.
+        if isinstance(instance, Profile):
+            posts = Post.objects.filter(
+                post_parent_user_id=instance.user_id
+            ).select_related("post_parent_user__profile")
+            for post in posts:
+                self.update(post)
+
+    def remove(self, instance):
+        index_name = self._index_name_for(instance)
+        if index_name is None:
+            return
+
+        with self._lock:
+            if self._built:
+                self._discard(index_name, instance.pk)
+
+    def search(self, query, index_name):
+        terms = tokenize(query)
+        if not terms:
+            return {"hits": []}
+
+        with self._lock:
+            if not self._built:
+                self._build()
+
+            postings = self._postings[index_name]
+            vocabulary = self._vocabulary[index_name]
+            scores = None
+            for term in terms:
+                term_scores = {}
+                position = bisect.bisect_left(vocabulary, term)
+                while position < len(vocabulary) and vocabulary[position].startswith(
+                    term
+                ):
+                    word = vocabulary[position]
+                    weight = 2 if word == term else 1
+                    for pk in postings[word]:
+                        term_scores[pk] = max(term_scores.get(pk, 0), weight)
+                    position += 1
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        pk: score + term_scores[pk]
+                        for pk, score in scores.items()
+                        if pk in term_scores
+                    }
+
+            ranked = sorted(scores, key=lambda pk: (-scores[pk], -pk))
+            documents = self._documents[index_name]
+            return {
+                "hits": [
+                    {"objectID": str(pk), "endpoint": documents[pk][0]}
+                    for pk in ranked[: self.hits_per_page]
+                ]
+            }
+
+
+class SearchResultCache:
+    """
+    In-process LRU cache for search results, keyed by index and normalized query.
+
+    Entries expire after ``timeout`` seconds and the least recently used ones are
+    evicted beyond ``max_size``. Since every process has its own cache, the
+    timeout also bounds how stale another process may be after an invalidation.
+
+    Args:
+        - max_size: the maximum amount of cached queries;
+        - timeout: seconds an entry is valid for.
+    """
+
+    def __init__(self, max_size=1000, timeout=60):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(query):
+        """
+        Lowercases the query and collapses its whitespace.
+        """
+
+        return " ".join(str(query).lower().split())
+
+    def get(self, index_name, query):
+        key = (index_name, self.normalize(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, index_name, query, results):
+        key = (index_name, self.normalize(query))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, index_name):
+        """
+        Drops every cached query for the given index.
+
+        Args:
+            - index_name: the index whose results changed.
+        """
+
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == index_name]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the counters of the cache, for monitoring.
+        """
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+result_cache = SearchResultCache(
+    max_size=getattr(settings, "HELENITE_SEARCH_CACHE_SIZE", 1000),
+    timeout=getattr(settings, "HELENITE_SEARCH_CACHE_TIMEOUT", 60),
+)
+
+
+def perform_search(query, index_name):
+    """
+    Searches the given index through the configured backend, serving repeated
+    queries from `result_cache`.
+
+    Args:
+        - query: the query specified by the user;
+        - index_name: "Helenite_Profile" or "Helenite_Post".
+    """
+
+    results = result_cache.get(index_name, query)
+    if results is None:
+        results = get_search_backend().search(query, index_name)
+        result_cache.set(index_name, query, results)
+    return results
+
+
+async def aperform_search(query, index_name):
+    """
+    Async variant of `perform_search`, awaiting the backend through its
+    ``asearch`` method.
+
+    Args:
+        - query: the query specified by the user;
+        - index_name: "Helenite_Profile" or "Helenite_Post".
+    """
+
+    results = result_cache.get(index_name, query)
+    if results is None:
+        results = await get_search_backend().asearch(query, index_name)
+        result_cache.set(index_name, query, results)
+    return results
+
+
+_backends = {}
+
+
+def get_search_backend():
+    """
+    Returns the search backend configured on `HELENITE_SEARCH_BACKEND`. Backends
+    are instantiated once per process.
+    """
+
+    path = getattr(
+        settings,
+        "HELENITE_SEARCH_BACKEND",
+        "helenite_app.search.AlgoliaSearchBackend",
+    )
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
@@ -1,10 +1,36 @@
 import re
 
+from django.urls import reverse
+
 from rest_framework import serializers
+from rest_framework.utils.urls import replace_query_param
 
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.contrib.auth.models import User
 
-from helenite_app.models import Profile, FriendRequest, Post, Comment
+from helenite_app.likes import liked_post_ids
+from helenite_app.models import Profile, FriendRequest, Post, Comment, Like
+from helenite_app.pagination import KeysetPagination
+
+
+def to_shared_representation(serializer, instance):
+    """
+    Returns the representation of an instance without the fields depending on
+    the requesting user, which the serializers (and the ones they nest) skip
+    while "shared" is set on their context.
+
+    Args:
+        - serializer: the serializer representing the instance;
+        - instance: the object being represented.
+    """
+
+    serializer.context["shared"] = True
+    try:
+        return serializer.to_representation(instance)
+    finally:
+        del serializer.context["shared"]
 
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -33,6 +59,17 @@ class ProfileSerializer(serializers.ModelSerializer):
         ]
 
 
+class FeedListSerializer(serializers.ListSerializer):
+    """
+    Loads the likes of a whole page of posts at once before rendering them.
+    """
+
+    def to_representation(self, data):
+        posts = list(data.all() if hasattr(data, "all") else data)
+        self.child.load_likes(posts)
+        return super().to_representation(posts)
+
+
 class FeedSerializer(serializers.ModelSerializer):
     """
     This serializer is responsible for providing the posts for the feed.
@@ -45,12 +82,17 @@ class FeedSerializer(serializers.ModelSerializer):
         - post_image: the image associated with the post;
         - likes_count: the amount of likes on the post;
         - comments_count: the amount of comments on the post;
-        - likes: the usernames of the users who liked the post.
+        - likes: the usernames of the most recent users who liked the post (up to
+        `HELENITE_LIKES_PREVIEW_SIZE`, the full list has its own endpoint);
+        - liked_by_me: whether the requesting user liked the post.
     """
 
     likes = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    liked_by_me = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(source="post_like_count", read_only=True)
+    comments_count = serializers.IntegerField(
+        source="post_comment_count", read_only=True
+    )
 
     profile = ProfileSerializer(source="post_parent_user.profile")
 
@@ -65,25 +107,74 @@ class FeedSerializer(serializers.ModelSerializer):
             "likes_count",
             "comments_count",
             "likes",
+            "liked_by_me",
         ]
+        list_serializer_class = FeedListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Loads everything the serializer reads from the post itself in a single
+        query, by joining the author profiles. The counts are read from the post,
+        and the likes are loaded for the whole page by `load_likes`.
+
+        Args:
+            - queryset: a ``Post`` queryset.
+        """
+
+        return queryset.select_related("post_parent_user__profile")
+
+    def load_likes(self, posts):
+        """
+        Loads the preview of likers of every given post with a single windowed
+        query, and which of them the requesting user liked with another one.
+
+        Args:
+            - posts: the posts about to be rendered.
+        """
+
+        preview_size = getattr(settings, "HELENITE_LIKES_PREVIEW_SIZE", 3)
+        post_ids = [post.pk for post in posts]
+
+        likes = (
+            Like.objects.filter(like_parent_post_id__in=post_ids)
+            .annotate(
+                position=Window(
+                    RowNumber(),
+                    partition_by=F("like_parent_post"),
+                    order_by=F("id").desc(),
+                )
+            )
+            .filter(position__lte=preview_size)
+            .order_by("like_parent_post", "position")
+            .values_list("like_parent_post_id", "like_owner__username")
+        )
+        self._likes_preview = {post_id: [] for post_id in post_ids}
+        for post_id, username in likes:
+            self._likes_preview[post_id].append(username)
+
+        # The shared representations leave the likes of the requesting user out.
+        user = getattr(self.context.get("request"), "user", None)
+        if self.context.get("shared"):
+            user = None
+        self._liked_post_ids = liked_post_ids(user, post_ids)
 
     def get_likes(self, obj):
-        likes = obj.post_likes.all()
-        return [user.username for user in likes]
-
-    def get_likes_count(self, obj):
-        return obj.post_likes.count()
+        if obj.pk not in getattr(self, "_likes_preview", {}):
+            self.load_likes([obj])
+        return self._likes_preview[obj.pk]
 
-    def get_comments_count(self, post):
-        comments = Comment.objects.filter(comment_parent_post=post)
-        return comments.count()
+    def get_liked_by_me(self, obj):
+        if obj.pk not in getattr(self, "_likes_preview", {}):
+            self.load_likes([obj])
+        return obj.pk in self._liked_post_ids
 
 
 class FeedWithoutProfileInfoSerializer(FeedSerializer):
     """
     This serializer inherits from `FeedSerializer` and provides the same info,
-    but with no profile data they will already be on the post. Used exclusively
-    on `FeedForSingleProfileSerializer`.
+    but with no profile data they will already be on the post. Used for the posts
+    of a single profile.
 
     Fields:
         - post_publication_date: publication date for post;
@@ -92,7 +183,8 @@ class FeedWithoutProfileInfoSerializer(FeedSerializer):
         - post_image: the image associated with the post;
         - likes_count: the amount of likes on the post;
         - comments_count: the amount of comments on the post;
-        - likes: the usernames of the users who liked the post.
+        - likes: the usernames of the most recent users who liked the post;
+        - liked_by_me: whether the requesting user liked the post.
     """
 
     class Meta:
@@ -105,7 +197,9 @@ class FeedWithoutProfileInfoSerializer(FeedSerializer):
             "likes_count",
             "comments_count",
             "likes",
+            "liked_by_me",
         ]
+        list_serializer_class = FeedListSerializer
 
 
 class FriendRequestSerializer(serializers.ModelSerializer):
@@ -125,18 +219,19 @@ class FriendRequestSerializer(serializers.ModelSerializer):
 class FeedForSingleProfileSerializer(ProfileSerializer):
     """
     This serializer is responsible for providing the feed for the single profile
-    view, retrieving both profile info, as well as posts made by the user.
+    view, retrieving both profile info, as well as the first page of posts made
+    by the user.
 
     Fields:
         - profile: the profile info;
-        - posts: the posts made by the user through `FeedWithoutProfileInfoSerializer` (ready_only);
+        - posts: the most recent posts made by the user through `FeedWithoutProfileInfoSerializer` (ready_only);
+        - posts_next: the URL for the next page of posts, if there's one (read_only);
         - birthday: shows the birthday should the user allow on settings;
         - friend_requests: returns the requests associated with the account.
     """
 
-    posts = FeedWithoutProfileInfoSerializer(
-        many=True, source="user.created_posts", read_only=True
-    )
+    posts = serializers.SerializerMethodField()
+    posts_next = serializers.SerializerMethodField()
     birthday = serializers.SerializerMethodField()
     friend_requests = serializers.SerializerMethodField()
 
@@ -147,22 +242,105 @@ class FeedForSingleProfileSerializer(ProfileSerializer):
             "birth_place",
             "friend_requests",
             "posts",
+            "posts_next",
         ]
 
+    def get_posts_page(self, obj):
+        """
+        Returns the first page of posts alongside the cursor for the next one,
+        computed once per profile.
+        """
+
+        if getattr(self, "_posts_page", (None,))[0] != obj.pk:
+            queryset = FeedWithoutProfileInfoSerializer.setup_eager_loading(
+                Post.objects.filter(post_parent_user_id=obj.user_id)
+            )
+            paginator = KeysetPagination()
+            page = paginator.paginate(queryset)
+            self._posts_page = (obj.pk, page, paginator.get_next_cursor())
+        return self._posts_page[1:]
+
+    def get_posts(self, obj):
+        page, _ = self.get_posts_page(obj)
+        return FeedWithoutProfileInfoSerializer(
+            page, many=True, context=self.context
+        ).data
+
+    def get_posts_next(self, obj):
+        _, cursor = self.get_posts_page(obj)
+        if cursor is None:
+            return None
+
+        url = reverse(
+            "profile_posts_endpoint",
+            kwargs={"custom_slug_profile": obj.custom_slug_profile},
+        )
+        request = self.context.get("request")
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        return replace_query_param(url, KeysetPagination.cursor_query_param, cursor)
+
     def get_birthday(self, obj):
         if obj.show_birthday:
             return obj.birthday
         return None
 
     def get_friend_requests(self, obj):
+        return self.load_friend_requests(obj.user_id)
+
+    def load_friend_requests(self, user_id):
+        """
+        Returns the friend requests received by the user, if they're the one
+        requesting the profile.
+
+        Args:
+            - user_id: the id of the user owning the profile.
+        """
+
         user = self.context["request"].user
-        if user == obj.user:
-            friend_requests = FriendRequest.objects.filter(request_sent_to=obj.user)
+        if user.pk == user_id and not self.context.get("shared"):
+            friend_requests = FriendRequest.objects.filter(request_sent_to_id=user_id)
             serializer = FriendRequestSerializer(friend_requests, many=True)
             return serializer.data
         else:
             return None
 
+    def get_shared_representation(self, instance):
+        """
+        Returns the representation of the profile without the fields depending on
+        the requesting user, so it can be cached and shared between users. They're
+        filled in by `add_viewer_fields`.
+
+        Args:
+            - instance: the ``Profile`` being represented.
+        """
+
+        data = dict(to_shared_representation(self, instance))
+        page, _ = self.get_posts_page(instance)
+        return {
+            "data": data,
+            "user_id": instance.user_id,
+            "post_ids": [post.pk for post in page],
+        }
+
+    def add_viewer_fields(self, shared):
+        """
+        Completes a representation from `get_shared_representation` with the
+        friend requests and the liked posts of the requesting user.
+
+        Args:
+            - shared: the shared representation of the profile.
+        """
+
+        data = dict(shared["data"])
+        liked = liked_post_ids(self.context["request"].user, shared["post_ids"])
+        data["posts"] = [
+            dict(post, liked_by_me=post_id in liked)
+            for post, post_id in zip(data["posts"], shared["post_ids"])
+        ]
+        data["friend_requests"] = self.load_friend_requests(shared["user_id"])
+        return data
+
 
 class SinglePostSerializer(FeedSerializer):
     """
@@ -172,25 +350,125 @@ class SinglePostSerializer(FeedSerializer):
     Fields:
         - profile: the posts made by the user through `ProfileSerializer`;
         - post: the post itself through `FeedSerializer`;
-        - comments: the comments left on the post.
+        - comments: the oldest comments left on the post through `CommentSerializer`;
+        - comments_next: the URL for the next page of comments, if there's one.
     """
 
     comments = serializers.SerializerMethodField()
+    comments_next = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = FeedSerializer.Meta.fields + ["comments"]
+        fields = FeedSerializer.Meta.fields + ["comments", "comments_next"]
+
+    def get_comments_page(self, obj):
+        """
+        Returns the first page of comments alongside the cursor for the next one,
+        computed once per post.
+        """
+
+        if getattr(self, "_comments_page", (None,))[0] != obj.pk:
+            queryset = Comment.objects.filter(comment_parent_post=obj).select_related(
+                "comment_user"
+            )
+            paginator = KeysetPagination()
+            paginator.ordering = ("comment_publication_date", "id")
+            page = paginator.paginate(queryset)
+            self._comments_page = (obj.pk, page, paginator.get_next_cursor())
+        return self._comments_page[1:]
 
     def get_comments(self, obj):
-        comments = Comment.objects.filter(comment_parent_post=obj)
-        comment_data = [
-            {
-                "comment_text": comment.comment_text,
-                "comment_user": comment.comment_user.username,
-            }
-            for comment in comments
+        page, _ = self.get_comments_page(obj)
+        return CommentSerializer(page, many=True, context=self.context).data
+
+    def get_comments_next(self, obj):
+        _, cursor = self.get_comments_page(obj)
+        if cursor is None:
+            return None
+
+        url = reverse("post_comments_endpoint", kwargs={"post_slug": obj.post_slug})
+        request = self.context.get("request")
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        return replace_query_param(url, KeysetPagination.cursor_query_param, cursor)
+
+    def get_shared_representation(self, instance):
+        """
+        Returns the representation of the post without the fields depending on the
+        requesting user, so it can be cached and shared between users. They're
+        filled in by `add_viewer_fields`.
+
+        Args:
+            - instance: the ``Post`` being represented.
+        """
+
+        data = dict(to_shared_representation(self, instance))
+        data["liked_by_me"] = None
+        return {"data": data, "post_id": instance.pk}
+
+    def add_viewer_fields(self, shared):
+        """
+        Completes a representation from `get_shared_representation` with whether
+        the requesting user liked the post.
+
+        Args:
+            - shared: the shared representation of the post.
+        """
+
+        data = dict(shared["data"])
+        liked = liked_post_ids(self.context["request"].user, [shared["post_id"]])
+        data["liked_by_me"] = shared["post_id"] in liked
+        return data
+
+
+class CommentSerializer(serializers.ModelSerializer):
+    """
+    This serializer is responsible for displaying the comments left on a post.
+
+    Fields:
+        - comment_user: the username of the user who left the comment;
+        - comment_text: the text of the comment;
+        - comment_publication_date: when the comment was left.
+    """
+
+    comment_user = serializers.CharField(source="comment_user.username")
+
+    class Meta:
+        model = Comment
+        fields = [
+            "comment_user",
+            "comment_text",
+            "comment_publication_date",
         ]
-        return comment_data
+
+
+class LikeIntentSerializer(serializers.Serializer):
+    """
+    This serializer represents a like or unlike queued by a client.
+
+    Fields:
+        - post_slug: the slug of the post;
+        - action: either "like" or "unlike".
+    """
+
+    post_slug = serializers.SlugField()
+    action = serializers.ChoiceField(choices=["like", "unlike"])
+
+
+class BulkLikeSerializer(serializers.Serializer):
+    """
+    This serializer is responsible for validating a batch of likes and unlikes.
+
+    Fields:
+        - likes: the intents through `LikeIntentSerializer`, applied in order (up
+        to `HELENITE_BULK_LIKES_MAX_SIZE`).
+    """
+
+    likes = LikeIntentSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=getattr(settings, "HELENITE_BULK_LIKES_MAX_SIZE", 100),
+    )
 
 
 class NewCommentSerializer(serializers.ModelSerializer):
@@ -0,0 +1,290 @@
+from django.db.models import F, QuerySet
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.contrib.auth.models import User
+
+from rest_framework.authtoken.models import Token
+
+from helenite_app import events, response_cache, search
+from helenite_app.authentication import invalidate_token_cache
+from helenite_app.models import (
+    Profile,
+    FriendRequest,
+    Post,
+    Like,
+    Comment,
+    TimelineEntry,
+    IndexChange,
+    FeedEvent,
+)
+
+
+# The counter on ``Post`` kept by each model, and the field pointing to the post.
+POST_COUNTERS = {
+    Like: ("like_parent_post_id", "post_like_count"),
+    Comment: ("comment_parent_post_id", "post_comment_count"),
+}
+
+# The events pushed to the feed stream when a like or comment is created, and
+# when it's deleted.
+STREAM_EVENTS = {
+    Like: (events.LIKE, events.UNLIKE),
+    Comment: (events.COMMENT, events.COMMENT_DELETED),
+}
+
+
+def deleted_with_post(**kwargs):
+    """
+    Returns whether a like or comment is deleted in cascade from the deletion of
+    its post (or of many posts), which takes care of the post's changes itself.
+    """
+
+    origin = kwargs.get("origin")
+    if isinstance(origin, QuerySet):
+        return origin.model is Post
+    return isinstance(origin, Post)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, **kwargs):
+    """
+    Keeps the local search backend in sync with saved profiles and posts.
+    """
+
+    search.get_search_backend().update(instance)
+
+
+@receiver(post_delete, sender=Profile)
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    """
+    Removes deleted profiles and posts from the local search backend.
+    """
+
+    search.get_search_backend().remove(instance)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Profile)
+@receiver(post_delete, sender=Post)
+def record_index_change(sender, instance, **kwargs):
+    """
+    Queues saved and deleted profiles and posts to be synced with Algolia by the
+    ``process_index_changes`` command, in the transaction of the change.
+    """
+
+    IndexChange.objects.record(instance)
+
+
+@receiver(post_save, sender=Profile)
+def record_posts_index_change(sender, instance, created, **kwargs):
+    """
+    Queues every post of a profile that changed its privacy, since whether they're
+    indexed follows it.
+    """
+
+    if not created and "private_profile" in getattr(instance, "changed_fields", set()):
+        IndexChange.objects.record_queryset(
+            Post.objects.filter(post_parent_user_id=instance.user_id)
+        )
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_search_results(sender, instance, created, **kwargs):
+    """
+    Drops the cached profile searches when a profile changes an indexed field, and
+    the cached post searches as well when it changes its privacy.
+    """
+
+    changed = getattr(instance, "changed_fields", set())
+    if created or changed & {"custom_slug_profile", "first_name", "last_name"}:
+        search.result_cache.invalidate("Helenite_Profile")
+    if "private_profile" in changed:
+        search.result_cache.invalidate("Helenite_Profile")
+        search.result_cache.invalidate("Helenite_Post")
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def increment_post_counter(sender, instance, created, **kwargs):
+    """
+    Counts a new like or comment on its post with an atomic increment.
+    """
+
+    if created:
+        post_field, counter = POST_COUNTERS[sender]
+        Post.objects.filter(pk=getattr(instance, post_field)).update(
+            **{counter: F(counter) + 1}
+        )
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def decrement_post_counter(sender, instance, **kwargs):
+    """
+    Discounts a deleted like or comment from its post with an atomic decrement.
+    Skipped for the likes and comments deleted alongside their post.
+    """
+
+    if deleted_with_post(**kwargs):
+        return
+
+    post_field, counter = POST_COUNTERS[sender]
+    Post.objects.filter(
+        pk=getattr(instance, post_field), **{f"{counter}__gt": 0}
+    ).update(**{counter: F(counter) - 1})
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_response(sender, instance, **kwargs):
+    """
+    Drops the cached responses showing a profile that changed.
+    """
+
+    response_cache.bump_profile(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_response(sender, instance, **kwargs):
+    """
+    Drops the cached responses showing a post that changed: the post itself and
+    the profile of its author.
+    """
+
+    response_cache.bump_post(instance.pk, instance.post_parent_user_id)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def record_parent_post_change(sender, instance, **kwargs):
+    """
+    Drops the cached responses showing the post of a like or comment, since they
+    include its counters, likers and first comments, logs that its counters
+    changed for the feed sync and pushes the like or comment to the feed streams.
+    """
+
+    # The post is deleted as well: its deletion is logged and pushed instead.
+    if kwargs["signal"] is post_delete and deleted_with_post(**kwargs):
+        return
+
+    post_field, _ = POST_COUNTERS[sender]
+    post_id = getattr(instance, post_field)
+    author_id, post_slug = Post.objects.filter(pk=post_id).values_list(
+        "post_parent_user_id", "post_slug"
+    ).first() or (None, None)
+    response_cache.bump_post(post_id, author_id)
+    if author_id is None:
+        return
+
+    FeedEvent.objects.record(FeedEvent.UPDATED, post_id, author_id)
+
+    created_event, deleted_event = STREAM_EVENTS[sender]
+    if kwargs["signal"] is post_save:
+        if kwargs["created"]:
+            events.publish_post_event(created_event, post_slug, author_id)
+    else:
+        events.publish_post_event(deleted_event, post_slug, author_id)
+
+
+@receiver(post_save, sender=Post)
+def record_created_post(sender, instance, created, **kwargs):
+    """
+    Logs new posts for the feed sync, and pushes them to the feed streams.
+    """
+
+    if created:
+        FeedEvent.objects.record(
+            FeedEvent.CREATED, instance.pk, instance.post_parent_user_id
+        )
+        events.publish_post_event(
+            events.POST, instance.post_slug, instance.post_parent_user_id
+        )
+
+
+@receiver(post_delete, sender=Post)
+def record_deleted_post(sender, instance, **kwargs):
+    """
+    Logs deleted posts for the feed sync, alongside their slug since they can't
+    be looked up anymore, and pushes the deletion to the feed streams.
+    """
+
+    FeedEvent.objects.record(
+        FeedEvent.DELETED,
+        instance.pk,
+        instance.post_parent_user_id,
+        post_slug=instance.post_slug,
+    )
+    events.publish_post_event(
+        events.POST_DELETED, instance.post_slug, instance.post_parent_user_id
+    )
+
+
+@receiver(pre_delete, sender=Post)
+def invalidate_feeds_of_deleted_post(sender, instance, **kwargs):
+    """
+    Invalidates the feeds showing a post about to be deleted, which are found
+    before its timeline entries are deleted in cascade.
+    """
+
+    response_cache.bump_feeds(
+        TimelineEntry.objects.filter(entry_post=instance).values_list(
+            "entry_owner_id", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=FriendRequest)
+@receiver(post_delete, sender=FriendRequest)
+def invalidate_friend_requests(sender, instance, **kwargs):
+    """
+    Invalidates the profile of the user receiving a friend request, on which the
+    pending requests are listed.
+    """
+
+    response_cache.bump_profile(instance.request_sent_to_id)
+
+
+@receiver(m2m_changed, sender=Profile.friends.through)
+def invalidate_friends_feeds(sender, instance, action, pk_set, **kwargs):
+    """
+    Invalidates the feeds of the users whose friendships changed, since their
+    timelines gain or lose the posts of the other side.
+    """
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    user_ids = [instance.user_id]
+    if pk_set:
+        user_ids += Profile.objects.filter(pk__in=pk_set).values_list(
+            "user_id", flat=True
+        )
+    response_cache.bump_feeds(user_ids)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """
+    Removes deleted tokens from the authentication cache, including the ones
+    deleted alongside their user.
+    """
+
+    invalidate_token_cache(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """
+    Removes the tokens of a user from the authentication cache whenever the user
+    changes, so the next requests see its new state (e.g. ``is_active``).
+    """
+
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+        invalidate_token_cache(key)
@@ -1,16 +1,36 @@
+from django.conf import settings
 from django.urls import path
 
 from helenite_app import views
 
+
+def read_view(async_view):
+    """
+    Returns the async variant of a read-heavy view when `HELENITE_ASYNC_VIEWS` is on,
+    and the DRF view it replaces otherwise.
+    """
+
+    if getattr(settings, "HELENITE_ASYNC_VIEWS", False):
+        return async_view.as_view()
+    return async_view.drf_view_class.as_view()
+
+
 urlpatterns = [
     path("login/", views.LoginView.as_view(), name="login_endpoint"),
     path("logout/", views.LogoutView.as_view(), name="logout_endpoint"),
     path("register/", views.RegisterCreateAPIView.as_view(), name="register_new_user"),
-    path("feed/", views.FeedListCreateAPIView.as_view(), name="feed_endpoint"),
-    path("search/", views.SearchListView.as_view(), name="search_endpoint"),
-    path("feed/discover/", views.DiscoverListAPIView.as_view(), name="discover_endpoint"),
-    path("profile/<slug:custom_slug_profile>/", views.ProfileRetriveAPIView.as_view(), name="profile_info_endpoint"),
+    path("feed/", read_view(views.AsyncFeedListAPIView), name="feed_endpoint"),
+    path("feed/likes/", views.FeedLikesAPIView.as_view(), name="feed_likes_endpoint"),
+    path("feed/sync/", views.FeedSyncAPIView.as_view(), name="feed_sync_endpoint"),
+    path("feed/stream/", views.FeedStreamView.as_view(), name="feed_stream_endpoint"),
+    path("search/", read_view(views.AsyncSearchListView), name="search_endpoint"),
+    path("search/stats/", views.SearchCacheStatsAPIView.as_view(), name="search_stats_endpoint"),
+    path("feed/discover/", read_view(views.AsyncDiscoverListAPIView), name="discover_endpoint"),
+    path("profile/<slug:custom_slug_profile>/", read_view(views.AsyncProfileRetriveAPIView), name="profile_info_endpoint"),
+    path("profile/<slug:custom_slug_profile>/posts/", views.ProfilePostsListAPIView.as_view(), name="profile_posts_endpoint"),
     path("profile/<slug:custom_slug_profile>/friends/", views.FriendsListAPIView.as_view(), name="profile_friends_endpoint"),
     path("profile/<slug:custom_slug_profile>/change-settings/", views.ChangeSettingsAPIView.as_view(), name="change_settings_endpoint"),
     path("profile/post/<slug:post_slug>/", views.PostRetriveCreateDeleteAPIView.as_view(), name="single_post_endpoint"),
+    path("profile/post/<slug:post_slug>/comments/", views.CommentsListAPIView.as_view(), name="post_comments_endpoint"),
+    path("profile/post/<slug:post_slug>/likes/", views.PostLikesListAPIView.as_view(), name="post_likes_endpoint"),
 ]
@@ -1,32 +1,58 @@
-from django.utils import timezone
-
-from django.db.models import Q
+import json
+import time
+import random
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.views import View
+from django.db import connections, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F, Q, Prefetch
+from django.urls import reverse
 from django.contrib.auth.models import User
 
-from rest_framework import generics, serializers, status
+from rest_framework import exceptions, generics, serializers, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, JSONParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 
-from helenite_app import client
+from helenite_app import discover, events, feed_sync, likes, response_cache, search
+from helenite_app.client import SearchUnavailable
 
-from helenite_app.models import Profile, FriendRequest, Post, Like
+from helenite_app.models import (
+    Profile,
+    FriendRequest,
+    Post,
+    Comment,
+    TimelineEntry,
+)
 from helenite_app.serializers import (
     FeedSerializer,
     NewPostSerializer,
     SinglePostSerializer,
     FeedForSingleProfileSerializer,
+    FeedWithoutProfileInfoSerializer,
     SettingsSerializer,
     UserRegistrationSerializer,
     NewCommentSerializer,
     ProfileSearchSerializer,
     ProfileFriendsSerializer,
+    CommentSerializer,
+    BulkLikeSerializer,
+)
+from helenite_app.pagination import KeysetPagination
+from helenite_app.authentication import (
+    TokenAuthentication,
+    token_expired,
+    invalidate_token_cache,
 )
-from helenite_app.authentication import TokenAuthentication
 from helenite_app.permissions import TokenAgePermission, IsUserPermission
 
 
@@ -49,10 +75,9 @@ class LoginView(ObtainAuthToken):
         user = serializer.validated_data["user"]
         try:
             token = Token.objects.get(user=user)
-            time_difference = timezone.now() - token.created
-            token_valid_duration = timezone.timedelta(days=7)
 
-            if time_difference > token_valid_duration:
+            if token_expired(token):
+                invalidate_token_cache(token.key)
                 token.delete()
                 token = Token.objects.create(user=user)
 
@@ -78,6 +103,7 @@ class LogoutView(APIView):
 
     def post(self, request):
         token = Token.objects.get(user=request.user)
+        invalidate_token_cache(token.key)
         token.delete()
 
         return Response({"message": "Logout successfull."}, status=status.HTTP_200_OK)
@@ -117,15 +143,19 @@ class FeedListCreateAPIView(generics.ListCreateAPIView):
     a new post.
 
     Inherits from DRF's ListAPIView, providing an endpoint to fetch a collection
-    of posts from friends and the user themselves.
+    of posts from friends and the user themselves, paginated with a cursor. Pages
+    carry ETag and Last-Modified headers, so polling clients get a "304 Not
+    Modified" while nothing on the page changed.
 
-    Endpoint URL: /api/v1/feed/
+    Endpoint URL: /api/v1/feed/?cursor=cursor
     HTTP Methods Allowed: GET, POST, PUT
     """
 
     permission_classes = [IsAuthenticated, TokenAgePermission]
     authentication_classes = [TokenAuthentication, SessionAuthentication]
     parser_classes = [JSONParser, MultiPartParser]
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-feed_date", "-id")
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -134,12 +164,27 @@ class FeedListCreateAPIView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        friends = user.profile.friends.all()
 
-        queryset = Post.objects.filter(
-            Q(post_parent_user=user) | Q(post_parent_user__profile__in=friends)
-        ).order_by("-post_publication_date")
-        return queryset
+        queryset = (
+            Post.objects.filter(timeline_entries__entry_owner=user)
+            .annotate(feed_date=F("timeline_entries__entry_publication_date"))
+            .order_by(*self.keyset_ordering)
+        )
+        return FeedSerializer.setup_eager_loading(queryset)
+
+    def get(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        versions = response_cache.get_versions(
+            ("feed", request.user.pk),
+            *[("post", post.pk) for post in page],
+            *[("profile", post.post_parent_user_id) for post in page],
+        )
+
+        def get_response():
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        return response_cache.conditional_get(request, versions, get_response)
 
     def perform_create(self, serializer):
         try:
@@ -156,23 +201,14 @@ class FeedListCreateAPIView(generics.ListCreateAPIView):
         serializer.save(post_parent_user=get_user)
 
     def put(self, request, *args, **kwargs):
-        serializer_class = self.get_serializer_class()
-        post_slug = request.data.get("post_slug")
-        like_owner = request.user
+        result = likes.toggle_like(request.user, request.data.get("post_slug"))
 
-        try:
-            post = Post.objects.get(post_slug=post_slug)
-        except Post.DoesNotExist:
+        if result is None:
             return Response(
                 {"detail": "Post not found."}, status=status.HTTP_404_NOT_FOUND
             )
 
-        like, created = Like.objects.get_or_create(
-            like_owner=like_owner, like_parent_post=post
-        )
-
-        if not created:
-            like.delete()
+        if result == likes.UNLIKED:
             return Response(
                 {"detail": "Successfully unliked post."}, status=status.HTTP_200_OK
             )
@@ -182,12 +218,233 @@ class FeedListCreateAPIView(generics.ListCreateAPIView):
         )
 
 
+class FeedLikesAPIView(APIView):
+    """
+    View dedicated to liking and unliking many posts with a single request, as
+    well as checking which of them the user liked.
+
+    Inherits from DRF's APIView. POST takes a list of post slugs with "like" or
+    "unlike" intents (applied in order) and returns the outcome for each slug:
+    "liked", "unliked" or "not found". GET takes the slugs on the "posts" query
+    parameter, separated by commas, and returns whether each one was liked.
+
+    Endpoint URL: /api/v1/feed/likes/?posts=slug,slug
+    HTTP Methods Allowed: GET, POST
+    """
+
+    permission_classes = [IsAuthenticated, TokenAgePermission]
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    intents = {"like": likes.LIKED, "unlike": likes.UNLIKED}
+
+    def get(self, request):
+        post_slugs = [
+            slug for slug in request.query_params.get("posts", "").split(",") if slug
+        ]
+        max_size = getattr(settings, "HELENITE_BULK_LIKES_MAX_SIZE", 100)
+        if not post_slugs or len(post_slugs) > max_size:
+            return Response(
+                {"detail": f"Provide between 1 and {max_size} post slugs."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        liked = likes.liked_post_slugs(request.user, post_slugs)
+        return Response({"liked": {slug: slug in liked for slug in post_slugs}})
+
+    def post(self, request):
+        serializer = BulkLikeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        intents = {}
+        for intent in serializer.validated_data["likes"]:
+            intents[intent["post_slug"]] = self.intents[intent["action"]]
+
+        results = likes.apply_likes(request.user, intents)
+        return Response(
+            {
+                "results": {
+                    slug: result or "not found" for slug, result in results.items()
+                }
+            }
+        )
+
+
+class FeedSyncAPIView(APIView):
+    """
+    View dedicated to refreshing a feed the client already has, by sending only
+    what changed since its last sync.
+
+    Inherits from DRF's APIView. Without a cursor, it returns the cursor where the
+    client starts syncing from, and should be called right before loading the
+    feed. With a cursor, it returns the posts created since then, the counters of
+    the posts that changed, the endpoints of the deleted ones and the cursor for
+    the next sync (called again right away while "has_more" is true). Changes are
+    read from the ``FeedEvent`` log once they're `HELENITE_FEED_SYNC_COMMIT_LAG`
+    seconds old, and cursors older than its retention get a "410 Gone", meaning
+    the feed has to be reloaded.
+
+    Endpoint URL: /api/v1/feed/sync/?cursor=cursor
+    HTTP Methods Allowed: GET
+    """
+
+    permission_classes = [IsAuthenticated, TokenAgePermission]
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+
+    def get(self, request):
+        encoded = request.query_params.get("cursor")
+        if not encoded:
+            return Response(
+                {
+                    "cursor": feed_sync.get_start_cursor(),
+                    "has_more": False,
+                    "posts": [],
+                    "updated": [],
+                    "deleted": [],
+                }
+            )
+
+        try:
+            after_id = feed_sync.decode_cursor(encoded)
+        except feed_sync.CursorExpired:
+            return Response(
+                {"detail": "This cursor expired, reload the feed."},
+                status=status.HTTP_410_GONE,
+            )
+
+        changes = feed_sync.get_changes(
+            request.user,
+            after_id,
+            getattr(settings, "HELENITE_FEED_SYNC_MAX_SIZE", 500),
+        )
+        posts = FeedSerializer.setup_eager_loading(
+            Post.objects.filter(id__in=changes["created"]).order_by(
+                "-post_publication_date", "-id"
+            )
+        )
+        updated = Post.objects.filter(id__in=changes["updated"]).values_list(
+            "post_slug", "post_like_count", "post_comment_count"
+        )
+
+        return Response(
+            {
+                "cursor": changes["cursor"],
+                "has_more": changes["has_more"],
+                "posts": FeedSerializer(
+                    posts, many=True, context={"request": request}
+                ).data,
+                "updated": [
+                    {
+                        "endpoint": reverse(
+                            "single_post_endpoint", kwargs={"post_slug": slug}
+                        ),
+                        "likes_count": likes_count,
+                        "comments_count": comments_count,
+                    }
+                    for slug, likes_count, comments_count in updated
+                ],
+                "deleted": [
+                    reverse("single_post_endpoint", kwargs={"post_slug": slug})
+                    for slug in changes["deleted"]
+                ],
+            }
+        )
+
+
+class FeedStreamView(View):
+    """
+    View streaming the changes to the feed of the logged-in user as server-sent
+    events, instead of having the client poll the feed.
+
+    An async Django view, only served by the ASGI application (helenite.asgi): each
+    connection waits on its `helenite_app.events` subscription without holding a
+    thread. Every event names its type ("post", "post_deleted", "like", "unlike",
+    "comment" or "comment_deleted") and carries the endpoint of the post; clients
+    fetch the details through the feed sync endpoint. Connections are closed after
+    `HELENITE_STREAM_MAX_AGE` seconds, and reopened by the client.
+
+    Endpoint URL: /api/v1/feed/stream/
+    HTTP Methods Allowed: GET
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Streams outlive any transaction, and async views can't run in one.
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    def authenticate(self, request):
+        """
+        Returns the user of the request, authenticated by a Bearer token or the
+        session like the other endpoints, or None.
+        """
+
+        try:
+            credentials = TokenAuthentication().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return None
+        if credentials is not None:
+            request.user, request.auth = credentials
+
+        if request.user.is_authenticated and TokenAgePermission().has_permission(
+            request, self
+        ):
+            return request.user
+        return None
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {"detail": "The feed stream is only served over ASGI."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+
+        user = await sync_to_async(self.authenticate)(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        broker = events.get_broker()
+        response = StreamingHttpResponse(
+            self.stream(broker, broker.subscribe(user.pk)),
+            content_type="text/event-stream",
+        )
+        response.headers["Cache-Control"] = "no-cache"
+        # Keeps reverse proxies from buffering the events.
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, broker, subscription):
+        """
+        Yields the events of the subscription in the server-sent events format,
+        with a comment every `HELENITE_STREAM_KEEPALIVE` seconds without events.
+        """
+
+        keepalive = getattr(settings, "HELENITE_STREAM_KEEPALIVE", 15)
+        deadline = time.monotonic() + getattr(settings, "HELENITE_STREAM_MAX_AGE", 300)
+        try:
+            # Clients reconnect a second after the stream is closed.
+            yield "retry: 1000\n\n"
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), min(keepalive, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+
 class DiscoverListAPIView(generics.ListAPIView):
     """
     View dedicated to providing random posts from random users.
 
     Inherits from DRF's ListAPIView to provide a list of up to 30 random posts to
-    the user so long as the post owner haven't made their profile private.
+    the user so long as the post owner haven't made their profile private. The
+    posts are sampled from a cached pool of recent public posts (see
+    `helenite_app.discover`) instead of sorting the whole table randomly.
 
     Endpoint URL: /api/v1/feed/discover/
     HTTP Methods Allowed: GET
@@ -199,12 +456,17 @@ class DiscoverListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
+        sample = discover.sample_post_ids(user)
 
+        # The pool may be a few minutes old, so privacy is checked again.
         queryset = Post.objects.filter(
-            Q(post_parent_user__profile__private_profile=False)
+            Q(id__in=sample)
+            & Q(post_parent_user__profile__private_profile=False)
             & ~Q(post_parent_user=user)
-        ).order_by("?")[:30]
-        return queryset
+        )
+        posts = list(FeedSerializer.setup_eager_loading(queryset))
+        random.shuffle(posts)
+        return posts
 
 
 class SearchListView(generics.ListAPIView):
@@ -212,8 +474,9 @@ class SearchListView(generics.ListAPIView):
     View dedicated to search both the `Profile` as well as the `Post` indexes.
 
     Inherits from DRF's ListAPIView to provide a list of profiles or posts that
-    match the query and the index provided by the user through the use of the Algolia
-    search engine.
+    match the query and the index provided by the user through the use of the search
+    backend set on `HELENITE_SEARCH_BACKEND` (Algolia by default). Posts are
+    paginated and serialized like the feed.
 
     Endpoint URL: /api/v1/search/?q=query+parameters&index=index
     HTTP Methods Allowed: GET
@@ -223,9 +486,41 @@ class SearchListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, TokenAgePermission]
     authentication_classes = [TokenAuthentication, SessionAuthentication]
 
+    def get_index(self):
+        return self.request.GET.get("index", "Helenite_Profile")
+
+    def get_serializer_class(self):
+        if self.get_index() == "Helenite_Post":
+            return FeedSerializer
+        return ProfileSearchSerializer
+
+    def get_hits_queryset(self, index, slugs):
+        """
+        Returns the profiles or posts behind the hits of the search engine.
+
+        Privacy is checked again, like on the discover page: the index is updated
+        by a separate worker, so it may still hold the profiles that just went
+        private and their posts.
+
+        Args:
+            - index: "Helenite_Profile" or "Helenite_Post";
+            - slugs: the slugs found on the endpoints of the hits.
+        """
+
+        if index == "Helenite_Post":
+            return FeedSerializer.setup_eager_loading(
+                Post.objects.filter(
+                    post_slug__in=slugs,
+                    post_parent_user__profile__private_profile=False,
+                )
+            )
+        return Profile.objects.filter(
+            custom_slug_profile__in=slugs, private_profile=False
+        ).select_related("user")
+
     def get_queryset(self):
         query = self.request.GET.get("q")
-        index = self.request.GET.get("index", "Helenite_Profile")
+        index = self.get_index()
 
         if not query or query == "":
             return None
@@ -234,39 +529,78 @@ class SearchListView(generics.ListAPIView):
         if index != "Helenite_Profile" and index != "Helenite_Post":
             return None
 
-        results_from_algolia = client.perform_search(query, index)
+        results = search.perform_search(query, index)
 
-        if results_from_algolia["hits"] == []:
+        if results["hits"] == []:
             return None
 
         slugs = []
-        for hit in results_from_algolia["hits"]:
+        for hit in results["hits"]:
             endpoint = hit["endpoint"]
             slug = endpoint.split("/")[-2]
             slugs.append(slug)
 
-        queryset = Profile.objects.filter(custom_slug_profile__in=slugs)
-        return queryset
+        queryset = self.get_hits_queryset(index, slugs)
+        if index == "Helenite_Post":
+            found = {post.post_slug: post for post in queryset}
+        else:
+            found = {profile.custom_slug_profile: profile for profile in queryset}
+
+        # Keeps the ranking from the search engine.
+        return [found[slug] for slug in slugs if slug in found]
 
     def get(self, request, *args, **kwargs):
-        search_results = self.get_queryset()
+        try:
+            search_results = self.get_queryset()
+        except SearchUnavailable:
+            return Response(
+                {"detail": "Search is temporarily unavailable."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
 
-        if search_results is None:
+        if not search_results:
             return Response(
                 {"detail": "Sorry, we couldn't find any matches."},
                 status=status.HTTP_204_NO_CONTENT,
             )
 
+        if self.get_index() == "Helenite_Post":
+            page = self.paginate_queryset(search_results)
+            return self.get_paginated_response(
+                self.get_serializer(page, many=True).data
+            )
+
         return Response(self.get_serializer(search_results, many=True).data)
 
 
+class SearchCacheStatsAPIView(APIView):
+    """
+    View dedicated to monitoring the search result cache of the current process.
+
+    Inherits from DRF's APIView to provide the hit, miss and eviction counters of
+    the cache. Restricted to staff.
+
+    Endpoint URL: /api/v1/search/stats/
+    HTTP Methods Allowed: GET
+    """
+
+    permission_classes = [IsAuthenticated, IsAdminUser, TokenAgePermission]
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+
+    def get(self, request):
+        return Response(search.result_cache.stats())
+
+
 class ProfileRetriveAPIView(generics.RetrieveUpdateAPIView):
     """
     View to retrieve a single profile based on the custom_slug_profile, also responsible
     for creating and accepting friend requests.
 
-    Inherits from DRF's RetrieveAPIView to provide a single profile alongside its
-    posts.
+    Inherits from DRF's RetrieveAPIView to provide a single profile alongside the
+    first page of its posts (see `ProfilePostsListAPIView` for the next ones). The
+    part of the response shared by every user is cached until the profile or its
+    posts change, which also provides its ETag and Last-Modified headers (see
+    `helenite_app.response_cache`).
 
     Endpoint URL: /api/v1/profile/<slug:custom_slug_profile>/
     HTTP Methods Allowed: GET, POST, PUT.
@@ -278,13 +612,23 @@ class ProfileRetriveAPIView(generics.RetrieveUpdateAPIView):
     authentication_classes = [TokenAuthentication, SessionAuthentication]
 
     def get_queryset(self):
-        queryset = Profile.objects.filter()
+        queryset = Profile.objects.select_related("user")
         return queryset
 
     def get(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        profile = self.get_object()
+        versions = response_cache.get_versions(("profile", profile.user_id))
+        serializer = self.get_serializer()
+
+        def get_response():
+            shared = response_cache.get_or_set(
+                request.build_absolute_uri(request.path),
+                versions,
+                lambda: serializer.get_shared_representation(profile),
+            )
+            return Response(serializer.add_viewer_fields(shared))
+
+        return response_cache.conditional_get(request, versions, get_response)
 
     def _check_permissions(self, request, profile):
         if request.user != profile.user:
@@ -312,10 +656,12 @@ class ProfileRetriveAPIView(generics.RetrieveUpdateAPIView):
             )
 
         if self._check_permissions(request, profile):
-            if not self._check_existing_request(request, profile, "POST"):
-                FriendRequest.objects.create(
-                    request_made_by=request.user, request_sent_to=profile.user
-                )
+            # The (request_made_by, request_sent_to) pair is unique, so concurrent
+            # requests can't create the same friend request twice.
+            _, created = FriendRequest.objects.get_or_create(
+                request_made_by=request.user, request_sent_to=profile.user
+            )
+            if created:
                 return Response(
                     {"message": "Friend request created successfully."},
                     status=status.HTTP_201_CREATED,
@@ -345,6 +691,9 @@ class ProfileRetriveAPIView(generics.RetrieveUpdateAPIView):
                 request.user.profile.friends.add(profile)
                 profile.friends.add(request.user.profile)
 
+                TimelineEntry.objects.backfill(request.user, profile.user)
+                TimelineEntry.objects.backfill(profile.user, request.user)
+
                 get_request.delete()
                 return Response(
                     {"message": "Friendship added successfully."},
@@ -361,6 +710,32 @@ class ProfileRetriveAPIView(generics.RetrieveUpdateAPIView):
             )
 
 
+class ProfilePostsListAPIView(generics.ListAPIView):
+    """
+    View to retrieve the posts made by a given profile based on the
+    custom_slug_profile.
+
+    Inherits from DRF's ListAPIView to provide the posts from newest to oldest,
+    paginated with a cursor.
+
+    Endpoint URL: /api/v1/profile/<slug:custom_slug_profile>/posts/?cursor=cursor
+    HTTP Methods Allowed: GET
+    """
+
+    serializer_class = FeedWithoutProfileInfoSerializer
+    permission_classes = [IsAuthenticated, TokenAgePermission]
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = Post.objects.filter(
+            post_parent_user__profile__custom_slug_profile=self.kwargs[
+                "custom_slug_profile"
+            ]
+        )
+        return FeedWithoutProfileInfoSerializer.setup_eager_loading(queryset)
+
+
 class FriendsListAPIView(generics.ListAPIView):
     """
     View to retrieve a list of friends for a given profile based on the custom_slug_profile.
@@ -377,8 +752,14 @@ class FriendsListAPIView(generics.ListAPIView):
     authentication_classes = [TokenAuthentication, SessionAuthentication]
 
     def get_queryset(self):
-        queryset = Profile.objects.filter(
-            custom_slug_profile=self.kwargs["custom_slug_profile"]
+        queryset = (
+            Profile.objects.filter(
+                custom_slug_profile=self.kwargs["custom_slug_profile"]
+            )
+            .select_related("user")
+            .prefetch_related(
+                Prefetch("friends", queryset=Profile.objects.select_related("user"))
+            )
         )
         return queryset
 
@@ -415,6 +796,7 @@ class ChangeSettingsAPIView(generics.RetrieveUpdateAPIView):
                     request.user.set_password(new_password)
                     request.user.save()
                     token = Token.objects.get(user=request.user)
+                    invalidate_token_cache(token.key)
                     token.delete()
                     return Response(
                         {
@@ -438,6 +820,10 @@ class ChangeSettingsAPIView(generics.RetrieveUpdateAPIView):
         profile = self.get_object()
         if request.user == profile.user:
             found_user = User.objects.get(username=profile.user.username)
+            for key in Token.objects.filter(user=found_user).values_list(
+                "key", flat=True
+            ):
+                invalidate_token_cache(key)
             found_user.delete()
             return Response(
                 {"detail": "Accound successfully deleted."},
@@ -457,7 +843,9 @@ class PostRetriveCreateDeleteAPIView(generics.RetrieveAPIView):
 
     Inherits from DRF's RetrieveAPIView to provide a single post alongside its
     likes, comments and counts for both. Depending on the HTTP method and permissions,
-    also allows deleting.
+    also allows deleting. The part of the response shared by every user is cached
+    until the post or its author change, which also provides its ETag and
+    Last-Modified headers (see `helenite_app.response_cache`).
 
     Endpoint URL: /api/v1/profile/post/<slug:post_slug>/
     HTTP Methods Allowed: GET, POST, PUT, DELETE
@@ -466,7 +854,7 @@ class PostRetriveCreateDeleteAPIView(generics.RetrieveAPIView):
     authentication_classes = [TokenAuthentication, SessionAuthentication]
     permission_classes = [IsAuthenticated, TokenAgePermission]
     parser_classes = [JSONParser, MultiPartParser]
-    queryset = Post.objects.filter()
+    queryset = SinglePostSerializer.setup_eager_loading(Post.objects.filter())
     lookup_field = "post_slug"
 
     def get_serializer_class(self):
@@ -492,7 +880,20 @@ class PostRetriveCreateDeleteAPIView(generics.RetrieveAPIView):
 
     def get(self, request, post_slug):
         post = self.get_object()
-        return Response(self.get_serializer(post).data)
+        versions = response_cache.get_versions(
+            ("post", post.pk), ("profile", post.post_parent_user_id)
+        )
+        serializer = self.get_serializer()
+
+        def get_response():
+            shared = response_cache.get_or_set(
+                request.build_absolute_uri(request.path),
+                versions,
+                lambda: serializer.get_shared_representation(post),
+            )
+            return Response(serializer.add_viewer_fields(shared))
+
+        return response_cache.conditional_get(request, versions, get_response)
 
     def post(self, request, post_slug):
         data = request.data
@@ -518,23 +919,14 @@ class PostRetriveCreateDeleteAPIView(generics.RetrieveAPIView):
         )
 
     def put(self, request, *args, **kwargs):
-        serializer_class = self.get_serializer_class()
-        post_slug = request.data.get("post_slug")
-        like_owner = request.user
+        result = likes.toggle_like(request.user, request.data.get("post_slug"))
 
-        try:
-            post = Post.objects.get(post_slug=post_slug)
-        except Post.DoesNotExist:
+        if result is None:
             return Response(
                 {"detail": "Post not found."}, status=status.HTTP_404_NOT_FOUND
             )
 
-        like, created = Like.objects.get_or_create(
-            like_owner=like_owner, like_parent_post=post
-        )
-
-        if not created:
-            like.delete()
+        if result == likes.UNLIKED:
             return Response(
                 {"detail": "Successfully unliked post."}, status=status.HTTP_200_OK
             )
@@ -542,3 +934,263 @@ class PostRetriveCreateDeleteAPIView(generics.RetrieveAPIView):
         return Response(
             {"detail": "Successfully liked post."}, status=status.HTTP_201_CREATED
         )
+
+
+class CommentsListAPIView(generics.ListAPIView):
+    """
+    View to retrieve the comments left on a single post based on the post_slug.
+
+    Inherits from DRF's ListAPIView to provide the comments from oldest to newest,
+    paginated with a cursor.
+
+    Endpoint URL: /api/v1/profile/post/<slug:post_slug>/comments/?cursor=cursor
+    HTTP Methods Allowed: GET
+    """
+
+    serializer_class = CommentSerializer
+    permission_classes = [IsAuthenticated, TokenAgePermission]
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    pagination_class = KeysetPagination
+    keyset_ordering = ("comment_publication_date", "id")
+
+    def get_queryset(self):
+        queryset = Comment.objects.filter(
+            comment_parent_post__post_slug=self.kwargs["post_slug"]
+        ).select_related("comment_user")
+        return queryset
+
+
+class PostLikesListAPIView(generics.ListAPIView):
+    """
+    View to retrieve every user who liked a single post based on the post_slug.
+
+    Inherits from DRF's ListAPIView to provide the profiles of the users who liked
+    the post, most recent likes first. Complements the preview of likers on the
+    posts themselves.
+
+    Endpoint URL: /api/v1/profile/post/<slug:post_slug>/likes/?limit=limit&offset=offset
+    HTTP Methods Allowed: GET
+    """
+
+    serializer_class = ProfileSearchSerializer
+    permission_classes = [IsAuthenticated, TokenAgePermission]
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+
+    def get_queryset(self):
+        queryset = (
+            Profile.objects.filter(
+                user__like__like_parent_post__post_slug=self.kwargs["post_slug"]
+            )
+            .select_related("user")
+            .order_by("-user__like__id")
+        )
+        return queryset
+
+
+class AsyncReadView(View):
+    """
+    Base for the async variants of the read-heavy endpoints, served in place of
+    their DRF views when `HELENITE_ASYNC_VIEWS` is on (see `helenite_app.urls`).
+
+    An async Django view: GET requests are answered by the ``get`` coroutine of
+    the subclass, ``get(drf_view, *args, **kwargs)``, which receives the
+    instance of ``drf_view_class`` set up for the request (holding the DRF
+    request) and the URL arguments. It reads through Django's async ORM
+    interface and awaits the slow calls instead of holding a worker thread, so a
+    single ASGI process serves many of them at once. Authentication,
+    permissions, error handling and rendering are still done by the DRF view, so
+    the responses don't change. Every other method is passed on to the DRF view
+    in a thread, inside a transaction when `ATOMIC_REQUESTS` is set.
+    """
+
+    drf_view_class = None
+    delegate = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(delegate=cls.drf_view_class.as_view(), **initkwargs)
+        # Async views can't run in a transaction, and CSRF is checked by DRF on
+        # session authenticated requests, like on the views they replace.
+        view.csrf_exempt = True
+        return transaction.non_atomic_requests(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await self.delegate_request(request, *args, **kwargs)
+
+        drf_view = self.drf_view_class()
+        drf_view.setup(request, *args, **kwargs)
+        drf_view.request = drf_view.initialize_request(request, *args, **kwargs)
+        drf_view.headers = drf_view.default_response_headers
+        try:
+            # Authenticates the user and checks the permissions.
+            await sync_to_async(drf_view.initial)(drf_view.request, *args, **kwargs)
+            response = await self.get(drf_view, *args, **kwargs)
+        except Exception as exc:
+            response = await sync_to_async(drf_view.handle_exception)(exc)
+
+        return drf_view.finalize_response(drf_view.request, response)
+
+    async def delegate_request(self, request, *args, **kwargs):
+        view = self.delegate
+        for alias, settings_dict in connections.settings.items():
+            if settings_dict["ATOMIC_REQUESTS"]:
+                view = transaction.atomic(using=alias)(view)
+        return await sync_to_async(view)(request, *args, **kwargs)
+
+
+class AsyncFeedListAPIView(AsyncReadView):
+    """
+    Async variant of `FeedListCreateAPIView`.
+
+    Endpoint URL: /api/v1/feed/?cursor=cursor
+    HTTP Methods Allowed: GET, POST, PUT
+    """
+
+    drf_view_class = FeedListCreateAPIView
+
+    async def get(self, drf_view, *args, **kwargs):
+        request = drf_view.request
+        page = await drf_view.paginator.apaginate_queryset(
+            drf_view.get_queryset(), request, drf_view
+        )
+        versions = await response_cache.aget_versions(
+            ("feed", request.user.pk),
+            *[("post", post.pk) for post in page],
+            *[("profile", post.post_parent_user_id) for post in page],
+        )
+
+        @sync_to_async
+        def get_response():
+            # The likes of the page are loaded by the serializer.
+            serializer = drf_view.get_serializer(page, many=True)
+            return drf_view.get_paginated_response(serializer.data)
+
+        return await response_cache.aconditional_get(request, versions, get_response)
+
+
+class AsyncDiscoverListAPIView(AsyncReadView):
+    """
+    Async variant of `DiscoverListAPIView`.
+
+    Endpoint URL: /api/v1/feed/discover/
+    HTTP Methods Allowed: GET
+    """
+
+    drf_view_class = DiscoverListAPIView
+
+    async def get(self, drf_view, *args, **kwargs):
+        user = drf_view.request.user
+        sample = await sync_to_async(discover.sample_post_ids)(user)
+
+        queryset = Post.objects.filter(
+            Q(id__in=sample)
+            & Q(post_parent_user__profile__private_profile=False)
+            & ~Q(post_parent_user=user)
+        )
+        posts = [post async for post in FeedSerializer.setup_eager_loading(queryset)]
+        random.shuffle(posts)
+
+        @sync_to_async
+        def get_response():
+            page = drf_view.paginate_queryset(posts)
+            serializer = drf_view.get_serializer(page, many=True)
+            return drf_view.get_paginated_response(serializer.data)
+
+        return await get_response()
+
+
+class AsyncSearchListView(AsyncReadView):
+    """
+    Async variant of `SearchListView`. The search backend is awaited through its
+    ``asearch`` method, which doesn't hold a thread while Algolia answers when
+    its async client is available (see `helenite_app.client.aperform_search`).
+
+    Endpoint URL: /api/v1/search/?q=query+parameters&index=index
+    HTTP Methods Allowed: GET
+    """
+
+    drf_view_class = SearchListView
+
+    async def get_results(self, drf_view):
+        query = drf_view.request.GET.get("q")
+        index = drf_view.get_index()
+
+        if not query or index not in ("Helenite_Profile", "Helenite_Post"):
+            return None
+
+        results = await search.aperform_search(query, index)
+        slugs = [hit["endpoint"].split("/")[-2] for hit in results["hits"]]
+        if not slugs:
+            return None
+
+        queryset = drf_view.get_hits_queryset(index, slugs)
+        if index == "Helenite_Post":
+            found = {post.post_slug: post async for post in queryset}
+        else:
+            found = {profile.custom_slug_profile: profile async for profile in queryset}
+
+        # Keeps the ranking from the search engine.
+        return [found[slug] for slug in slugs if slug in found]
+
+    async def get(self, drf_view, *args, **kwargs):
+        try:
+            search_results = await self.get_results(drf_view)
+        except SearchUnavailable:
+            return Response(
+                {"detail": "Search is temporarily unavailable."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        if not search_results:
+            return Response(
+                {"detail": "Sorry, we couldn't find any matches."},
+                status=status.HTTP_204_NO_CONTENT,
+            )
+
+        @sync_to_async
+        def get_response():
+            if drf_view.get_index() == "Helenite_Post":
+                page = drf_view.paginate_queryset(search_results)
+                return drf_view.get_paginated_response(
+                    drf_view.get_serializer(page, many=True).data
+                )
+            return Response(drf_view.get_serializer(search_results, many=True).data)
+
+        return await get_response()
+
+
+class AsyncProfileRetriveAPIView(AsyncReadView):
+    """
+    Async variant of `ProfileRetriveAPIView`.
+
+    Endpoint URL: /api/v1/profile/<slug:custom_slug_profile>/
+    HTTP Methods Allowed: GET, POST, PUT.
+    """
+
+    drf_view_class = ProfileRetriveAPIView
+
+    async def get(self, drf_view, *args, **kwargs):
+        request = drf_view.request
+        queryset = drf_view.get_queryset().filter(
+            custom_slug_profile=kwargs["custom_slug_profile"]
+        )
+        profile = await queryset.afirst()
+        if profile is None:
+            raise exceptions.NotFound()
+        drf_view.check_object_permissions(request, profile)
+
+        versions = await response_cache.aget_versions(("profile", profile.user_id))
+        serializer = drf_view.get_serializer()
+
+        async def build():
+            # Renders the first page of posts, reading their likes.
+            return await sync_to_async(serializer.get_shared_representation)(profile)
+
+        async def get_response():
+            shared = await response_cache.aget_or_set(
+                request.build_absolute_uri(request.path), versions, build
+            )
+            return Response(await sync_to_async(serializer.add_viewer_fields)(shared))
+
+        return await response_cache.aconditional_get(request, versions, get_response)
@@ -1,6 +1,5 @@
 import React from "react";
 import { Link, useLoaderData, useNavigate } from "react-router-dom";
-import { useSelector } from "react-redux";
 import { ToastContainer, toast } from "react-toastify";
 
 import "react-toastify/dist/ReactToastify.css";
@@ -15,7 +14,6 @@ export default function FeedComponent({ newPostComponent }) {
   const token = localStorage.getItem("token");
 
   const navigate = useNavigate();
-  const currentUser = useSelector((state) => state.userInfo.username);
   const response = useLoaderData();
 
   async function handleLike(event, endpoint) {
@@ -105,7 +103,7 @@ export default function FeedComponent({ newPostComponent }) {
                   >
                     <button
                       className={
-                        post.likes.includes(currentUser)
+                        post.liked_by_me
                           ? "text-helenite-green hover:text-white hover:underline"
                           : "hover:text-helenite-green hover:underline"
                       }
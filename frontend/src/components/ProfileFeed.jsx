@@ -95,7 +95,7 @@ export default function ProfileFeed() {
                   >
                     <button
                       className={
-                        post.likes.includes(currentUser)
+                        post.liked_by_me
                           ? "text-helenite-green hover:text-white hover:underline"
                           : "hover:text-helenite-green hover:underline"
                       }
@@ -132,7 +132,7 @@ export default function SinglePost() {
                   >
                     <button
                       className={
-                        response.likes.includes(currentUser)
+                        response.liked_by_me
                           ? "text-helenite-green hover:text-white hover:underline"
                           : "hover:text-helenite-green hover:underline"
                       }